@@ -0,0 +1,386 @@
+# scripts/benchmark.py
+"""
+Benchmarks for the dashboard's hot paths on synthetic, scalable data.
+
+The real datasets live in Git LFS / Google Drive, so every input here is
+generated: N-year × M-district daily climate frames, K-class landcover
+raster pairs, glacier polygon inventories, agriculture and threatened
+species tables and report texts. Results (median time, throughput and
+peak traced memory) are written as JSON so runs can be compared across
+commits.
+
+Run from the repository root:
+
+    python scripts/benchmark.py                          # 'small' sizes
+    python scripts/benchmark.py --scale medium -o bench_new.json
+    python scripts/benchmark.py -k landcover --raster 4000
+    python scripts/benchmark.py --compare bench_old.json bench_new.json
+"""
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import statistics
+import subprocess
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_ROOT, "streamlit_app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+SCALES = {
+    "small": dict(years=10, districts=5, raster=500, classes=10, glaciers=2000,
+                  crops=20, species=10, docs=50),
+    "medium": dict(years=30, districts=20, raster=2000, classes=12, glaciers=10000,
+                   crops=60, species=40, docs=300),
+    "large": dict(years=40, districts=77, raster=5000, classes=15, glaciers=40000,
+                  crops=150, species=100, docs=2000),
+}
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Synthetic data generators
+# ─────────────────────────────────────────────────────────────
+
+def make_climate_frame(n_years, n_districts, start_year=1981, missing_rate=0.01, seed=0):
+    """
+    Daily climate in the raw CSV layout (Date as text, one block of rows
+    per district) with seasonal temperature, gamma rainfall and a small
+    share of missing values.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(f"{start_year}-01-01", f"{start_year + n_years - 1}-12-31", freq="D")
+    n_days = len(dates)
+    n = n_days * n_districts
+
+    doy = np.tile(dates.dayofyear.to_numpy(), n_districts)
+    elevation_offset = np.repeat(rng.uniform(-8, 4, n_districts), n_days)
+    season = -np.cos(2 * np.pi * (doy - 15) / 365.25)
+    trend = np.tile(np.linspace(0, 0.03 * n_years, n_days), n_districts)
+    temp = 18 + 9 * season + elevation_offset + trend + rng.normal(0, 2, n)
+    monsoon = np.clip(np.sin(np.pi * (doy - 150) / 120), 0, None)
+
+    df = pd.DataFrame({
+        "Date": np.tile(dates.strftime("%Y-%m-%d").to_numpy(), n_districts),
+        "District": np.repeat([f"District_{i:02d}" for i in range(n_districts)], n_days),
+        "Latitude": np.repeat(rng.uniform(26.5, 30.2, n_districts), n_days),
+        "Longitude": np.repeat(rng.uniform(80.2, 88.1, n_districts), n_days),
+        "Precip": rng.gamma(0.4 + 1.6 * monsoon, 6),
+        "Humidity_2m": np.clip(60 + 30 * monsoon + rng.normal(0, 5, n), 0, 100),
+        "Temp_2m": temp,
+        "MaxTemp_2m": temp + rng.uniform(4, 9, n),
+        "MinTemp_2m": temp - rng.uniform(4, 9, n),
+        "WindSpeed_10m": rng.gamma(2, 1, n),
+    })
+    for col in ["Precip", "Temp_2m", "MaxTemp_2m", "WindSpeed_10m"]:
+        df.loc[rng.random(n) < missing_rate, col] = np.nan
+    return df
+
+def make_landcover_pair(size, n_classes, change_rate=0.1, seed=0):
+    """
+    Two size × size class rasters with spatially blocky classes; a share
+    `change_rate` of pixels moves to another class in the second one.
+    """
+    rng = np.random.default_rng(seed)
+    block = max(size // 50, 1)
+    coarse = rng.integers(1, n_classes + 1, size=(-(-size // block), -(-size // block)), dtype=np.uint8)
+    lc1 = np.kron(coarse, np.ones((block, block), dtype=np.uint8))[:size, :size]
+    changed = rng.random((size, size)) < change_rate
+    lc2 = lc1.copy()
+    lc2[changed] = rng.integers(1, n_classes + 1, size=int(changed.sum()), dtype=np.uint8)
+    return lc1, lc2
+
+def make_glacier_inventory(n_glaciers, years=(1980, 1990, 2000, 2010), seed=0):
+    """
+    Glacier outlines (EPSG:4326) repeated for every inventory year and
+    shrinking over time, with the shapefile's attribute columns.
+    """
+    import geopandas as gpd
+    import shapely
+
+    rng = np.random.default_rng(seed)
+    lon = rng.uniform(80.5, 88.0, n_glaciers)
+    lat = rng.uniform(27.8, 30.3, n_glaciers)
+    area0 = rng.lognormal(-0.5, 1.0, n_glaciers)  # km²
+
+    parts = []
+    for i, year in enumerate(years):
+        area = area0 * (1 - 0.04 * i) * rng.uniform(0.97, 1.0, n_glaciers)
+        half = np.sqrt(area) / 111 / 2  # rough km → degrees
+        parts.append(pd.DataFrame({
+            "ID": np.arange(n_glaciers) + i * n_glaciers,
+            "GLIMS_ID": [f"G{x:08.4f}E{y:07.4f}N" for x, y in zip(lon, lat)],
+            "Area_SqKm": area,
+            "Year": year,
+            "Longitude": lon,
+            "Latitude": lat,
+            "geometry": shapely.box(lon - half, lat - half, lon + half, lat + half),
+        }))
+    return gpd.GeoDataFrame(pd.concat(parts, ignore_index=True), crs="EPSG:4326")
+
+def make_agriculture_table(n_crops, start_year=1990, n_years=30, seed=0):
+    """
+    Commodity × fiscal-year table in the CBS layout ('1998/99' headers).
+    """
+    rng = np.random.default_rng(seed)
+    years = [f"{y}/{(y + 1) % 100:02d}" for y in range(start_year, start_year + n_years)]
+    base = rng.lognormal(6, 1, (n_crops, 1))
+    growth = 1 + rng.normal(0.02, 0.01, (n_crops, 1))
+    values = base * growth ** np.arange(n_years) * rng.normal(1, 0.05, (n_crops, n_years))
+    df = pd.DataFrame(np.round(values, 1), columns=years)
+    df.insert(0, "Agricultural Commodities", [f"Crop_{i:03d}" for i in range(n_crops)])
+    return df
+
+def make_threatened_table(n_groups, years=range(1998, 2018), seed=0):
+    """
+    Wide NSO-style threatened species table with mixed year headers.
+    """
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({"Major Group of Species": [f"Group {i}" for i in range(n_groups)]})
+    counts = rng.integers(10, 2000, (n_groups, 1)) + np.cumsum(rng.integers(0, 30, (n_groups, len(years))), axis=1)
+    for j, year in enumerate(years):
+        header = f"threatened species_Y{year}" if year >= 2007 else f"threatened species_{year}"
+        df[header] = counts[:, j]
+    return df
+
+WORDS = ("glacier melt flood drought monsoon rainfall temperature warming river basin "
+         "community farmers crop yield water scarcity landslide adaptation policy risk "
+         "emission carbon forest biodiversity snow himalaya heat wave resilience").split()
+
+def make_report_texts(n_docs, sentences_per_doc=12, words_per_sentence=14, seed=0):
+    """
+    Report-like documents built from a climate vocabulary.
+    """
+    rng = np.random.default_rng(seed)
+    opinion = ["severe", "good", "bad", "urgent", "positive", "terrible", "great", "serious"]
+    docs = []
+    for _ in range(n_docs):
+        sentences = []
+        for _ in range(sentences_per_doc):
+            words = list(rng.choice(WORDS, words_per_sentence))
+            words.insert(int(rng.integers(len(words))), str(rng.choice(opinion)))
+            sentences.append(" ".join(words).capitalize() + ".")
+        docs.append(" ".join(sentences))
+    return docs
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Timing and memory
+# ─────────────────────────────────────────────────────────────
+
+def measure(func, setup, repeats=3):
+    """
+    Times `func(*setup())` `repeats` times (setup is not timed), then runs
+    it once more under tracemalloc for the peak traced allocation.
+    Returns (list of seconds, peak MB).
+    """
+    times = []
+    for _ in range(repeats):
+        args = setup()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+
+    args = setup()
+    tracemalloc.start()
+    try:
+        func(*args)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return times, peak / 2**20
+
+def _uncached(func):
+    """
+    The function behind a st.cache_* decorator, so repeats measure work
+    rather than cache hits.
+    """
+    return getattr(func, "__wrapped__", func)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Benchmarks
+# ─────────────────────────────────────────────────────────────
+
+def build_benchmarks(params, workdir):
+    """
+    Returns a list of (name, items, unit, setup, func). Inputs are generated
+    once here; `setup` only hands out fresh copies and clears caches.
+    """
+    from utils.preprocess import clean_data
+    from utils.climate_model import prepare_yearly_variable, forecast_ensemble, ENSEMBLE_SIZE
+    from utils.landcover import compute_landcover_transition_matrix
+    from utils.glacier import extract_glacier_area_by_year
+    from utils.biodiversity import load_threatened_data, _build_threatened_store
+    from utils.agriculture import batch_crop_forecast, load_agriculture_data, _read_agriculture_long, _pivot_agriculture_wide
+    from utils.climate_agri_corr import compute_correlation_matrix
+    from utils import nlp_tools, keywords
+
+    clean = _uncached(clean_data)
+    climate_raw = make_climate_frame(params["years"], params["districts"])
+    climate_clean = clean(climate_raw.copy())
+    n_rows = len(climate_raw)
+    climate_yearly = prepare_yearly_variable(climate_clean.copy(), "Temp_2m")
+
+    lc1, lc2 = make_landcover_pair(params["raster"], params["classes"])
+
+    glaciers = make_glacier_inventory(params["glaciers"])
+    glacier_areas = pd.DataFrame({"Year": glaciers["Year"], "Area_km2": glaciers.to_crs(epsg=32645).area / 1e6})
+    glacier_geoms = glaciers.drop(columns="Area_SqKm")
+
+    agri_path = os.path.join(workdir, "agriculture.csv")
+    make_agriculture_table(params["crops"]).to_csv(agri_path, index=False)
+    _read_agriculture_long.clear()
+    _pivot_agriculture_wide.clear()
+    df_agri = load_agriculture_data(agri_path)
+
+    species_path = os.path.join(workdir, "threatened.csv")
+    make_threatened_table(params["species"]).to_csv(species_path, index=False)
+
+    texts = make_report_texts(params["docs"])
+
+    def fresh_nlp():
+        nlp_tools._analyze_document.clear()
+        keywords._cached_term_matrix.clear()
+        return (texts,)
+
+    def fresh_species():
+        _build_threatened_store.clear()
+        return (species_path,)
+
+    return [
+        ("clean_data", n_rows, "rows",
+         lambda: (climate_raw.copy(),), clean),
+        ("prepare_yearly_variable", n_rows, "rows",
+         lambda: (climate_clean.copy(), "Temp_2m"), prepare_yearly_variable),
+        ("forecast_ensemble", ENSEMBLE_SIZE, "members",
+         lambda: (climate_yearly, "Temp_2m"), forecast_ensemble),
+        ("compute_correlation_matrix", n_rows, "rows",
+         lambda: (climate_clean, df_agri), _uncached(compute_correlation_matrix)),
+        ("compute_landcover_transition_matrix", lc1.size, "pixels",
+         lambda: (lc1, lc2), compute_landcover_transition_matrix),
+        ("extract_glacier_area_by_year[areas]", len(glacier_areas), "polygons",
+         lambda: (glacier_areas,), extract_glacier_area_by_year),
+        ("extract_glacier_area_by_year[geometry]", len(glacier_geoms), "polygons",
+         lambda: (glacier_geoms,), extract_glacier_area_by_year),
+        ("load_threatened_data", params["species"], "groups",
+         fresh_species, load_threatened_data),
+        ("batch_crop_forecast", params["crops"], "crops",
+         lambda: (df_agri,), batch_crop_forecast),
+        ("run_nlp_pipeline", len(texts), "docs",
+         fresh_nlp, nlp_tools.run_nlp_pipeline),
+        ("analyze_sentiment", len(texts), "docs",
+         fresh_nlp, nlp_tools.analyze_sentiment),
+        ("extract_keywords", len(texts), "docs",
+         fresh_nlp, nlp_tools.extract_keywords),
+    ]
+
+def run_benchmarks(params, repeats=3, select=None, log=print):
+    """
+    Runs every benchmark (or those whose name contains `select`).
+    Returns a list of result dicts.
+    """
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for name, items, unit, setup, func in build_benchmarks(params, workdir):
+            if select and select not in name:
+                continue
+            times, peak_mb = measure(func, setup, repeats=repeats)
+            median = statistics.median(times)
+            results.append({
+                "name": name,
+                "items": int(items),
+                "unit": unit,
+                "repeats": repeats,
+                "median_s": round(median, 6),
+                "min_s": round(min(times), 6),
+                "throughput_per_s": round(items / median, 1) if median > 0 else None,
+                "peak_mb": round(peak_mb, 2),
+            })
+            log(f"{name:<42} {median:9.4f} s  {items / median:14,.0f} {unit}/s  {peak_mb:9.1f} MB")
+    return results
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_results(base, new):
+    """
+    Side-by-side table of two result files (speedup > 1 means faster).
+    """
+    base_by_name = {r["name"]: r for r in base["results"]}
+    rows = []
+    for r in new["results"]:
+        b = base_by_name.get(r["name"])
+        if b is None:
+            continue
+        rows.append({
+            "Benchmark": r["name"],
+            "Base_s": b["median_s"],
+            "New_s": r["median_s"],
+            "Speedup": round(b["median_s"] / r["median_s"], 2) if r["median_s"] else None,
+            "Base_MB": b["peak_mb"],
+            "New_MB": r["peak_mb"],
+        })
+    return pd.DataFrame(rows)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard hot paths on synthetic data.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    for key in SCALES["small"]:
+        parser.add_argument(f"--{key}", type=int, default=None, help=f"override the scale's {key}")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("-k", dest="select", default=None, help="only run benchmarks whose name contains this")
+    parser.add_argument("-o", "--output", default=None, help="write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", nargs="+", metavar="JSON",
+                        help="BASE [NEW]: compare against BASE; with NEW, compare two reports without running")
+    args = parser.parse_args(argv)
+
+    from streamlit.logger import set_log_level
+    set_log_level("error")
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[0]) as f_base, open(args.compare[1]) as f_new:
+            print(compare_results(json.load(f_base), json.load(f_new)).to_string(index=False))
+        return 0
+
+    params = dict(SCALES[args.scale])
+    params.update({k: getattr(args, k) for k in params if getattr(args, k) is not None})
+
+    log = lambda line: print(line, file=sys.stderr)
+    log(f"Scale '{args.scale}': {params}")
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "scale": args.scale,
+            "params": params,
+        },
+        "results": run_benchmarks(params, repeats=args.repeats, select=args.select, log=log),
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            log(compare_results(json.load(f), report).to_string(index=False))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,381 @@
+# scripts/pipeline.py
+"""
+Headless batch pipeline that precomputes every dashboard artifact.
+
+Stages form a DAG: a stage depends on whichever stages produce its input
+files. A stage is skipped when the content fingerprint of its inputs, its
+code and its parameters matches the last successful run; independent
+stages run in parallel worker processes.
+
+Run from the repository root:
+
+    python scripts/pipeline.py              # build whatever is out of date
+    python scripts/pipeline.py --list       # show stages and their status
+    python scripts/pipeline.py --force glacier_area --jobs 2
+    python scripts/pipeline.py --download   # fetch missing raw data first
+"""
+import os
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_DIR = os.path.join(REPO_ROOT, "streamlit_app")
+if APP_DIR not in sys.path:
+    sys.path.insert(0, APP_DIR)
+
+MANIFEST_PATH = "processed/pipeline_manifest.json"
+
+RAW_CLIMATE = "Data/Raw/Weather&Climate_data/dailyclimate_OpenDataNpl.csv"
+RAW_CLIMATE_DRIVE_ID = "1WlyTmR7PNXsOsxcdBDfvYrugn3tfyT5f"
+AGRI_PATH = "processed/cleaned_agricultural_data.csv"
+LANDCOVER_2005 = "Data/Raw/Environment_data/Landcover_2005_Icimod.tif"
+LANDCOVER_2015 = "Data/Raw/Environment_data/Landcover_2015_icimod.tif"
+GLACIER_SHP = "Data/Raw/Environment_data/Glacier_data/Glacier_1980_1990_2000_2010.shp"
+GLACIER_DBF = "Data/Raw/Environment_data/Glacier_data/Glacier_1980_1990_2000_2010.dbf"
+
+FORECAST_VARIABLES = ["Temp_2m", "Precip", "WindSpeed_10m"]
+
+def _quiet_streamlit():
+    """
+    The utils modules use st.cache_*; outside `streamlit run` that only logs
+    bare-mode warnings, which are noise here.
+    """
+    from streamlit.logger import set_log_level
+
+    set_log_level("error")
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Stage functions (top-level so worker processes can run them)
+# ─────────────────────────────────────────────────────────────
+
+def build_cleaned_climate(inputs, outputs):
+    import pandas as pd
+    from utils.preprocess import clean_data
+
+    clean_data(pd.read_csv(inputs[0])).to_csv(outputs[0], index=False)
+
+def build_climate_yearly(inputs, outputs, variables):
+    import pandas as pd
+
+    df = pd.read_csv(inputs[0], parse_dates=["Date"])
+    cols = [v for v in variables if v in df.columns]
+    yearly = df.groupby(df["Date"].dt.year)[cols].mean().rename_axis("Year").reset_index()
+    yearly.to_csv(outputs[0], index=False)
+
+def build_climate_forecasts(inputs, outputs, variables, forecast_until):
+    import pandas as pd
+    from utils.climate_model import train_forecast_model
+
+    yearly = pd.read_csv(inputs[0])
+    parts = []
+    for variable in variables:
+        if variable not in yearly.columns:
+            continue
+        _, all_years = train_forecast_model(yearly[["Year", variable]], forecast_until=forecast_until)
+        parts.append(all_years.assign(Variable=variable))
+    pd.concat(parts, ignore_index=True)[["Variable", "Year", "Predicted"]].to_csv(outputs[0], index=False)
+
+def build_climate_trends(inputs, outputs):
+    import pandas as pd
+    from utils.trends import analyze_trends
+
+    analyze_trends(pd.read_csv(inputs[0], parse_dates=["Date"])).to_csv(outputs[0], index=False)
+
+def build_crop_forecasts(inputs, outputs, forecast_until):
+    from utils.agriculture import load_agriculture_data, batch_crop_forecast
+
+    forecasts, metrics = batch_crop_forecast(load_agriculture_data(inputs[0]), forecast_until=forecast_until)
+    forecasts.to_csv(outputs[0], index=False)
+    metrics.to_csv(outputs[1], index=False)
+
+def build_climate_agri_correlation(inputs, outputs):
+    import pandas as pd
+    from utils.agriculture import load_agriculture_data
+    from utils.climate_agri_corr import compute_correlation_matrix
+
+    df_climate = pd.read_csv(inputs[0], parse_dates=["Date"])
+    compute_correlation_matrix(df_climate, load_agriculture_data(inputs[1])).to_csv(outputs[0], index=False)
+
+def build_landcover_transitions(inputs, outputs, scale_factor):
+    from utils.landcover import compute_landcover_transitions_chunked
+
+    # Same blocked read as the dashboard's live job, so both produce the same table
+    compute_landcover_transitions_chunked(inputs[0], inputs[1], scale_factor=scale_factor).to_csv(
+        outputs[0], index=False)
+
+def build_glacier_area(inputs, outputs):
+    from utils.glacier import load_glacier_areas, extract_glacier_area_by_year
+
+    extract_glacier_area_by_year(load_glacier_areas(inputs[0])).to_csv(outputs[0], index=False)
+
+def build_glacier_change(inputs, outputs):
+    from utils.glacier_change import update_glacier_change_store
+
+    # The store fingerprints each epoch: only epochs whose outlines changed are recomputed
+    update_glacier_change_store(inputs[0], outputs[0])
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Stage table
+# ─────────────────────────────────────────────────────────────
+
+def _stages():
+    """
+    Stage name → spec. 'code' lists the source files whose content is part
+    of the fingerprint, so editing an analysis rebuilds what it produces.
+    """
+    from utils.artifacts import ARTIFACTS
+    from utils.agriculture import CROP_FORECAST_PATH, CROP_METRICS_PATH
+    from utils.glacier_change import GLACIER_CHANGE_STORE
+
+    return {
+        "cleaned_climate": dict(
+            func=build_cleaned_climate, inputs=[RAW_CLIMATE], outputs=[ARTIFACTS["cleaned_climate"]],
+            code=["utils/preprocess.py"]),
+        "climate_yearly": dict(
+            func=build_climate_yearly, inputs=[ARTIFACTS["cleaned_climate"]], outputs=[ARTIFACTS["climate_yearly"]],
+            params={"variables": FORECAST_VARIABLES}),
+        "climate_forecasts": dict(
+            func=build_climate_forecasts, inputs=[ARTIFACTS["climate_yearly"]],
+            outputs=[ARTIFACTS["climate_forecasts"]], code=["utils/climate_model.py"],
+            params={"variables": FORECAST_VARIABLES, "forecast_until": 2050}),
+        "climate_trends": dict(
+            func=build_climate_trends, inputs=[ARTIFACTS["cleaned_climate"]], outputs=[ARTIFACTS["climate_trends"]],
+            code=["utils/trends.py", "utils/district_index.py"]),
+        "crop_forecasts": dict(
+            func=build_crop_forecasts, inputs=[AGRI_PATH], outputs=[CROP_FORECAST_PATH, CROP_METRICS_PATH],
+            code=["utils/agriculture.py"], params={"forecast_until": 2040}),
+        "climate_agri_correlation": dict(
+            func=build_climate_agri_correlation, inputs=[ARTIFACTS["cleaned_climate"], AGRI_PATH],
+            outputs=[ARTIFACTS["climate_agri_correlation"]],
+            code=["utils/agriculture.py", "utils/climate_agri_corr.py"]),
+        "landcover_transitions": dict(
+            func=build_landcover_transitions, inputs=[LANDCOVER_2005, LANDCOVER_2015],
+            outputs=[ARTIFACTS["landcover_transitions"]], code=["utils/landcover.py", "utils/zonal_stats.py"],
+            params={"scale_factor": 10}),
+        "glacier_area": dict(
+            func=build_glacier_area, inputs=[GLACIER_SHP, GLACIER_DBF], outputs=[ARTIFACTS["glacier_area"]],
+            code=["utils/glacier.py"]),
+        "glacier_change": dict(
+            func=build_glacier_change, inputs=[GLACIER_SHP, GLACIER_DBF], outputs=[GLACIER_CHANGE_STORE],
+            code=["utils/glacier.py", "utils/glacier_change.py"]),
+    }
+
+def stage_dependencies(stages):
+    """
+    Stage → set of upstream stages, derived from which stage writes each input.
+    """
+    producers = {out: name for name, spec in stages.items() for out in spec["outputs"]}
+    return {name: {producers[path] for path in spec["inputs"] if path in producers}
+            for name, spec in stages.items()}
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Content fingerprints
+# ─────────────────────────────────────────────────────────────
+
+def load_manifest(path=MANIFEST_PATH):
+    if not os.path.exists(path):
+        return {"files": {}, "stages": {}}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(manifest, path=MANIFEST_PATH):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def file_digest(path, manifest):
+    """
+    sha1 of a file's content. Digests are remembered by (mtime, size), so
+    large rasters are only re-hashed after they actually change on disk.
+    """
+    stat = os.stat(path)
+    cached = manifest["files"].get(path)
+    if cached and cached["mtime_ns"] == stat.st_mtime_ns and cached["size"] == stat.st_size:
+        return cached["sha1"]
+
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    manifest["files"][path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha1": digest.hexdigest()}
+    return digest.hexdigest()
+
+def stage_fingerprint(name, spec, manifest):
+    """
+    Fingerprint of everything a stage's output depends on: input and code
+    file contents, parameters and the stage function itself.
+    Raises FileNotFoundError naming the first missing input.
+    """
+    import inspect
+
+    digest = hashlib.sha1(name.encode())
+    digest.update(inspect.getsource(spec["func"]).encode())
+    digest.update(json.dumps(spec.get("params", {}), sort_keys=True).encode())
+    for path in spec["inputs"]:
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"missing input {path}")
+        digest.update(file_digest(path, manifest).encode())
+    for path in spec.get("code", []):
+        digest.update(file_digest(os.path.join("streamlit_app", path), manifest).encode())
+    return digest.hexdigest()
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 4. Scheduler
+# ─────────────────────────────────────────────────────────────
+
+def _run_stage(name, func, inputs, outputs, params):
+    """
+    Worker entry point: runs one stage and returns (name, seconds).
+    """
+    _quiet_streamlit()
+    for path in outputs:
+        dir_name = os.path.dirname(path)
+        if dir_name:
+            os.makedirs(dir_name, exist_ok=True)
+    start = time.perf_counter()
+    func(inputs, outputs, **params)
+    return name, time.perf_counter() - start
+
+def run_pipeline(selected=None, force=(), jobs=None, log=print):
+    """
+    Runs the selected stages (default: all) plus everything upstream of
+    them, in dependency order. Returns {stage: status}, with status one of
+    'built', 'up-to-date', 'failed: ...' or 'skipped: ...'.
+    """
+    stages = _stages()
+    deps = stage_dependencies(stages)
+
+    wanted = set(selected or stages)
+    unknown = wanted - set(stages)
+    if unknown:
+        raise ValueError(f"Unknown stage(s): {', '.join(sorted(unknown))}")
+    todo = list(wanted)
+    while todo:
+        for dep in deps[todo.pop()]:
+            if dep not in wanted:
+                wanted.add(dep)
+                todo.append(dep)
+
+    manifest = load_manifest()
+    status = {}
+    pending = {name for name in stages if name in wanted}
+    running = {}
+    jobs = jobs or min(len(pending), os.cpu_count() or 1)
+    pool = ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+
+    def schedule():
+        for name in sorted(pending):
+            if any(dep in pending or dep in running.values() for dep in deps[name]):
+                continue
+            pending.discard(name)
+            failed = [dep for dep in deps[name] if not status.get(dep, "").startswith(("built", "up-to-date"))]
+            if failed:
+                status[name] = f"skipped: upstream {', '.join(failed)} did not build"
+                log(f"⏭️  {name}: {status[name]}")
+                continue
+            spec = stages[name]
+            try:
+                fingerprint = stage_fingerprint(name, spec, manifest)
+            except FileNotFoundError as e:
+                status[name] = f"failed: {e}"
+                log(f"❌ {name}: {e}")
+                continue
+            previous = manifest["stages"].get(name, {})
+            if (name not in force and previous.get("fingerprint") == fingerprint
+                    and all(os.path.exists(p) for p in spec["outputs"])):
+                status[name] = "up-to-date"
+                log(f"✅ {name}: up to date")
+                continue
+
+            manifest["stages"][name] = {"fingerprint": None, "pending_fingerprint": fingerprint}
+            args = (name, spec["func"], spec["inputs"], spec["outputs"], spec.get("params", {}))
+            log(f"⚙️  {name}: building")
+            if pool is None:
+                finish(name, lambda: _run_stage(*args))
+            else:
+                running[pool.submit(_run_stage, *args)] = name
+
+    def finish(name, result):
+        try:
+            _, seconds = result()
+        except Exception as e:
+            status[name] = f"failed: {e}"
+            manifest["stages"].pop(name, None)
+            log(f"❌ {name}: {e}")
+            return
+        entry = manifest["stages"][name]
+        entry.update(fingerprint=entry.pop("pending_fingerprint"), seconds=round(seconds, 2),
+                     built_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+        for path in stages[name]["outputs"]:
+            file_digest(path, manifest)  # so downstream fingerprints hash outputs once
+        status[name] = "built"
+        log(f"🏁 {name}: built in {seconds:.1f}s")
+
+    try:
+        while pending or running:
+            schedule()
+            if running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(running.pop(future), future.result)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        save_manifest(manifest)
+    return status
+
+def describe_stages():
+    """
+    One line per stage with its dependencies and last build.
+    """
+    stages = _stages()
+    deps = stage_dependencies(stages)
+    manifest = load_manifest()
+    lines = []
+    for name, spec in stages.items():
+        built = manifest["stages"].get(name, {}).get("built_at", "never built")
+        after = ", ".join(sorted(deps[name])) or "-"
+        lines.append(f"{name:<26} after: {after:<18} last built: {built:<20} → {', '.join(spec['outputs'])}")
+    return "\n".join(lines)
+
+def download_raw_data():
+    """
+    Fetches missing raw inputs (same sources the dashboard used to download).
+    """
+    from utils.download_data import download_all_data
+    from utils.preprocess import load_data
+
+    download_all_data()
+    load_data(RAW_CLIMATE, RAW_CLIMATE_DRIVE_ID)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute the dashboard artifacts.")
+    parser.add_argument("stages", nargs="*", help="stages to build (default: all); upstream stages are included")
+    parser.add_argument("--force", nargs="*", default=None, metavar="STAGE",
+                        help="rebuild these stages even if up to date (no names: all selected)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="parallel worker processes")
+    parser.add_argument("--list", action="store_true", help="list stages and exit")
+    parser.add_argument("--download", action="store_true", help="download missing raw data first")
+    args = parser.parse_args(argv)
+
+    os.chdir(REPO_ROOT)
+    _quiet_streamlit()
+
+    if args.list:
+        print(describe_stages())
+        return 0
+    if args.download:
+        download_raw_data()
+
+    force = set(args.force or args.stages or _stages()) if args.force is not None else set()
+    status = run_pipeline(args.stages or None, force=force, jobs=args.jobs)
+    return 1 if any(s.startswith("failed") for s in status.values()) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
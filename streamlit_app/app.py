@@ -1,35 +1,35 @@
 import os
 import streamlit as st
-from utils.preprocess import load_data, clean_data
-from utils.download_data import download_all_data
-from utils.agriculture import (
-    load_agriculture_data, plot_crop_trends, prepare_crop_data, train_crop_model, plot_crop_forecast
-)
-from utils.climate_agri_corr import merge_climate_agriculture, plot_climate_crop_correlation, calculate_correlation
-import nltk
+from utils.data_store import load_climate_dataset
+from utils.page_registry import register_page, list_pages, render_page, show_import_profile
+from utils.artifacts import load_artifact
+from utils.district_index import district_selector
+from utils.instrumentation import begin_run, end_run, stage, debug_requested, show_debug_panel
 
-# ─── Initial Setup ────────────────────────────────────────────────────
-# Download all necessary datasets
-download_all_data()
+# Page modules (sklearn, seaborn, scipy, nltk, geopandas, rasterio, ...) are
+# declared per page below and imported only when that page is selected, so
+# start-up and the Home page cost no more than pandas + streamlit.
 
-# Ensure NLTK punkt tokenizer is available
-nltk.download('punkt')
+# Per-run instrumentation: a sampled share of runs, or every run once
+# profiling is switched on in the sidebar debug panel
+force_profile, trace_memory = debug_requested()
+begin_run(force=force_profile, trace_memory=trace_memory)
 
-# Load climate data
+# ─── Initial Setup ────────────────────────────────────────────────────
+# Artifacts under processed/ are built by `python scripts/pipeline.py`;
+# the dashboard only reads them and computes live when they are missing.
 csv_path = "Data/Raw/Weather&Climate_data/dailyclimate_OpenDataNpl.csv"
 gdrive_file_id = "1WlyTmR7PNXsOsxcdBDfvYrugn3tfyT5f"
-df_raw = load_data(csv_path, gdrive_file_id)
-df_clean = clean_data(df_raw)
-
-# Create directory for processed data and save cleaned data
-os.makedirs("processed", exist_ok=True)
-df_clean.to_csv("processed/cleaned_dailyclimate.csv", index=False)
+with stage("startup:climate_data"):
+    # One memory-mapped copy per process, shared by all sessions; each run
+    # gets a zero-copy, copy-on-write view
+    df_clean = load_climate_dataset(csv_path, gdrive_file_id)
 
-# ─── Dashboard Selection ──────────────────────────────────────────────
-dashboard = st.sidebar.radio("Choose Dashboard", ["Home", "Climate", "Environment", "Socio-Economic"])
+AGRI_PATH = "processed/cleaned_agricultural_data.csv"
 
 # ─── Home ─────────────────────────────────────────────────────────────
-if dashboard == "Home":
+@register_page("Home", "Home")
+def home_page(df_clean):
     st.title("Climate Change Impact Assessment System for Nepal")
     st.success("✅ Data loaded successfully!")
     st.dataframe(df_clean.head())
@@ -44,195 +44,415 @@ if dashboard == "Home":
     """)
 
 # ─── Climate ──────────────────────────────────────────────────────────
-elif dashboard == "Climate":
-    from utils.eda_plot import (
-        plot_temperature_trend, plot_precipitation_distribution, plot_extreme_event_trends
+# District pages slice df_clean through its (district, date) offset table
+@register_page("Climate", "Temperature Trend", modules=["utils.eda_plot", "utils.trends"])
+def temperature_trend_page(df_clean):
+    from utils.eda_plot import plot_temperature_trend
+    from utils.trends import load_climate_trends
+
+    st.subheader("🌡️ Temperature Trend")
+    df_region, region = district_selector(df_clean, key="district_temperature")
+    trends = load_climate_trends(df_clean, sources=[csv_path])
+    plot_temperature_trend(df_region, region=region, trends=trends)
+
+@register_page("Climate", "Precipitation Distribution", modules=["utils.eda_plot", "utils.trends"])
+def precipitation_distribution_page(df_clean):
+    from utils.eda_plot import plot_precipitation_distribution
+    from utils.trends import load_climate_trends
+
+    st.subheader("🌧️ Precipitation Distribution")
+    df_region, region = district_selector(df_clean, key="district_precipitation")
+    trends = load_climate_trends(df_clean, sources=[csv_path])
+    plot_precipitation_distribution(df_region, region=region, trends=trends)
+
+@register_page("Climate", "Extreme Weather Trend", modules=["utils.eda_plot", "utils.trends"])
+def extreme_weather_trend_page(df_clean):
+    from utils.eda_plot import plot_extreme_event_trends
+
+    st.subheader("⚡ Extreme Weather Trend")
+    df_region, region = district_selector(df_clean, key="district_extremes")
+    plot_extreme_event_trends(df_region, region=region)
+
+@register_page("Climate", "Climate Prediction", modules=["utils.climate_model"])
+def climate_prediction_page(df_clean):
+    from utils.climate_model import (
+        prepare_yearly_variable, train_forecast_model, plot_forecast,
+        forecast_ensemble, exceedance_probability, plot_forecast_ensemble, ENSEMBLE_SIZE
     )
-    from utils.climate_model import prepare_yearly_variable, train_forecast_model, plot_forecast
-
-    page = st.sidebar.selectbox("Climate Dashboard", [
-        "Temperature Trend", "Precipitation Distribution", "Extreme Weather Trend", "Climate Prediction"
-    ])
-
-    if page == "Temperature Trend":
-        st.subheader("🌡️ Temperature Trend")
-        plot_temperature_trend(df_clean)
-
-    elif page == "Precipitation Distribution":
-        st.subheader("🌧️ Precipitation Distribution")
-        plot_precipitation_distribution(df_clean)
-
-    elif page == "Extreme Weather Trend":
-        st.subheader("⚡ Extreme Weather Trend")
-        plot_extreme_event_trends(df_clean)
-
-    elif page == "Climate Prediction":
-        st.subheader("📈 Climate Forecasting Tool")
-        variable = st.selectbox("Select variable:", {
-            "Temp_2m": "Temperature (°C)",
-            "Precip": "Precipitation (mm)",
-            "WindSpeed_10m": "Wind Speed (m/s)"
-        })
-        forecast_year = st.slider("Forecast year:", 2030, 2050, 2035)
-        df_yearly = prepare_yearly_variable(df_clean, variable)
+
+    st.subheader("📈 Climate Forecasting Tool")
+    variable = st.selectbox("Select variable:", {
+        "Temp_2m": "Temperature (°C)",
+        "Precip": "Precipitation (mm)",
+        "WindSpeed_10m": "Wind Speed (m/s)"
+    })
+    df_region, region = district_selector(df_clean, key="district_prediction")
+    forecast_year = st.slider("Forecast year:", 2030, 2050, 2035)
+    mode = st.radio("Forecast:", ["Point estimate", "Ensemble with uncertainty"], horizontal=True)
+    df_yearly = prepare_yearly_variable(df_region, variable)
+    label = {"Temp_2m": "°C", "Precip": "mm", "WindSpeed_10m": "m/s"}[variable]
+
+    if mode == "Ensemble with uncertainty":
+        # One ensemble up to 2050 per variable, region and data version; the slider only slices it
+        cache_key = (df_clean.attrs.get("dataset_version"), region) if "dataset_version" in df_clean.attrs else None
+        ensemble = forecast_ensemble(df_yearly, variable, cache_key=cache_key, forecast_until=2050)
+        if ensemble is None:
+            st.warning(f"⚠️ Not enough observed years of {variable} in {region} for an ensemble forecast.")
+            return
+        if forecast_year not in ensemble["years"]:
+            st.warning(f"⚠️ {forecast_year} is outside the forecast years of {region} "
+                       f"({ensemble['years'][0]}–{ensemble['years'][-1]}).")
+            return
+        plot_forecast_ensemble(ensemble, df_yearly, variable_label=label, until=forecast_year)
+        row = ensemble["summary"][ensemble["summary"]["Year"] == forecast_year].iloc[0]
+        st.markdown(f"**{forecast_year}:** median {row['P50']:.2f} {label}, "
+                    f"90% interval {row['P5']:.2f} – {row['P95']:.2f} {label}")
+        threshold = st.number_input(f"Exceedance threshold ({label}):",
+                                    value=round(float(df_yearly[variable].max()), 2))
+        probability = exceedance_probability(ensemble, forecast_year, threshold)
+        st.markdown(f"**P({variable} > {threshold:g} {label} in {forecast_year}) = {probability:.1%}** "
+                    f"(from {ENSEMBLE_SIZE:,} block-bootstrap members)")
+        return
+
+    # Precomputed forecasts are national; districts are fitted live
+    precomputed = load_artifact("climate_forecasts", sources=[csv_path]) if region == "Nepal" else None
+    if precomputed is not None and variable in set(precomputed["Variable"]):
+        df_forecast = precomputed[(precomputed["Variable"] == variable) & (precomputed["Year"] <= forecast_year)]
+        df_forecast = df_forecast[["Year", "Predicted"]].reset_index(drop=True)
+    else:
         model, df_forecast = train_forecast_model(df_yearly, forecast_until=forecast_year)
-        label = {"Temp_2m": "°C", "Precip": "mm", "WindSpeed_10m": "m/s"}[variable]
-        plot_forecast(df_forecast, df_yearly, variable_label=label)
-        st.markdown(f"**Predicted in {forecast_year}:** {df_forecast.loc[df_forecast['Year']==forecast_year, 'Predicted'].iloc[0]:.2f} {label}")
+    plot_forecast(df_forecast, df_yearly, variable_label=label)
+    st.markdown(f"**Predicted in {forecast_year}:** {df_forecast.loc[df_forecast['Year']==forecast_year, 'Predicted'].iloc[0]:.2f} {label}")
+
+@register_page("Climate", "Anomaly Map", modules=["utils.climate_grid"])
+def anomaly_map_page(df_clean):
+    from utils.climate_grid import ANOMALY_VARIABLES, BASELINE, anomaly_grids, plot_anomaly_map
+
+    st.subheader("🗺️ Climate Anomaly Map")
+    variable = st.selectbox("Select variable:", list(ANOMALY_VARIABLES),
+                            format_func=lambda c: ANOMALY_VARIABLES[c][1])
+    result = anomaly_grids(df_clean, variable)
+    if result is None or not result["grids"]:
+        return
+    years = sorted(result["grids"])
+    year = st.select_slider("Year:", options=years, value=years[-1])
+    overlay = False
+    if result["aligned"]:
+        overlay = st.checkbox("Overlay landcover change (2005 → 2015)")
+    else:
+        st.info("ℹ️ Landcover rasters not found: showing a lon/lat grid over Nepal instead.")
+    plot_anomaly_map(result, year, variable, overlay_landcover=overlay)
+    with st.expander(f"📋 Station anomalies vs {BASELINE[0]}–{BASELINE[1]}"):
+        row = int(year - result["years"][0])
+        st.dataframe(result["stations"][["District", "Longitude", "Latitude"]]
+                     .assign(Anomaly=result["anomalies"][row]))
 
 # ─── Environment ──────────────────────────────────────────────────────
-elif dashboard == "Environment":
-    try:
-        from utils.biodiversity import load_threatened_data, plot_threatened_trend
-        from utils.landcover import (
-            load_raster_resampled,
-            compute_landcover_transition_matrix,
-            plot_landcover_transition_matrix
-        )
-        from utils.glacier import load_glacier_shapefile, extract_glacier_area_by_year, plot_glacier_retreat
-        from utils.glacier_weather_corr import summarize_extremes, merge_glacier_weather, plot_weather_vs_glacier
-        from utils.nlp_tools import load_sample_texts, analyze_sentiment, extract_keywords, plot_wordcloud
-        from utils.download_data import download_from_drive
-
-        page = st.sidebar.selectbox("Environment Dashboard", [
-            "Biodiversity Trends", "Landcover Change", "Climate News Trends", "Glacier Retreat", "Extreme Weather vs Glacier Loss"
-        ])
-    except Exception as e:
-        st.error(f"❌ Failed to load environment dashboard: {e}")
-        page = None  # fallback
-
-    if page == "Biodiversity Trends":
-        st.subheader("🦋 Threatened Species Trends")
-        drive_id = "1nulzINJWa03itJJuYgZ-zb_ip9lKhTay"
-        local_path = "Data/processed/threatened_species_cleaned.csv"
-        download_from_drive(drive_id, local_path)
-        df_bio = load_threatened_data(local_path)
-        if not df_bio.empty:
-            st.dataframe(df_bio.head())
-            species = st.multiselect("Select species:", df_bio['Species'].unique(), default=df_bio['Species'].unique()[:3])
-            if species:
-                plot_threatened_trend(df_bio, species)
-
-    elif page == "Landcover Change":
-        st.subheader("🗺️ Landcover Change (2005 → 2015)")
-        lc1, _ = load_raster_resampled("Data/Raw/Environment_data/Landcover_2005_Icimod.tif", scale_factor=10)
-        if lc1 is not None:
-            lc2, _ = load_raster_resampled(
-                "Data/Raw/Environment_data/Landcover_2015_icimod.tif",
-                target_shape=lc1.shape
-            )
-        else:
-            lc2 = None
-        if lc1 is not None and lc2 is not None:
-            df_trans = compute_landcover_transition_matrix(lc1, lc2)
-            plot_landcover_transition_matrix(df_trans)
-        else:
-            st.error("❌ Could not load one or both raster files.")
+@register_page("Environment", "Biodiversity Trends", modules=["utils.biodiversity"])
+def biodiversity_page(df_clean):
+    from utils.biodiversity import load_threatened_store, load_threatened_matrix, plot_threatened_trend
+
+    st.subheader("🦋 Threatened Species Trends")
+    drive_id = "1nulzINJWa03itJJuYgZ-zb_ip9lKhTay"
+    local_path = "Data/processed/threatened_species_cleaned.csv"
+    df_bio, df_trends = load_threatened_store(local_path, drive_id)
+    if not df_bio.empty:
+        st.dataframe(df_bio.head())
+        with st.expander("📈 Trend statistics by group"):
+            st.dataframe(df_trends)
+        species_matrix = load_threatened_matrix(local_path)
+        all_species = species_matrix.columns.tolist()
+        species = st.multiselect("Select species:", all_species, default=all_species[:3])
+        if species:
+            plot_threatened_trend(species_matrix, species)
+
+@register_page("Environment", "Landcover Change", modules=["utils.landcover"])
+def landcover_page(df_clean):
+    from utils.landcover import compute_landcover_transitions_chunked, plot_landcover_transition_matrix
+    from utils.preprocess import file_signature
+    from utils.jobs import submit_job, job_result
+
+    st.subheader("🗺️ Landcover Change (2005 → 2015)")
+    rasters = ["Data/Raw/Environment_data/Landcover_2005_Icimod.tif",
+               "Data/Raw/Environment_data/Landcover_2015_icimod.tif"]
+    df_trans = load_artifact("landcover_transitions", sources=rasters)
+    if df_trans is not None:
+        plot_landcover_transition_matrix(df_trans)
+        return
+
+    if not all(os.path.exists(path) for path in rasters):
+        st.error("❌ Could not load one or both raster files.")
+        return
+    # Computed in the background; reruns (and other sessions) join the same job
+    job = submit_job(compute_landcover_transitions_chunked,
+                     tuple(file_signature(path) for path in rasters), *rasters,
+                     scale_factor=10, label="Counting landcover transitions")
+    df_trans = job_result(job, render_partial=plot_landcover_transition_matrix)
+    if df_trans is not None:
+        plot_landcover_transition_matrix(df_trans)
+
+@register_page("Environment", "Climate News Trends", modules=["utils.nlp_tools"])
+def climate_news_page(df_clean):
+    from utils.nlp_tools import (
+        load_sample_texts, run_nlp_pipeline, analyze_sentiment, extract_keywords, plot_wordcloud
+    )
 
-    elif page == "Climate News Trends":
-        st.subheader("🗞️ NLP on Climate Reports")
-        # Ensure that 'punkt' tokenizer is available
-        import nltk
-        nltk.download('punkt')
+    st.subheader("🗞️ NLP on Climate Reports")
+    # Tokenizers come from streamlit_app/nltk_data (see utils.nltk_resources); no downloads
+    source = st.radio("Source:", ["Sample report", "Local report corpus"], horizontal=True)
 
+    if source == "Local report corpus":
+        from utils.corpus import (
+            CORPUS_DIR, load_corpus_index, corpus_top_terms, corpus_sentiment, matching_sentences
+        )
+        if not os.path.isdir(CORPUS_DIR):
+            st.warning(f"⚠️ Put .txt/.md reports in `{CORPUS_DIR}` to analyse them here.")
+        else:
+            if st.button("🔄 Rescan corpus folder"):
+                load_corpus_index.clear()
+            index, stats = load_corpus_index()
+            st.caption(f"{len(index['docs'])} documents indexed "
+                       f"({stats.get('added', 0)} new, {stats.get('updated', 0)} changed, "
+                       f"{stats.get('removed', 0)} removed on last scan).")
+
+            query = st.text_input("Search term(s):", "glacier")
+            st.dataframe(corpus_sentiment(index, query or None))
+            if query:
+                st.dataframe(matching_sentences(index, query))
+            st.markdown("#### Most frequent terms")
+            st.dataframe(corpus_top_terms(index, n=20))
+
+            from utils.keywords import load_term_matrix, top_keywords, keyword_trends, term_trend, document_period
+            docs = list(index["docs"].values())
+            if docs:
+                # Matrix depends only on the corpus; the widgets below just query it
+                matrix = load_term_matrix([" ".join(doc["sentences"]) for doc in docs])
+                st.markdown("#### TF-IDF keywords")
+                max_ngram = st.radio("Terms:", [1, 2], format_func=lambda k: "Words" if k == 1 else "Words + phrases",
+                                     horizontal=True)
+                st.dataframe(top_keywords(matrix, n=15, max_ngram=max_ngram))
+
+                periods = [document_period(doc["path"]) for doc in docs]
+                if all(p is not None for p in periods) and len(set(periods)) > 1:
+                    st.markdown("#### Keywords by year (c-TF-IDF)")
+                    trends = keyword_trends(matrix, periods, n=5)
+                    st.dataframe(trends.pivot(index="Rank", columns="Period", values="Keyword"))
+                    if query:
+                        st.line_chart(term_trend(matrix, periods, query.lower().split()).set_index("Period"))
+        texts = []
+    else:
         texts = load_sample_texts()
-
         if not texts:
             st.warning("⚠️ No text data available for analysis.")
-        else:
-            sentiment_df = analyze_sentiment(texts)
-            st.dataframe(sentiment_df)
 
-            plot_wordcloud(texts)
+    if texts:
+        # Tokenize once; every stage below reuses the same results
+        pipeline = run_nlp_pipeline(texts)
 
-            keywords_df = extract_keywords(texts, num_keywords=10)
-            st.dataframe(keywords_df)
+        sentiment_df = analyze_sentiment(texts, pipeline)
+        st.dataframe(sentiment_df)
 
-    elif page == "Glacier Retreat":
-        st.subheader("🧊 Glacier Retreat")
-        try:
-            shp_dir = "Data/Raw/Environment_data/Glacier_data"
-            shp_files = [f for f in os.listdir(shp_dir) if f.endswith(".shp")]
-            if not shp_files:
-                st.error("❌ No shapefile (.shp) found in Glacier_data folder.")
-            else:
-                shp_path = os.path.join(shp_dir, shp_files[0])
-                gdf = load_glacier_shapefile(shp_path)
-                if not gdf.empty:
-                    area_df = extract_glacier_area_by_year(gdf)
-                    st.dataframe(area_df)
-                    plot_glacier_retreat(area_df)
-        except Exception as e:
-            st.error(f"❌ Could not load glacier shapefile: {e}")
-
-    elif page == "Extreme Weather vs Glacier Loss":
-        st.subheader("🌡️ Extreme Weather vs Glacier Loss")
-        try:
-            shp_path = "Data/Raw/Environment_data/Glacier_data/Glacier_1980_1990_2000_2010.shp"
-            gdf = load_glacier_shapefile(shp_path)
-            if not gdf.empty:
-                glacier_df = extract_glacier_area_by_year(gdf)
+        plot_wordcloud(texts, pipeline)
+
+        keywords_df = extract_keywords(texts, num_keywords=10, pipeline=pipeline)
+        st.dataframe(keywords_df)
+
+@register_page("Environment", "Glacier Retreat", modules=["utils.glacier"])
+def glacier_retreat_page(df_clean):
+    from utils.glacier import (
+        load_glacier_areas, preview_glacier_attributes, load_simplified_glacier_geometries,
+        extract_glacier_area_by_year, plot_glacier_retreat, plot_glacier_map,
+        GLACIER_YEARS, SIMPLIFY_TOLERANCES_M
+    )
+
+    st.subheader("🧊 Glacier Retreat")
+    try:
+        shp_dir = "Data/Raw/Environment_data/Glacier_data"
+        shp_files = [f for f in os.listdir(shp_dir) if f.endswith(".shp")]
+        if not shp_files:
+            st.error("❌ No shapefile (.shp) found in Glacier_data folder.")
+        else:
+            shp_path = os.path.join(shp_dir, shp_files[0])
+            with st.expander("🗂️ Sample attribute data"):
+                st.dataframe(preview_glacier_attributes(shp_path))
+
+            # Aggregates only need the per-polygon areas, computed once per shapefile version
+            area_df = load_artifact("glacier_area", sources=[shp_path, os.path.splitext(shp_path)[0] + ".dbf"])
+            if area_df is None:
+                areas = load_glacier_areas(shp_path)
+                area_df = extract_glacier_area_by_year(areas) if not areas.empty else None
+            if area_df is not None:
+                st.dataframe(area_df)
+                plot_glacier_retreat(area_df)
+
+            if st.checkbox("Show glacier outline map"):
+                map_year = st.selectbox("Inventory year:", GLACIER_YEARS, index=len(GLACIER_YEARS) - 1)
+                tolerance = st.select_slider("Simplification (m):", SIMPLIFY_TOLERANCES_M,
+                                             value=SIMPLIFY_TOLERANCES_M[-1])
+                levels = load_simplified_glacier_geometries(shp_path)
+                plot_glacier_map(levels.get(tolerance), year=map_year)
+
+            if st.checkbox("Show per-glacier retreat rates"):
+                # Only pulled in (with shapely overlays) when the rates are requested
+                from utils.glacier_change import (
+                    update_glacier_change_store, summarize_glacier_change, plot_glacier_change_distribution
+                )
+                from utils.glacier import shapefile_signature
+                from utils.jobs import submit_job, job_result
+
+                # Epoch matching runs in the background; finished epochs show up as they complete
+                job = submit_job(update_glacier_change_store, shapefile_signature(shp_path), shp_path,
+                                 label="Matching glacier outlines")
+                change_df = job_result(job, render_partial=lambda partial: st.dataframe(
+                    summarize_glacier_change(partial)))
+                if change_df is not None:
+                    st.dataframe(summarize_glacier_change(change_df))
+                    plot_glacier_change_distribution(change_df)
+    except Exception as e:
+        st.error(f"❌ Could not load glacier shapefile: {e}")
+
+@register_page("Environment", "Landcover on Glacier Area", modules=["utils.zonal_stats"])
+def glacier_landcover_page(df_clean):
+    from utils.zonal_stats import (
+        GLACIER_ZONE_COLUMNS, RESOLUTION_FACTORS, zonal_landcover_change, zone_class_table, plot_zone_replacement
+    )
+    from utils.glacier import GLACIER_YEARS
+
+    st.subheader("🏔️ Landcover Change on Glacier Area (2005 → 2015)")
+    col1, col2, col3 = st.columns(3)
+    year = col1.selectbox("Glacier inventory year:", GLACIER_YEARS, index=GLACIER_YEARS.index(2000))
+    zone_column = col2.selectbox("Zones:", GLACIER_ZONE_COLUMNS)
+    factor = col3.select_slider("Pixel step:", RESOLUTION_FACTORS, value=RESOLUTION_FACTORS[0],
+                                help="1 = full landcover resolution")
+    transitions = zonal_landcover_change(year, zone_column, factor=factor)
+    if not transitions.empty:
+        plot_zone_replacement(transitions, year)
+        with st.expander("📋 2005 landcover on the glacier area (km²)"):
+            st.dataframe(zone_class_table(transitions, side="From").round(2))
+
+@register_page("Environment", "Extreme Weather vs Glacier Loss",
+               modules=["utils.glacier", "utils.glacier_weather_corr"])
+def weather_vs_glacier_page(df_clean):
+    from utils.glacier import load_glacier_areas, extract_glacier_area_by_year
+    from utils.glacier_weather_corr import (
+        summarize_extremes, merge_glacier_weather, plot_weather_vs_glacier,
+        correlate_window_features, plot_window_correlations
+    )
+
+    st.subheader("🌡️ Extreme Weather vs Glacier Loss")
+    try:
+        shp_path = "Data/Raw/Environment_data/Glacier_data/Glacier_1980_1990_2000_2010.shp"
+        areas = load_glacier_areas(shp_path)
+        if not areas.empty:
+            glacier_df = extract_glacier_area_by_year(areas)
+            mode = st.radio("Analysis mode:", ["Glacier years only", "Decadal window & lag"], horizontal=True)
+            if mode == "Glacier years only":
                 climate_summary = summarize_extremes(df_clean)
                 merged_df = merge_glacier_weather(glacier_df, climate_summary)
                 if not merged_df.empty:
                     st.dataframe(merged_df)
                     plot_weather_vs_glacier(merged_df)
-        except Exception as e:
-            st.error(f"❌ Could not process Extreme Weather vs Glacier Loss: {e}")
+            else:
+                window = st.slider("Window (years):", 1, 15, 10)
+                lag = st.slider("Lag (years):", 0, 10, 0)
+                merged_df, corr_df = correlate_window_features(glacier_df, df_clean, window=window, lag=lag)
+                if not corr_df.empty:
+                    st.dataframe(merged_df)
+                    st.dataframe(corr_df)
+                    plot_window_correlations(corr_df)
+    except Exception as e:
+        st.error(f"❌ Could not process Extreme Weather vs Glacier Loss: {e}")
 
 # ─── Socio-Economic ───────────────────────────────────────────────────
-elif dashboard == "Socio-Economic":
-    page = st.sidebar.selectbox("Socio-Economic Dashboard", [
-        "Agricultural Trends", "Crop Forecast", "Climate Agriculture Correlation"
-    ])
+@register_page("Socio-Economic", "Agricultural Trends", modules=["utils.agriculture"])
+def agricultural_trends_page(df_clean):
+    from utils.agriculture import load_agriculture_data, plot_crop_trends
 
-    if page == "Agricultural Trends":
-        st.subheader("🌾 Agricultural Production Trends")
-        
-        # Load agricultural data
-        df_agri = load_agriculture_data("processed/cleaned_agricultural_data.csv")
+    st.subheader("🌾 Agricultural Production Trends")
 
-        # Print column names and the first few rows to debug
-        st.write("Columns in DataFrame:", df_agri.columns)  # Show available column names
-        st.dataframe(df_agri.head())  # Display first few rows to check data structure
+    # Load agricultural data
+    df_agri = load_agriculture_data(AGRI_PATH)
 
-        # Check available crops and display them (excluding the 'Year' column)
-        available_crops = df_agri.columns[1:].tolist()  # Skip 'Year' column
-        st.write("Available crops:", available_crops)  # Print available crops to debug
+    # Print column names and the first few rows to debug
+    st.write("Columns in DataFrame:", df_agri.columns)  # Show available column names
+    st.dataframe(df_agri.head())  # Display first few rows to check data structure
 
-        # Ensure the default crops are in the available crops list
-        default_crops = ["Paddy", "Maize", "Wheat"]
-        valid_default_crops = [crop for crop in default_crops if crop in available_crops]
+    # Check available crops and display them (excluding the 'Year' column)
+    available_crops = df_agri.columns[1:].tolist()  # Skip 'Year' column
+    st.write("Available crops:", available_crops)  # Print available crops to debug
 
-        if not valid_default_crops:
-            valid_default_crops = available_crops[:3]
+    # Ensure the default crops are in the available crops list
+    default_crops = ["Paddy", "Maize", "Wheat"]
+    valid_default_crops = [crop for crop in default_crops if crop in available_crops]
 
-        crops = st.multiselect("Choose crops:", available_crops, default=valid_default_crops)
+    if not valid_default_crops:
+        valid_default_crops = available_crops[:3]
 
-        # Ensure the selected crops have valid data to plot
-        if crops:
-            selected_data = df_agri[crops]
+    crops = st.multiselect("Choose crops:", available_crops, default=valid_default_crops)
 
-            if selected_data.isnull().all().any():
-                st.warning("⚠️ No valid data available for the selected crops.")
-            else:
-                plot_crop_trends(df_agri, crops)
-
-    elif page == "Crop Forecast":
-        st.subheader("🌾 Crop Forecast")
-        df_agri = load_agriculture_data("processed/cleaned_agricultural_data.csv")
-        crop = st.selectbox("Select a crop to forecast:", df_agri.columns[1:])
-        year = st.slider("Forecast year:", 2025, 2040, 2035)
-        crop_df = prepare_crop_data(df_agri, crop)
-        model, all_years = train_crop_model(crop_df, year)
-        plot_crop_forecast(all_years, crop_df, crop)
-
-    elif page == "Climate Agriculture Correlation":
-        st.subheader("🌿 Climate–Agriculture Correlation")
-        df_agri = load_agriculture_data("processed/cleaned_agricultural_data.csv")
+    # Ensure the selected crops have valid data to plot
+    if crops:
+        selected_data = df_agri[crops]
+
+        if selected_data.isnull().all().any():
+            st.warning("⚠️ No valid data available for the selected crops.")
+        else:
+            plot_crop_trends(df_agri, crops)
+
+@register_page("Socio-Economic", "Crop Forecast", modules=["utils.agriculture"])
+def crop_forecast_page(df_clean):
+    from utils.agriculture import load_agriculture_data, prepare_crop_data, plot_crop_forecast, load_crop_forecasts
+
+    st.subheader("🌾 Crop Forecast")
+    if not os.path.exists(AGRI_PATH):
+        st.error(f"❌ Agriculture data not found at {AGRI_PATH}.")
+        return
+    df_agri = load_agriculture_data(AGRI_PATH)
+    if df_agri.empty:
+        st.error("❌ No agricultural data available to forecast.")
+        return
+    crop = st.selectbox("Select a crop to forecast:", df_agri.columns[1:])
+    year = st.slider("Forecast year:", 2025, 2040, 2035)
+    crop_df = prepare_crop_data(df_agri, crop)
+
+    # All crops are fitted and backtested in one batch; this only slices the stored table
+    forecasts, metrics = load_crop_forecasts(AGRI_PATH, forecast_until=2040)
+    all_years = forecasts[(forecasts['Crop'] == crop) & (forecasts['Year'] <= year)]
+    plot_crop_forecast(all_years, crop_df, crop)
+
+    crop_metrics = metrics[metrics['Crop'] == crop]
+    if not crop_metrics.empty:
+        row = crop_metrics.iloc[0]
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Trend ('000 t / year)", f"{row['Slope_per_year']:.2f}")
+        col2.metric("Backtest MAPE", f"{row['MAPE_pct']:.1f} %")
+        col3.metric("Backtest RMSE", f"{row['RMSE']:.2f}")
+
+    with st.expander("📋 Backtest accuracy for all crops"):
+        st.dataframe(metrics.sort_values('MAPE_pct'))
+
+@register_page("Socio-Economic", "Climate Agriculture Correlation",
+               modules=["utils.agriculture", "utils.climate_agri_corr"])
+def climate_agri_correlation_page(df_clean):
+    from utils.agriculture import load_agriculture_data
+    from utils.climate_agri_corr import (
+        merge_climate_agriculture, plot_climate_crop_correlation, calculate_correlation,
+        compute_correlation_matrix, plot_correlation_heatmap,
+        merge_seasonal_climate_agriculture, CROP_SEASONS, SEASON_LABELS
+    )
+
+    st.subheader("🌿 Climate–Agriculture Correlation")
+    df_agri = load_agriculture_data(AGRI_PATH)
+    view = st.radio("View:", ["Single pair", "All pairs matrix"], horizontal=True)
+
+    if view == "Single pair":
         climate_var = st.selectbox("Climate Variable:", ["Temp_2m", "Precip"])
         crop = st.selectbox("Select crop:", df_agri.columns[1:])
-        merged_df = merge_climate_agriculture(df_clean, df_agri, climate_var, crop)
+        if st.checkbox("Align climate to the crop's growing season / fiscal year", value=True):
+            st.caption(f"Season: {SEASON_LABELS[CROP_SEASONS.get(crop, 'fiscal')]}")
+            merged_df = merge_seasonal_climate_agriculture(df_clean, df_agri, climate_var, crop)
+        else:
+            merged_df = merge_climate_agriculture(df_clean, df_agri, climate_var, crop)
         st.dataframe(merged_df.head())
 
         label_map = {"Temp_2m": "Temperature (°C)", "Precip": "Precipitation (mm)"}
@@ -242,3 +462,82 @@ elif dashboard == "Socio-Economic":
         corr = calculate_correlation(merged_df)
         if corr is not None:
             st.markdown(f"**Pearson r:** {corr:.2f}")
+    else:
+        # Whole grid is computed once (by the pipeline, or here and cached); widgets only slice it
+        corr_df = load_artifact("climate_agri_correlation", sources=[csv_path, AGRI_PATH])
+        if corr_df is None:
+            corr_df = compute_correlation_matrix(df_clean, df_agri)
+        method = st.radio("Method:", ["Pearson", "Spearman"], horizontal=True)
+        plot_correlation_heatmap(corr_df, method)
+
+        if not corr_df.empty:
+            col1, col2, col3 = st.columns(3)
+            var = col1.selectbox("Climate variable:", corr_df['Climate_Variable'].unique())
+            aggs = corr_df.loc[corr_df['Climate_Variable'] == var, 'Aggregation'].unique()
+            agg = col2.selectbox("Aggregation:", aggs)
+            crop = col3.selectbox("Crop:", corr_df['Crop'].unique())
+            cell = corr_df[(corr_df['Climate_Variable'] == var) &
+                           (corr_df['Aggregation'] == agg) &
+                           (corr_df['Crop'] == crop)]
+            st.dataframe(cell)
+            st.markdown("#### Strongest relationships")
+            st.dataframe(corr_df.reindex(corr_df[f'{method}_r'].abs()
+                                         .sort_values(ascending=False).index).head(10))
+
+@register_page("Socio-Economic", "Climate-Driven Yield Model",
+               modules=["utils.agriculture", "utils.crop_model"])
+def yield_model_page(df_clean):
+    from utils.agriculture import load_agriculture_data
+    from utils.crop_model import load_crop_models, predict_scenarios, plot_scenario_grid, MODEL_TYPES
+    from utils.preprocess import file_signature
+
+    st.subheader("🌦️ Climate-Driven Yield Model")
+    df_agri = load_agriculture_data(AGRI_PATH)
+    model_type = st.radio("Model:", MODEL_TYPES, horizontal=True)
+    agri_signature = file_signature(AGRI_PATH) if os.path.exists(AGRI_PATH) else None
+    table, feature_cols, models, scores = load_crop_models(df_clean, df_agri, model_type, agri_signature=agri_signature)
+
+    if not models:
+        st.warning("⚠️ Not enough overlapping climate and crop years to train a model.")
+    else:
+        crop = st.selectbox("Select crop:", sorted(models))
+        st.markdown(f"**Features:** {', '.join(feature_cols)}")
+        st.markdown(f"**In-sample R²:** {scores.loc[scores['Crop'] == crop, 'R2'].iloc[0]:.2f}")
+
+        crop_rows = table[table['Crop'] == crop]
+        baseline = crop_rows.loc[crop_rows['Year'].idxmax()]
+        st.caption(f"Scenarios are applied to the {int(baseline['Year'])} season.")
+
+        scenarios = predict_scenarios(models[crop], baseline, feature_cols)
+        plot_scenario_grid(scenarios, crop)
+
+        col1, col2 = st.columns(2)
+        d_temp = col1.slider("Temperature change (°C):", -1.0, 3.0, 1.0, step=0.5)
+        d_precip = col2.slider("Precipitation change (%):", -30, 30, 0, step=10)
+        what_if = predict_scenarios(models[crop], baseline, feature_cols, [d_temp], [d_precip])
+        base = predict_scenarios(models[crop], baseline, feature_cols, [0.0], [0])
+        st.metric("Predicted production ('000 t)",
+                  f"{what_if['Predicted_Yield'].iloc[0]:.1f}",
+                  f"{what_if['Predicted_Yield'].iloc[0] - base['Predicted_Yield'].iloc[0]:+.1f}")
+
+# ─── Dashboard Selection ──────────────────────────────────────────────
+dashboard = st.sidebar.radio("Choose Dashboard", ["Home", "Climate", "Environment", "Socio-Economic"])
+
+if dashboard == "Home":
+    page = "Home"
+else:
+    page = st.sidebar.selectbox(f"{dashboard} Dashboard", list_pages(dashboard))
+
+try:
+    if dashboard == "Environment":
+        # Rasters and glacier shapefiles are only needed by the environment pages
+        with stage("startup:environment_downloads"):
+            from utils.download_data import download_all_data
+            download_all_data()
+
+    render_page(dashboard, page, df_clean)
+finally:
+    records = end_run()
+
+show_debug_panel(records)
+show_import_profile()
@@ -1,31 +1,74 @@
+import os
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
 from sklearn.linear_model import LinearRegression
+from utils.preprocess import file_signature
+from utils.instrumentation import instrument
+
+CROP_FORECAST_PATH = "processed/crop_forecasts.csv"
+CROP_METRICS_PATH = "processed/crop_forecast_metrics.csv"
+FORECAST_COLUMNS = ["Year", "Crop", "Predicted_Yield", "Observed"]
+METRIC_COLUMNS = ["Crop", "Slope_per_year", "MAPE_pct", "RMSE", "Backtest_Points"]
 
 # ─────────────────────────────────────────────────────────────
 # ✅ 1. Load and clean agriculture data
 # ─────────────────────────────────────────────────────────────
 
-def load_agriculture_data(filepath):
+@instrument(cache="resource", max_entries=4)
+def _read_agriculture_long(filepath, signature):
     """
-    Loads and processes agricultural production data.
-    Transposes to make 'Year' a column and converts '1998/99' → 1998.
+    Parses the commodity × fiscal-year CSV into a typed long table.
+    Shared by every session and page; callers must not modify it.
     """
-    try:
-        df = pd.read_csv(filepath, index_col=0)
-        df = df.transpose()
-        df.index.name = "Year"
-        df.reset_index(inplace=True)
+    df = pd.read_csv(filepath, index_col=0)
+    df.index.name = "Commodity"
 
-        # Convert '1998/99' to 1998 (integer)
-        df['Year'] = df['Year'].astype(str).str[:4].astype(int)
+    # '1998/99' → 1998 for every column header at once
+    years = df.columns.astype(str).str[:4].astype(np.int16)
+    values = df.apply(pd.to_numeric, errors='coerce').to_numpy(dtype=np.float32)
 
-        # Convert all other columns to numeric where possible
-        df = df.apply(pd.to_numeric, errors='ignore')
+    long_df = pd.DataFrame({
+        "Commodity": pd.Categorical(
+            np.repeat(df.index.to_numpy(), len(years)),
+            categories=pd.unique(df.index.to_numpy())
+        ),
+        "Year": np.tile(years, len(df)),
+        "Value": values.ravel(),
+    })
+    return long_df
+
+@st.cache_resource(max_entries=4)
+def _pivot_agriculture_wide(filepath, signature):
+    """
+    Wide Year × commodity view, built from the long table on first use.
+    """
+    long_df = _read_agriculture_long(filepath, signature)
+    wide = long_df.pivot(index="Year", columns="Commodity", values="Value")
+    wide.columns = wide.columns.astype(str)
+    wide.columns.name = None
+    return wide.reset_index()
 
-        return df
+def load_agriculture_long(filepath):
+    """
+    Returns the cached long-format agriculture table with columns
+    Commodity (categorical), Year (int16) and Value (float32).
+    """
+    try:
+        return _read_agriculture_long(filepath, file_signature(filepath))
+    except Exception as e:
+        st.error(f"❌ Error loading agricultural data: {e}")
+        return pd.DataFrame(columns=["Commodity", "Year", "Value"])
+
+def load_agriculture_data(filepath):
+    """
+    Loads agricultural production data as a wide table: a 'Year' column
+    ('1998/99' → 1998) plus one column per commodity.
+    Backed by the shared cached store; treat the result as read-only.
+    """
+    try:
+        return _pivot_agriculture_wide(filepath, file_signature(filepath))
     except Exception as e:
         st.error(f"❌ Error loading agricultural data: {e}")
         return pd.DataFrame()
@@ -132,3 +175,119 @@ def plot_crop_forecast(all_years, historical_df, crop):
     ax.legend()
     
     st.pyplot(fig)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 4. Batch forecast: every commodity at once, with backtests
+# ─────────────────────────────────────────────────────────────
+
+def _fit_trend(t, Y, M):
+    """
+    Closed-form least-squares line for every column of Y at once.
+    `t` is (n,), `Y` and the boolean mask `M` are (..., n, c); only
+    observations where M is True are used. Returns (intercept, slope),
+    each of shape (..., c).
+    """
+    W = M.astype(float)
+    Y0 = np.where(M, Y, 0.0)
+    n = W.sum(axis=-2)
+    sx = np.einsum('n,...nc->...c', t, W)
+    sy = Y0.sum(axis=-2)
+    sxx = np.einsum('n,...nc->...c', t ** 2, W)
+    sxy = np.einsum('n,...nc->...c', t, Y0)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (n * sxy - sx * sy) / (n * sxx - sx ** 2)
+        intercept = (sy - slope * sx) / n
+    return intercept, slope
+
+@instrument()
+def batch_crop_forecast(df, forecast_until=2040, min_train=5, horizon=1):
+    """
+    Fits a linear trend to every commodity column in one vectorized solve
+    and runs a rolling-origin backtest for all of them simultaneously.
+
+    For every origin k ≥ min_train the model is trained on the first k
+    years and scored on the next `horizon` years.
+
+    Returns (forecasts, metrics):
+    - forecasts: long table ['Year', 'Crop', 'Observed', 'Predicted_Yield']
+    - metrics: one row per crop with slope, MAPE (%), RMSE and backtest size
+    """
+    data = df.set_index('Year').sort_index().apply(pd.to_numeric, errors='coerce')
+    crops = data.columns
+    years = data.index.to_numpy(dtype=float)
+    Y = data.to_numpy(dtype=float)
+    M = ~np.isnan(Y)
+
+    # Centre the years for numerical stability
+    t0 = years.mean()
+    t = years - t0
+
+    # Full-history fit → forecasts
+    intercept, slope = _fit_trend(t, Y, M)
+    all_years = np.arange(int(years.min()), forecast_until + 1)
+    predicted = intercept[None, :] + slope[None, :] * (all_years - t0)[:, None]
+
+    forecasts = pd.DataFrame(predicted, index=all_years, columns=crops)
+    forecasts.index.name = 'Year'
+    forecasts = forecasts.reset_index().melt(id_vars='Year', var_name='Crop', value_name='Predicted_Yield')
+    observed = data.reset_index().melt(id_vars='Year', var_name='Crop', value_name='Observed')
+    forecasts = forecasts.merge(observed, on=['Year', 'Crop'], how='left')
+
+    # Rolling-origin backtest: all origins × all crops in one pass
+    n = len(years)
+    origins = np.arange(min_train, n)
+    idx = np.arange(n)
+    train = M[None, :, :] & (idx[None, :] < origins[:, None])[:, :, None]
+    b0, b1 = _fit_trend(t, np.broadcast_to(Y, train.shape), train)
+    pred = b0[:, None, :] + b1[:, None, :] * t[None, :, None]
+    test = (idx[None, :] >= origins[:, None]) & (idx[None, :] < origins[:, None] + horizon)
+    test = M[None, :, :] & test[:, :, None]
+
+    err = np.where(test, pred - Y[None, :, :], np.nan)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ape = np.where(test & (Y[None, :, :] != 0), np.abs(err) / np.abs(Y[None, :, :]), np.nan)
+    points = test.sum(axis=(0, 1))
+    with np.errstate(invalid='ignore'):
+        mape = np.nanmean(ape, axis=(0, 1)) * 100 if len(origins) else np.full(len(crops), np.nan)
+        rmse = np.sqrt(np.nanmean(err ** 2, axis=(0, 1))) if len(origins) else np.full(len(crops), np.nan)
+
+    metrics = pd.DataFrame({
+        'Crop': crops,
+        'Slope_per_year': slope,
+        'MAPE_pct': mape,
+        'RMSE': rmse,
+        'Backtest_Points': points,
+    })
+    return forecasts, metrics
+
+def load_crop_forecasts(filepath, forecast_until=2040):
+    """
+    Reads the stored batch forecast and metric tables, rebuilding them when
+    they are missing or older than the agriculture source file. Returns
+    empty tables with the same columns if the source cannot be read.
+    """
+    try:
+        return _load_crop_forecasts(filepath, file_signature(filepath), forecast_until)
+    except Exception as e:
+        st.error(f"❌ Error forecasting crop production: {e}")
+        return pd.DataFrame(columns=FORECAST_COLUMNS), pd.DataFrame(columns=METRIC_COLUMNS)
+
+@instrument(cache="data")
+def _load_crop_forecasts(filepath, signature, forecast_until):
+    source_mtime = os.path.getmtime(filepath)
+    stored = [CROP_FORECAST_PATH, CROP_METRICS_PATH]
+    if all(os.path.exists(p) and os.path.getmtime(p) >= source_mtime for p in stored):
+        forecasts = pd.read_csv(CROP_FORECAST_PATH)
+        if forecasts['Year'].max() >= forecast_until:
+            return forecasts, pd.read_csv(CROP_METRICS_PATH)
+
+    df = _pivot_agriculture_wide(filepath, signature)
+    if len(df.columns) < 2:
+        raise ValueError("no commodity columns in the agriculture data")
+
+    forecasts, metrics = batch_crop_forecast(df, forecast_until=forecast_until)
+    os.makedirs(os.path.dirname(CROP_FORECAST_PATH), exist_ok=True)
+    forecasts.to_csv(CROP_FORECAST_PATH, index=False)
+    metrics.to_csv(CROP_METRICS_PATH, index=False)
+    return forecasts, metrics
@@ -0,0 +1,51 @@
+import os
+import pandas as pd
+import streamlit as st
+from utils.preprocess import file_signature
+from utils.instrumentation import instrument
+
+# Tables precomputed by scripts/pipeline.py (paths relative to the repo root).
+# The dashboard reads these when present and only falls back to computing
+# the same result in the web process when the pipeline has not been run.
+ARTIFACTS = {
+    "cleaned_climate": "processed/cleaned_dailyclimate.csv",
+    "climate_yearly": "processed/climate_yearly.csv",
+    "climate_forecasts": "processed/climate_forecasts.csv",
+    "climate_trends": "processed/climate_trends.csv",
+    "climate_agri_correlation": "processed/climate_agri_correlation.csv",
+    "landcover_transitions": "processed/landcover_transitions_2005_2015.csv",
+    "glacier_area": "processed/glacier_area_by_year.csv",
+}
+
+# Columns to parse as dates when reading an artifact back
+ARTIFACT_DATE_COLUMNS = {
+    "cleaned_climate": ["Date"],
+}
+
+@instrument(cache="resource", max_entries=16, show_spinner=False)
+def _read_artifact(path, signature, parse_dates):
+    """
+    One parsed copy per artifact version, shared by every session.
+    """
+    return pd.read_csv(path, parse_dates=list(parse_dates) or None)
+
+def load_artifact(name, sources=()):
+    """
+    Reads a precomputed artifact, or returns None if it is missing or older
+    than any of the given `sources` (so the caller computes it live).
+    Cached once per file version for all sessions; a pipeline refresh is
+    picked up automatically.
+    """
+    path = ARTIFACTS[name]
+    if not os.path.exists(path):
+        return None
+    signature = file_signature(path)
+    for source in sources:
+        if os.path.exists(source) and os.stat(source).st_mtime_ns > signature[0]:
+            return None
+    try:
+        # Shallow copy: shares the data; copy-on-write keeps the cached frame intact
+        return _read_artifact(path, signature, tuple(ARTIFACT_DATE_COLUMNS.get(name, ()))).copy(deep=False)
+    except Exception as e:
+        st.error(f"❌ Failed to read precomputed {name}: {e}")
+        return None
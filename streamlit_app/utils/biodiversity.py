@@ -1,86 +1,166 @@
+import os
+import numpy as np
 import pandas as pd
-import re
 import matplotlib.pyplot as plt
 import streamlit as st
+from utils.preprocess import file_signature
+from utils.instrumentation import instrument
 
-def load_threatened_data(filepath):
+# Matches both 'threatened species_1998' and 'threatened species_Y2007'
+YEAR_COLUMN_PATTERN = r'^threatened species[_ ]*y?(\d{4})$'
+
+EMPTY_LONG = pd.DataFrame(columns=['Year', 'Species', 'Count'])
+
+def parse_threatened_table(df):
     """
-    Load and reshape cleaned threatened species CSV.
-    Detects all columns like 'threatened species_1998', '...Y2007', etc.
+    Reshape the wide NSO threatened species table to long format.
+    Year columns are detected with one vectorized regex over the headers.
     Returns a tidy DataFrame with columns: Year, Species, Count.
     """
-    try:
-        df = pd.read_csv(filepath)
-
-        # Debug: show columns during development
-        ## st.write("🔍 Columns in CSV:", df.columns.tolist())
-
-        # Rename species column if necessary
-        if "Major Group of Species" in df.columns:
-            df = df.rename(columns={"Major Group of Species": "Species"})
-
-        # Detect year columns, normalize by removing 'Y' and whitespace
-        year_cols = []
-        year_map = {}
-
-        for col in df.columns:
-            col_clean = col.strip().lower().replace("y", "")  # e.g. "threatened species_2007"
-            match = re.search(r'threatened species[_ ]*(\d{4})$', col_clean)
-            if match:
-                year = int(match.group(1))
-                year_cols.append(col)         # use original column name
-                year_map[col] = year
-
-        if not year_cols:
-            st.error("⚠️ No 'threatened species_YYYY' columns found.")
-            return pd.DataFrame(columns=['Year', 'Species', 'Count'])
-
-        # Subset relevant columns
-        df_sub = df[['Species'] + year_cols].copy()
-
-        # Melt wide → long
-        df_long = df_sub.melt(
-            id_vars='Species',
-            value_vars=year_cols,
-            var_name='OrigCol',
-            value_name='Count'
-        )
-
-        # Map year column
-        df_long['Year'] = df_long['OrigCol'].map(year_map)
-        df_long = df_long.drop(columns=['OrigCol'])
+    # Rename species column if necessary
+    if "Major Group of Species" in df.columns:
+        df = df.rename(columns={"Major Group of Species": "Species"})
+
+    years = df.columns.str.strip().str.lower().str.extract(YEAR_COLUMN_PATTERN, expand=False)
+    year_mask = np.asarray(years.notna())
+    if not year_mask.any():
+        return EMPTY_LONG.copy()
+
+    col_years = years[year_mask].astype(int).to_numpy()
+    counts = df.loc[:, year_mask].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+    species = df['Species'].astype(str).str.strip().to_numpy()
+
+    # Wide → long without melt: repeat species, tile years
+    df_long = pd.DataFrame({
+        'Year': np.tile(col_years, len(species)),
+        'Species': np.repeat(species, len(col_years)),
+        'Count': counts.ravel(),
+    })
+    df_long = df_long.dropna(subset=['Count'])
+    return df_long.sort_values(['Species', 'Year']).reset_index(drop=True)
+
+def compute_species_trends(df_long):
+    """
+    Trend statistics for every species group in one groupby:
+    first/last count, total and annualised growth, least-squares slope
+    (species per year) and mean change per year between surveys (each
+    difference divided by the gap in years, since surveys are uneven).
+    """
+    if df_long.empty:
+        return pd.DataFrame()
+
+    df = df_long.sort_values(['Species', 'Year'])
+    x = df['Year'].astype(float)
+    y = df['Count'].astype(float)
+    gap = x.groupby(df['Species']).diff()
+    work = pd.DataFrame({
+        'Species': df['Species'], 'Year': x, 'Count': y,
+        'xy': x * y, 'xx': x * x,
+        'YoY': y.groupby(df['Species']).diff() / gap.where(gap > 0),
+    })
+
+    g = work.groupby('Species').agg(
+        First_Year=('Year', 'first'), Last_Year=('Year', 'last'),
+        First_Count=('Count', 'first'), Last_Count=('Count', 'last'),
+        n=('Year', 'size'), sx=('Year', 'sum'), sy=('Count', 'sum'),
+        sxy=('xy', 'sum'), sxx=('xx', 'sum'),
+        Mean_YoY_Change=('YoY', 'mean'),
+    )
+
+    span = g['Last_Year'] - g['First_Year']
+    with np.errstate(invalid='ignore', divide='ignore'):
+        g['Slope_per_Year'] = (g['n'] * g['sxy'] - g['sx'] * g['sy']) / (g['n'] * g['sxx'] - g['sx'] ** 2)
+        g['Growth_pct'] = (g['Last_Count'] / g['First_Count'] - 1) * 100
+        g['Annual_Growth_pct'] = ((g['Last_Count'] / g['First_Count']) ** (1 / span) - 1) * 100
+
+    g[['First_Year', 'Last_Year']] = g[['First_Year', 'Last_Year']].astype(int)
+    cols = ['First_Year', 'Last_Year', 'First_Count', 'Last_Count',
+            'Growth_pct', 'Annual_Growth_pct', 'Slope_per_Year', 'Mean_YoY_Change']
+    return g[cols].replace([np.inf, -np.inf], np.nan).reset_index()
+
+@instrument(cache="resource", max_entries=4)
+def _build_threatened_store(filepath, signature):
+    """
+    Parses the CSV once and precomputes the trend table.
+    Shared by all sessions; callers must not modify the returned frames.
+    """
+    df = pd.read_csv(filepath, encoding='utf-8-sig')
+    df_long = parse_threatened_table(df)
+    return df_long, compute_species_trends(df_long)
 
-        # Clean types
-        df_long['Count'] = pd.to_numeric(df_long['Count'], errors='coerce')
-        df_long = df_long.dropna(subset=['Count', 'Year', 'Species'])
+def load_threatened_store(filepath, drive_id=None):
+    """
+    Returns (df_long, trends) from the cached store. The file is only
+    fetched from Google Drive when it is not present locally.
+    """
+    try:
+        if drive_id and not os.path.exists(filepath):
+            from utils.download_data import download_from_drive
+            download_from_drive(drive_id, filepath)
+        return _build_threatened_store(filepath, file_signature(filepath))
+    except Exception as e:
+        st.error(f"❌ Error loading threatened species data: {e}")
+        return EMPTY_LONG.copy(), pd.DataFrame()
 
-        return df_long[['Year', 'Species', 'Count']].sort_values(['Species', 'Year'])
+@st.cache_resource(max_entries=4)
+def _pivot_threatened_matrix(filepath, signature):
+    """
+    Year × Species matrix of counts, pivoted once per data version.
+    """
+    df_long, _ = _build_threatened_store(filepath, signature)
+    return df_long.pivot(index='Year', columns='Species', values='Count').sort_index()
 
+def load_threatened_matrix(filepath):
+    """
+    Returns the cached Year × Species count matrix (empty on failure).
+    """
+    try:
+        return _pivot_threatened_matrix(filepath, file_signature(filepath))
     except Exception as e:
-        st.error(f"❌ Error loading threatened species data: {e}")
-        return pd.DataFrame(columns=['Year', 'Species', 'Count'])
+        st.error(f"❌ Error building threatened species matrix: {e}")
+        return pd.DataFrame()
+
+def load_threatened_data(filepath):
+    """
+    Load and reshape cleaned threatened species CSV.
+    Detects all columns like 'threatened species_1998', '...Y2007', etc.
+    Returns a tidy DataFrame with columns: Year, Species, Count.
+    """
+    df_long, _ = load_threatened_store(filepath)
+    if df_long.empty:
+        st.error("⚠️ No 'threatened species_YYYY' columns found.")
+    return df_long
 
 
-def plot_threatened_trend(df_long, species_list):
+def plot_threatened_trend(data, species_list, max_legend=20):
     """
     Plot line chart of selected threatened species over time.
+    `data` is the Year × Species matrix from `load_threatened_matrix`
+    (a long Year/Species/Count frame is pivoted on the fly).
+    All selected series are drawn in one call by column selection.
     Displays annotated insights.
     """
-    if df_long.empty or not species_list:
+    if data.empty or not species_list:
         st.warning("⚠️ No data available for threatened species.")
         return
 
-    df_sel = df_long[df_long['Species'].isin(species_list)]
+    if 'Species' in data.columns:
+        data = data.pivot(index='Year', columns='Species', values='Count').sort_index()
+
+    species_list = [sp for sp in species_list if sp in data.columns]
+    if not species_list:
+        st.warning("⚠️ None of the selected species are in the data.")
+        return
+    selected = data[species_list]
 
     fig, ax = plt.subplots(figsize=(12, 6))
-    for species in species_list:
-        data = df_sel[df_sel['Species'] == species]
-        ax.plot(data['Year'], data['Count'], marker='o', label=species)
+    ax.plot(selected.index, selected.to_numpy(), marker='o' if len(species_list) <= max_legend else None)
 
     ax.set_xlabel("Year")
     ax.set_ylabel("Number of Threatened Species")
     ax.set_title("🦋 Trend of Threatened Species in Nepal (1998–2018)")
-    ax.legend()
+    if len(species_list) <= max_legend:
+        ax.legend(species_list)
     ax.grid(True)
 
     st.pyplot(fig)
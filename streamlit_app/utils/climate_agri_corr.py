@@ -1,9 +1,53 @@
 # streamlit_app/utils/climate_agri_corr.py
 
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
+from scipy import stats
+from utils.instrumentation import instrument
+
+# Yearly aggregations computed for each daily climate variable
+CLIMATE_AGGREGATIONS = {
+    'Temp_2m': ['mean', 'max', 'min'],
+    'MaxTemp_2m': ['mean', 'max'],
+    'Precip': ['sum', 'max'],
+    'WindSpeed_10m': ['mean', 'max'],
+}
+
+# Season windows as (start, end) month*100 + day, both inclusive.
+# A window whose start is later than its end wraps into the next calendar
+# year and is labelled with the year it starts in, which matches the
+# fiscal-year labels ('1998/99' → 1998) used by the agriculture data.
+SEASONS = {
+    'fiscal': (716, 715),    # Nepali fiscal year, Shrawan 1 (mid-July) onwards
+    'monsoon': (601, 1031),  # Jun–Oct, main paddy / millet season
+    'summer': (301, 831),    # Mar–Aug, maize
+    'winter': (1101, 430),   # Nov–Apr, wheat / barley harvested in the same fiscal year
+}
+
+SEASON_LABELS = {
+    'fiscal': 'Fiscal year (mid-Jul → mid-Jul)',
+    'monsoon': 'Monsoon (Jun–Oct)',
+    'summer': 'Summer (Mar–Aug)',
+    'winter': 'Winter (Nov–Apr)',
+}
+
+# Extreme-day thresholds, same as the Extreme Weather Trend page
+EXTREME_THRESHOLDS = {
+    'Heat_Days': ('Temp_2m', 40),
+    'Heavy_Rain_Days': ('Precip', 100),
+}
+
+# Growing season per crop; crops not listed use the fiscal year
+CROP_SEASONS = {
+    'Paddy': 'monsoon',
+    'Millet (Kodo)': 'monsoon',
+    'Maize': 'summer',
+    'Wheat': 'winter',
+    'Barley': 'winter',
+}
 
 def merge_climate_agriculture(df_climate: pd.DataFrame,
                               df_agri: pd.DataFrame,
@@ -19,7 +63,8 @@ def merge_climate_agriculture(df_climate: pd.DataFrame,
     df_agri : pd.DataFrame
         Agricultural data with columns ['Year', <crop1>, <crop2>, ...].
     climate_var : str
-        Which climate variable to use: 'Temp_2m' or 'Precipitation'.
+        Which climate variable to use: 'Temp_2m' or 'Precip'
+        ('Precipitation' is accepted as an alias).
     crop : str
         Name of one crop column in df_agri.
 
@@ -35,11 +80,12 @@ def merge_climate_agriculture(df_climate: pd.DataFrame,
     if climate_var == 'Temp_2m':
         climate_agg = df.groupby('Year')['Temp_2m'] \
                       .mean().reset_index(name='Climate_Value')
-    elif climate_var == 'Precipitation':
-        climate_agg = df.groupby('Year')['Precipitation'] \
+    elif climate_var in ('Precip', 'Precipitation'):
+        precip_col = 'Precip' if 'Precip' in df.columns else 'Precipitation'
+        climate_agg = df.groupby('Year')[precip_col] \
                       .sum().reset_index(name='Climate_Value')
     else:
-        raise ValueError("climate_var must be 'Temp_2m' or 'Precipitation'")
+        raise ValueError("climate_var must be 'Temp_2m' or 'Precip'")
 
     # Check agri
     if 'Year' not in df_agri.columns or crop not in df_agri.columns:
@@ -87,3 +133,221 @@ def calculate_correlation(df_merged: pd.DataFrame) -> float:
     if df_merged.shape[0] < 2:
         return None
     return df_merged['Climate_Value'].corr(df_merged['Crop_Yield'])
+
+def build_climate_features(df_climate: pd.DataFrame) -> pd.DataFrame:
+    """
+    Yearly climate features for every variable/aggregation pair in
+    CLIMATE_AGGREGATIONS, computed in a single groupby.
+
+    Returns
+    -------
+    pd.DataFrame
+        Indexed by Year with columns named '<variable>_<aggregation>'.
+    """
+    agg_spec = {var: aggs for var, aggs in CLIMATE_AGGREGATIONS.items() if var in df_climate.columns}
+    features = df_climate.groupby(df_climate['Date'].dt.year).agg(agg_spec)
+    features.columns = [f"{var}_{agg}" for var, agg in features.columns]
+    features.index.name = 'Year'
+    return features
+
+def _pairwise_corr(X: np.ndarray, Y: np.ndarray):
+    """
+    Pearson r between every column of X (n × p) and of Y (n × q) using
+    pairwise-complete observations, as a handful of matrix products.
+
+    Returns
+    -------
+    (r, n) : tuple of np.ndarray, both p × q
+    """
+    mx = ~np.isnan(X)
+    my = ~np.isnan(Y)
+    x0 = np.where(mx, X, 0.0)
+    y0 = np.where(my, Y, 0.0)
+    mx = mx.astype(float)
+    my = my.astype(float)
+
+    n = mx.T @ my
+    sx = x0.T @ my
+    sy = mx.T @ y0
+    sxx = (x0 ** 2).T @ my
+    syy = mx.T @ (y0 ** 2)
+    sxy = x0.T @ y0
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        r = (n * sxy - sx * sy) / np.sqrt((n * sxx - sx ** 2) * (n * syy - sy ** 2))
+    return np.clip(r, -1.0, 1.0), n
+
+def _corr_pvalues(r: np.ndarray, n: np.ndarray) -> np.ndarray:
+    """
+    Two-sided p-values for correlation coefficients (t-test, n-2 dof).
+    """
+    dof = n - 2
+    with np.errstate(invalid='ignore', divide='ignore'):
+        t = r * np.sqrt(dof / (1.0 - r ** 2))
+        p = 2 * stats.t.sf(np.abs(t), dof)
+    return np.where(dof > 0, p, np.nan)
+
+@instrument(cache="data")
+def compute_correlation_matrix(df_climate: pd.DataFrame, df_agri: pd.DataFrame) -> pd.DataFrame:
+    """
+    Pearson and Spearman correlation of every (climate variable,
+    aggregation) feature with every crop, computed in one pass.
+
+    Spearman r uses per-column ranks, which equals pairwise ranking when
+    the series have no missing years.
+
+    Returns
+    -------
+    pd.DataFrame
+        Long table with ['Climate_Variable', 'Aggregation', 'Crop',
+        'Pearson_r', 'Pearson_p', 'Spearman_r', 'Spearman_p', 'N'].
+    """
+    features = build_climate_features(df_climate)
+    crops = df_agri.set_index('Year').apply(pd.to_numeric, errors='coerce')
+    crops = crops.loc[:, crops.notna().any()]
+
+    aligned = features.join(crops, how='inner')
+    X = aligned[features.columns].to_numpy(dtype=float)
+    Y = aligned[crops.columns].to_numpy(dtype=float)
+
+    pearson_r, n = _pairwise_corr(X, Y)
+    spearman_r, _ = _pairwise_corr(
+        aligned[features.columns].rank().to_numpy(dtype=float),
+        aligned[crops.columns].rank().to_numpy(dtype=float)
+    )
+
+    p, q = pearson_r.shape
+    feature_names = np.repeat(features.columns.to_numpy(), q)
+    variables, aggregations = zip(*(name.rsplit('_', 1) for name in feature_names)) if p else ((), ())
+
+    return pd.DataFrame({
+        'Climate_Variable': variables,
+        'Aggregation': aggregations,
+        'Crop': np.tile(crops.columns.to_numpy(), p),
+        'Pearson_r': pearson_r.ravel(),
+        'Pearson_p': _corr_pvalues(pearson_r, n).ravel(),
+        'Spearman_r': spearman_r.ravel(),
+        'Spearman_p': _corr_pvalues(spearman_r, n).ravel(),
+        'N': n.ravel().astype(int),
+    })
+
+def plot_correlation_heatmap(corr_df: pd.DataFrame, method: str = 'Pearson'):
+    """
+    Heatmap of climate features (rows) × crops (columns).
+
+    Parameters
+    ----------
+    corr_df : pd.DataFrame
+        Output of compute_correlation_matrix.
+    method : str
+        'Pearson' or 'Spearman'.
+    """
+    if corr_df.empty:
+        st.warning("⚠️ No overlapping years between climate and crop data.")
+        return
+
+    grid = corr_df.assign(Feature=corr_df['Climate_Variable'] + ' (' + corr_df['Aggregation'] + ')') \
+                  .pivot(index='Feature', columns='Crop', values=f'{method}_r')
+
+    fig, ax = plt.subplots(figsize=(max(8, 0.5 * grid.shape[1]), max(4, 0.5 * grid.shape[0])))
+    sns.heatmap(grid, cmap='RdBu_r', vmin=-1, vmax=1, center=0, ax=ax)
+    ax.set_title(f"{method} r: Climate Features vs Crop Production")
+    ax.set_xlabel("Crop")
+    ax.set_ylabel("Climate feature")
+    st.pyplot(fig)
+
+@instrument(cache="data")
+def build_seasonal_climate_features(df_climate: pd.DataFrame, min_coverage: float = 0.8) -> pd.DataFrame:
+    """
+    Climate features for every season window in SEASONS, labelled with the
+    fiscal/agricultural year the season belongs to.
+
+    Each season is one vectorized mask + groupby over the daily data.
+    Season-years with fewer than `min_coverage` × the typical number of days
+    (e.g. the partial first and last seasons) are dropped. Extreme-day
+    counts (EXTREME_THRESHOLDS) are included alongside the aggregates.
+
+    Returns
+    -------
+    pd.DataFrame
+        Long table with ['Season', 'Year', 'Days', '<variable>_<aggregation>',
+        ..., 'Heat_Days', 'Heavy_Rain_Days'].
+    """
+    agg_spec = {var: aggs for var, aggs in CLIMATE_AGGREGATIONS.items() if var in df_climate.columns}
+    extremes = pd.DataFrame({
+        name: df_climate[var] > threshold
+        for name, (var, threshold) in EXTREME_THRESHOLDS.items() if var in df_climate.columns
+    }, index=df_climate.index)
+    dates = df_climate['Date']
+    month_day = (dates.dt.month * 100 + dates.dt.day).to_numpy()
+    year = dates.dt.year.to_numpy()
+
+    parts = []
+    for season, (start, end) in SEASONS.items():
+        if start <= end:
+            mask = (month_day >= start) & (month_day <= end)
+            label = year
+        else:
+            mask = (month_day >= start) | (month_day <= end)
+            label = year - (month_day <= end)
+
+        subset = df_climate.loc[mask]
+        season_year = pd.Series(label[mask], index=subset.index, name='Year')
+        agg = subset.groupby(season_year).agg(agg_spec)
+        agg.columns = [f"{var}_{how}" for var, how in agg.columns]
+        agg = agg.join(extremes.loc[mask].groupby(season_year).sum())
+        # Distinct days, so district-level rows are not counted several times
+        agg.insert(0, 'Days', subset.groupby(season_year)['Date'].nunique())
+        agg = agg[agg['Days'] >= min_coverage * agg['Days'].median()]
+        agg.insert(0, 'Season', season)
+        parts.append(agg.reset_index())
+
+    return pd.concat(parts, ignore_index=True)
+
+@instrument(cache="data")
+def build_aligned_climate_crop_table(df_climate: pd.DataFrame, df_agri: pd.DataFrame) -> pd.DataFrame:
+    """
+    Joins every crop to the climate of its own growing season (CROP_SEASONS,
+    fiscal year otherwise) for the same agricultural year.
+
+    Returns
+    -------
+    pd.DataFrame
+        ['Year', 'Crop', 'Season', 'Production', 'Days', <climate features>].
+    """
+    seasonal = build_seasonal_climate_features(df_climate)
+
+    crops_long = df_agri.melt(id_vars='Year', var_name='Crop', value_name='Production')
+    crops_long['Production'] = pd.to_numeric(crops_long['Production'], errors='coerce')
+    crops_long['Season'] = crops_long['Crop'].map(CROP_SEASONS).fillna('fiscal')
+
+    return crops_long.merge(seasonal, on=['Season', 'Year'], how='inner') \
+                     .sort_values(['Crop', 'Year']).reset_index(drop=True)
+
+def merge_seasonal_climate_agriculture(df_climate: pd.DataFrame,
+                                       df_agri: pd.DataFrame,
+                                       climate_var: str,
+                                       crop: str) -> pd.DataFrame:
+    """
+    Season-aligned counterpart of merge_climate_agriculture.
+
+    Temperature is averaged and precipitation summed over the crop's growing
+    season of the same fiscal year, instead of over the calendar year.
+
+    Returns
+    -------
+    pd.DataFrame
+        ['Year', 'Climate_Value', 'Crop_Yield'] merged on Year.
+    """
+    if climate_var == 'Temp_2m':
+        feature = 'Temp_2m_mean'
+    elif climate_var in ('Precip', 'Precipitation'):
+        feature = 'Precip_sum'
+    else:
+        raise ValueError("climate_var must be 'Temp_2m' or 'Precip'")
+
+    table = build_aligned_climate_crop_table(df_climate, df_agri)
+    subset = table[table['Crop'] == crop]
+    return subset[['Year', feature, 'Production']] \
+        .rename(columns={feature: 'Climate_Value', 'Production': 'Crop_Yield'}) \
+        .reset_index(drop=True)
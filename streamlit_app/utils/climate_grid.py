@@ -0,0 +1,242 @@
+import os
+import warnings
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import streamlit as st
+from utils.preprocess import file_signature
+from utils.district_index import district_index, district_period_matrix
+from utils.instrumentation import instrument
+
+# Anomalies are departures from each station's 1981–2010 annual climate
+BASELINE = (1981, 2010)
+
+# Annual aggregate per variable (precipitation as a yearly total)
+ANOMALY_VARIABLES = {
+    "Temp_2m": ("mean", "Temperature anomaly (°C)"),
+    "MaxTemp_2m": ("mean", "Max temperature anomaly (°C)"),
+    "Precip": ("sum", "Precipitation anomaly (mm/year)"),
+    "WindSpeed_10m": ("mean", "Wind speed anomaly (m/s)"),
+}
+
+# Years with fewer observed days are left out of a station's series
+MIN_DAYS_PER_YEAR = 330
+
+# The anomaly grid is a coarsened copy of this raster's grid (same CRS and
+# extent), so maps line up with the landcover layers pixel for pixel
+LANDCOVER_RASTERS = {
+    2005: "Data/Raw/Environment_data/Landcover_2005_Icimod.tif",
+    2015: "Data/Raw/Environment_data/Landcover_2015_icimod.tif",
+}
+GRID_MAX_SIDE = 300
+
+# Lon/lat grid used when the landcover rasters are not downloaded
+NEPAL_BOUNDS = (80.0, 26.3, 88.3, 30.5)
+
+# Inverse-distance weighting: nearest stations used per cell and the power
+IDW_NEIGHBOURS = 8
+IDW_POWER = 2.0
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Station anomalies
+# ─────────────────────────────────────────────────────────────
+
+def station_annual_anomalies(df, column, baseline=BASELINE):
+    """
+    Annual anomalies for every station (district) in one vectorized pass
+    over the (district, date) offset table.
+    Returns (stations, years, anomalies) where stations has District,
+    Longitude and Latitude and anomalies is a years × stations array
+    (NaN where a year is incomplete or the station has no baseline).
+    """
+    how, _ = ANOMALY_VARIABLES[column]
+    df, index = district_index(df)
+    if index is None or not {"Latitude", "Longitude"} <= set(df.columns):
+        raise ValueError("Gridding needs District, Latitude and Longitude columns.")
+    keys, years, annual = district_period_matrix(df, column, how=how, min_days=MIN_DAYS_PER_YEAR)
+
+    in_baseline = (years >= baseline[0]) & (years <= baseline[1])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # stations without baseline years
+        normals = np.nanmean(annual[:, in_baseline], axis=1) if in_baseline.any() \
+            else np.full(len(keys), np.nan)
+    anomalies = (annual - normals[:, None]).T
+
+    station = np.repeat(np.arange(len(keys)), np.diff(index["offsets"]))
+    rows = np.bincount(station, minlength=len(keys))
+    stations = pd.DataFrame({
+        "District": keys,
+        "Longitude": np.bincount(station, weights=df["Longitude"].to_numpy(dtype=float)) / rows,
+        "Latitude": np.bincount(station, weights=df["Latitude"].to_numpy(dtype=float)) / rows,
+    })
+    return stations, years, anomalies
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Target grid and KD-tree IDW
+# ─────────────────────────────────────────────────────────────
+
+def grid_from_raster(path, max_side=GRID_MAX_SIDE):
+    """
+    Coarsened grid of a raster: same CRS and extent, at most `max_side`
+    cells on the long side. Cells where the raster is nodata are masked.
+    """
+    import rasterio
+    from rasterio.enums import Resampling
+
+    with rasterio.open(path) as src:
+        scale = max(1.0, max(src.width, src.height) / max_side)
+        shape = (max(1, int(src.height / scale)), max(1, int(src.width / scale)))
+        data = src.read(1, out_shape=shape, resampling=Resampling.nearest)
+        transform = src.transform * src.transform.scale(src.width / shape[1], src.height / shape[0])
+        valid = data != src.nodata if src.nodata is not None else np.ones(shape, dtype=bool)
+        return {"transform": transform, "crs": src.crs, "shape": shape, "valid": valid,
+                "bounds": tuple(src.bounds), "aligned": True}
+
+def default_grid(max_side=GRID_MAX_SIDE):
+    """
+    Plain lon/lat grid over Nepal's bounding box.
+    """
+    from affine import Affine
+
+    west, south, east, north = NEPAL_BOUNDS
+    res = max(east - west, north - south) / max_side
+    shape = (int(np.ceil((north - south) / res)), int(np.ceil((east - west) / res)))
+    return {"transform": Affine(res, 0, west, 0, -res, north), "crs": "EPSG:4326", "shape": shape,
+            "valid": np.ones(shape, dtype=bool), "bounds": NEPAL_BOUNDS, "aligned": False}
+
+def _to_grid_crs(grid, lon, lat):
+    """
+    (is_geographic, x, y): station coordinates in the grid's CRS.
+    """
+    from rasterio.crs import CRS
+    from rasterio.warp import transform as warp_transform
+
+    crs = CRS.from_user_input(grid["crs"])
+    if crs.is_geographic:
+        return True, np.asarray(lon, dtype=float), np.asarray(lat, dtype=float)
+    x, y = warp_transform("EPSG:4326", crs, list(lon), list(lat))
+    return False, np.asarray(x), np.asarray(y)
+
+def idw_weights(station_xy, cell_xy, k=IDW_NEIGHBOURS, power=IDW_POWER):
+    """
+    (neighbour index, weight) arrays of shape cells × k from one KD-tree
+    query. Computed once per grid and station set, reused for every year.
+    """
+    from scipy.spatial import cKDTree
+
+    k = min(k, len(station_xy))
+    dist, idx = cKDTree(station_xy).query(cell_xy, k=k)
+    if k == 1:
+        dist, idx = dist[:, None], idx[:, None]
+    weights = 1.0 / np.maximum(dist, 1e-9) ** power
+    return idx, weights
+
+def interpolate_idw(values, idx, weights):
+    """
+    IDW estimate at every cell from station `values`; stations without a
+    value (NaN) drop out and the remaining neighbours are renormalised.
+    """
+    neighbour_values = values[idx]
+    ok = np.isfinite(neighbour_values)
+    w = np.where(ok, weights, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return (np.where(ok, neighbour_values, 0.0) * w).sum(axis=1) / w.sum(axis=1)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Cached per-year anomaly grids
+# ─────────────────────────────────────────────────────────────
+
+def _build_anomaly_grids(version, column, raster_path, raster_signature, _df):
+    """
+    float32 anomaly grid per year (NaN outside the raster's data area).
+    """
+    stations, years, anomalies = station_annual_anomalies(_df, column)
+    grid = grid_from_raster(raster_path) if raster_path else default_grid()
+
+    rows, cols = np.nonzero(grid["valid"])
+    cell_x, cell_y = grid["transform"] * (cols + 0.5, rows + 0.5)
+    geographic, st_x, st_y = _to_grid_crs(grid, stations["Longitude"], stations["Latitude"])
+    stations = stations.assign(x=st_x, y=st_y)
+
+    # In degrees, shrink longitude so both axes measure comparable distances
+    x_scale = np.cos(np.radians(stations["Latitude"].mean())) if geographic else 1.0
+    idx, weights = idw_weights(np.column_stack([st_x * x_scale, st_y]),
+                               np.column_stack([np.asarray(cell_x) * x_scale, cell_y]))
+
+    grids = {}
+    for i, year in enumerate(years):
+        if not np.isfinite(anomalies[i]).any():
+            continue
+        out = np.full(grid["shape"], np.nan, dtype=np.float32)
+        out[rows, cols] = interpolate_idw(anomalies[i], idx, weights)
+        grids[int(year)] = out
+    return {"grids": grids, "stations": stations, "anomalies": anomalies, "years": years,
+            "shape": grid["shape"], "bounds": grid["bounds"], "aligned": grid["aligned"],
+            "raster_path": raster_path}
+
+_cached_anomaly_grids = instrument(cache="resource", max_entries=8)(_build_anomaly_grids)
+
+def anomaly_grids(df, column):
+    """
+    Per-year anomaly grids for `column` on the landcover raster grid (or a
+    lon/lat grid over Nepal when the rasters are missing). Cached once per
+    dataset version and raster; returns None after reporting an error.
+    """
+    raster_path = LANDCOVER_RASTERS[2005] if os.path.exists(LANDCOVER_RASTERS[2005]) else None
+    signature = file_signature(raster_path) if raster_path else None
+    version = df.attrs.get("dataset_version")
+    try:
+        if version is None:  # not from the shared tier: no stable cache key
+            return _build_anomaly_grids(None, column, raster_path, signature, df)
+        return _cached_anomaly_grids(version, column, raster_path, signature, df)
+    except Exception as e:
+        st.error(f"❌ Could not build anomaly grids: {e}")
+        return None
+
+@instrument(cache="resource", max_entries=4)
+def landcover_change_mask(shape, signatures):
+    """
+    Pixels whose landcover class changed 2005 → 2015, on the anomaly grid.
+    """
+    from utils.landcover import load_raster_resampled
+
+    lc1, _ = load_raster_resampled(LANDCOVER_RASTERS[2005], target_shape=shape)
+    lc2, _ = load_raster_resampled(LANDCOVER_RASTERS[2015], target_shape=shape)
+    if lc1 is None or lc2 is None:
+        return None
+    return lc1 != lc2
+
+def plot_anomaly_map(result, year, column, overlay_landcover=False):
+    """
+    Diverging anomaly map for one year with station locations; optionally
+    hatches the pixels whose landcover changed between 2005 and 2015.
+    """
+    grid = result["grids"].get(year)
+    if grid is None:
+        st.warning(f"⚠️ No complete station years for {year}.")
+        return
+
+    _, label = ANOMALY_VARIABLES[column]
+    west, south, east, north = result["bounds"]
+    limit = float(np.nanmax(np.abs(grid))) or 1.0
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    image = ax.imshow(grid, extent=(west, east, south, north), cmap="RdBu_r", vmin=-limit, vmax=limit)
+    fig.colorbar(image, ax=ax, label=label, shrink=0.8)
+    stations = result["stations"]
+    ax.scatter(stations["x"], stations["y"], s=8, c="black", label="Stations")
+
+    if overlay_landcover and result["aligned"]:
+        signatures = tuple(file_signature(p) for p in LANDCOVER_RASTERS.values())
+        changed = landcover_change_mask(result["shape"], signatures)
+        if changed is not None:
+            ax.contourf(np.flipud(changed.astype(float)), levels=[0.5, 1.5], colors="none",
+                        hatches=["...."], extent=(west, east, south, north))
+            ax.plot([], [], color="grey", linestyle=":", label="Landcover changed 2005→2015")
+
+    base_start, base_end = BASELINE
+    ax.set_title(f"{label} in {year} (vs {base_start}–{base_end})")
+    ax.legend(loc="lower left")
+    st.pyplot(fig)
+    st.caption("Inverse-distance interpolation of station anomalies. "
+               "Source: Open Data Nepal_Daily climate records")
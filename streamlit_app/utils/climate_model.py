@@ -5,15 +5,26 @@ import numpy as np
 import matplotlib.pyplot as plt
 import streamlit as st
 from sklearn.linear_model import LinearRegression
+from utils.instrumentation import instrument
 
+# Ensemble forecasts: bootstrap samples and block length (years) of the
+# moving-block bootstrap, which keeps year-to-year autocorrelation
+ENSEMBLE_SIZE = 2000
+BLOCK_LENGTH = 5
+ENSEMBLE_PERCENTILES = (5, 25, 50, 75, 95)
+MIN_ENSEMBLE_YEARS = 5  # observed years needed to fit the trend and resample residuals
+
+@instrument()
 def prepare_yearly_variable(df, target_column):
     """
     Group daily data by year and compute average of selected column.
     """
+    df = df[['Date', target_column]].copy()  # shared frames are read-only
     df['Year'] = df['Date'].dt.year
     yearly_avg = df.groupby('Year')[target_column].mean().reset_index()
     return yearly_avg
 
+@instrument()
 def train_forecast_model(df_yearly, forecast_until=2035):
     """
     Train a regression model and predict up to forecast_until year.
@@ -44,3 +55,117 @@ def plot_forecast(all_years, historical, variable_label):
     ax.grid(True)
     ax.legend()
     st.pyplot(fig)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ Ensemble forecasts (block bootstrap)
+# ─────────────────────────────────────────────────────────────
+
+def block_bootstrap_indices(n, n_samples, block_length=BLOCK_LENGTH, seed=0):
+    """
+    Circular moving-block bootstrap: an n_samples × n array of indices into
+    a series of length n, built from randomly placed runs of consecutive
+    positions (all samples at once, no Python loop per sample).
+    """
+    rng = np.random.default_rng(seed)
+    block_length = max(1, min(block_length, n))
+    n_blocks = -(-n // block_length)
+    starts = rng.integers(0, n, size=(n_samples, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block_length)) % n
+    return idx.reshape(n_samples, -1)[:, :n]
+
+def bootstrap_trend_ensemble(years, values, future_years, n_samples=ENSEMBLE_SIZE,
+                             block_length=BLOCK_LENGTH, seed=0):
+    """
+    Predictive samples (len(future_years) × n_samples) of a linear trend.
+
+    Residuals of the fitted trend are block-resampled into n_samples
+    synthetic series, and all of them are refitted by one batched
+    least-squares solve. Each projected trend gets a resampled residual
+    added, so the spread covers both trend and year-to-year uncertainty.
+    """
+    years = np.asarray(years, dtype=float)
+    values = np.asarray(values, dtype=float)
+    centre = years.mean()
+    X = np.column_stack([np.ones_like(years), years - centre])
+
+    beta, *_ = np.linalg.lstsq(X, values, rcond=None)
+    fitted = X @ beta
+    # Fitted residuals understate the error variance; rescale by n / (n - p)
+    resid = (values - fitted) * np.sqrt(len(values) / max(1, len(values) - X.shape[1]))
+
+    idx = block_bootstrap_indices(len(values), n_samples, block_length, seed)
+    Y = fitted[:, None] + resid[idx].T                   # n_years × n_samples
+    betas, *_ = np.linalg.lstsq(X, Y, rcond=None)        # 2 × n_samples, one solve
+
+    future = np.asarray(future_years, dtype=float)
+    X_future = np.column_stack([np.ones_like(future), future - centre])
+    noise = resid[np.random.default_rng(seed + 1).integers(0, len(resid), size=(len(future), n_samples))]
+    return X_future @ betas + noise
+
+def summarize_ensemble(future_years, samples, percentiles=ENSEMBLE_PERCENTILES):
+    """
+    Per-year mean and percentiles (prediction intervals) of the ensemble.
+    """
+    summary = pd.DataFrame(np.percentile(samples, percentiles, axis=1).T,
+                           columns=[f"P{p}" for p in percentiles])
+    summary.insert(0, "Mean", samples.mean(axis=1))
+    summary.insert(0, "Year", np.asarray(future_years, dtype=int))
+    return summary
+
+def exceedance_probability(ensemble, year, threshold):
+    """
+    Share of ensemble members above `threshold` in `year`, which must be
+    one of the ensemble's forecast years.
+    """
+    rows = np.flatnonzero(ensemble["years"] == year)
+    if rows.size == 0:
+        raise ValueError(f"{year} is outside the forecast years "
+                         f"{ensemble['years'][0]}–{ensemble['years'][-1]}.")
+    return float((ensemble["samples"][rows[0]] > threshold).mean())
+
+def _build_ensemble(cache_key, variable, forecast_until, n_samples, block_length, _df_yearly):
+    # Missing years (e.g. a district without data) are left out of the fit
+    observed = _df_yearly[np.isfinite(_df_yearly[variable].to_numpy(dtype=float))]
+    if len(observed) < MIN_ENSEMBLE_YEARS:
+        return None
+    years = observed["Year"].to_numpy()
+    future_years = np.arange(years.max() + 1, forecast_until + 1)
+    samples = bootstrap_trend_ensemble(years, observed[variable].to_numpy(), future_years,
+                                       n_samples=n_samples, block_length=block_length)
+    samples.setflags(write=False)  # shared by all sessions
+    return {"years": future_years, "samples": samples, "summary": summarize_ensemble(future_years, samples)}
+
+_cached_ensemble = instrument(cache="resource", max_entries=32)(_build_ensemble)
+
+def forecast_ensemble(df_yearly, variable, cache_key=None, forecast_until=2050,
+                      n_samples=ENSEMBLE_SIZE, block_length=BLOCK_LENGTH):
+    """
+    Bootstrap ensemble forecast of a yearly series (columns Year, variable).
+    Returns {'years', 'samples' (years × members), 'summary'}, or None with
+    fewer than MIN_ENSEMBLE_YEARS observed years. Cached per `cache_key`
+    (e.g. data version and region) and variable; without a key it is
+    computed directly.
+    """
+    if cache_key is None:
+        return _build_ensemble(None, variable, forecast_until, n_samples, block_length, df_yearly)
+    return _cached_ensemble(cache_key, variable, forecast_until, n_samples, block_length, df_yearly)
+
+def plot_forecast_ensemble(ensemble, historical, variable_label, until=None):
+    """
+    Fan chart: observed series, ensemble median and 50% / 90% intervals.
+    """
+    summary = ensemble["summary"]
+    if until is not None:
+        summary = summary[summary["Year"] <= until]
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.plot(historical['Year'], historical.iloc[:, 1], label='Observed', marker='o')
+    ax.fill_between(summary['Year'], summary['P5'], summary['P95'], color='red', alpha=0.15, label='90% interval')
+    ax.fill_between(summary['Year'], summary['P25'], summary['P75'], color='red', alpha=0.3, label='50% interval')
+    ax.plot(summary['Year'], summary['P50'], linestyle='--', color='red', label='Ensemble median')
+
+    ax.set_title(f"📈 {variable_label} Ensemble Forecast ({ensemble['samples'].shape[1]:,} bootstrap members)")
+    ax.set_xlabel("Year")
+    ax.set_ylabel(f"{variable_label}")
+    ax.grid(True)
+    ax.legend()
+    st.pyplot(fig)
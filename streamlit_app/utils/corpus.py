@@ -0,0 +1,241 @@
+import os
+import re
+import json
+import hashlib
+from collections import Counter
+import pandas as pd
+import streamlit as st
+from textblob import TextBlob
+from utils.nltk_resources import get_sentence_tokenizer
+from utils.instrumentation import instrument
+
+CORPUS_DIR = "Data/Raw/Climate_reports"
+INDEX_DIR = "processed/corpus_index"
+CORPUS_EXTENSIONS = (".txt", ".md")
+
+# Bumped when the index layout changes; older indexes are rebuilt
+INDEX_FORMAT = 2
+
+TOKEN_PATTERN = re.compile(r"[a-z][a-z'\-]+")
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Tokenization
+# ─────────────────────────────────────────────────────────────
+
+def split_sentences(text, language="english"):
+    """
+    Splits text into sentences with the bundled punkt model.
+    Markdown headings and list markers are stripped and blank-line
+    separated blocks (headings, paragraphs) are never merged.
+    """
+    text = re.sub(r"^\s{0,3}(#+|[-*+]|\d+\.)\s+", "", text, flags=re.MULTILINE)
+    tokenizer = get_sentence_tokenizer(language)
+    sentences = []
+    for block in re.split(r"\n\s*\n", text):
+        block = " ".join(block.split())
+        if block:
+            sentences.extend(tokenizer.tokenize(block))
+    return sentences
+
+def tokenize_terms(text):
+    """
+    Lower-cased word tokens used for the inverted index.
+    """
+    return TOKEN_PATTERN.findall(text.lower())
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Incremental on-disk index
+# ─────────────────────────────────────────────────────────────
+
+def _empty_index():
+    return {"format": INDEX_FORMAT, "manifest": {}, "postings": {}, "term_totals": {}, "docs": {}}
+
+def _load_index(index_dir):
+    path = os.path.join(index_dir, "index.json")
+    if not os.path.exists(path):
+        return _empty_index()
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    return index if index.get("format") == INDEX_FORMAT else _empty_index()
+
+def _doc_id(rel_path):
+    """
+    Stable id of a document: derived from its path, so identical files at
+    different paths are separate documents. Content hashes are only used
+    to detect changes.
+    """
+    return hashlib.sha1(rel_path.replace(os.sep, "/").encode("utf-8")).hexdigest()[:12]
+
+def _save_index(index, index_dir):
+    os.makedirs(index_dir, exist_ok=True)
+    tmp_path = os.path.join(index_dir, "index.json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(index, f)
+    os.replace(tmp_path, os.path.join(index_dir, "index.json"))
+
+def _remove_document(index, doc_id):
+    """
+    Removes a document's postings and term totals from the index.
+    """
+    doc = index["docs"].pop(doc_id, None)
+    if doc is None:
+        return
+    for term, tf in doc["term_freqs"].items():
+        postings = index["postings"].get(term, {})
+        postings.pop(doc_id, None)
+        if not postings:
+            index["postings"].pop(term, None)
+        remaining = index["term_totals"].get(term, 0) - tf
+        if remaining > 0:
+            index["term_totals"][term] = remaining
+        else:
+            index["term_totals"].pop(term, None)
+
+def _add_document(index, doc_id, rel_path, text):
+    """
+    Splits, scores and indexes one document.
+    """
+    sentences = split_sentences(text)
+    sentiments = [TextBlob(sentence).sentiment for sentence in sentences]
+    term_freqs = Counter(tokenize_terms(text))
+
+    index["docs"][doc_id] = {
+        "path": rel_path,
+        "sentences": sentences,
+        "polarity": [round(s.polarity, 3) for s in sentiments],
+        "subjectivity": [round(s.subjectivity, 3) for s in sentiments],
+        "term_freqs": dict(term_freqs),
+    }
+    for term, tf in term_freqs.items():
+        index["postings"].setdefault(term, {})[doc_id] = tf
+        index["term_totals"][term] = index["term_totals"].get(term, 0) + tf
+
+def update_corpus_index(corpus_dir=CORPUS_DIR, index_dir=INDEX_DIR):
+    """
+    Brings the on-disk index in line with the corpus directory.
+
+    Files whose size and modification time are unchanged are skipped
+    without being read; touched files whose content hash is unchanged
+    are not re-processed; deleted files are removed from the index.
+
+    Returns (index, stats) where stats counts added/updated/removed files.
+    """
+    index = _load_index(index_dir)
+    manifest = index["manifest"]
+    stats = {"added": 0, "updated": 0, "removed": 0, "unchanged": 0}
+
+    seen = set()
+    for root, _, files in os.walk(corpus_dir):
+        for name in sorted(files):
+            if not name.lower().endswith(CORPUS_EXTENSIONS):
+                continue
+            path = os.path.join(root, name)
+            rel_path = os.path.relpath(path, corpus_dir)
+            seen.add(rel_path)
+
+            stat = os.stat(path)
+            entry = manifest.get(rel_path)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                stats["unchanged"] += 1
+                continue
+
+            with open(path, encoding="utf-8", errors="replace") as f:
+                text = f.read()
+            sha1 = hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+            if entry and entry["sha1"] == sha1:
+                entry.update(mtime_ns=stat.st_mtime_ns, size=stat.st_size)
+                stats["unchanged"] += 1
+                continue
+
+            doc_id = entry["doc_id"] if entry else _doc_id(rel_path)
+            if entry:
+                _remove_document(index, doc_id)
+                stats["updated"] += 1
+            else:
+                stats["added"] += 1
+            _add_document(index, doc_id, rel_path, text)
+            manifest[rel_path] = {"doc_id": doc_id, "sha1": sha1,
+                                  "mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+
+    for rel_path in set(manifest) - seen:
+        _remove_document(index, manifest.pop(rel_path)["doc_id"])
+        stats["removed"] += 1
+
+    if stats["added"] or stats["updated"] or stats["removed"] or not os.path.exists(os.path.join(index_dir, "index.json")):
+        _save_index(index, index_dir)
+    return index, stats
+
+@instrument(cache="resource")
+def _cached_corpus_index(corpus_dir, index_dir):
+    return update_corpus_index(corpus_dir, index_dir)
+
+def load_corpus_index(corpus_dir=CORPUS_DIR, index_dir=INDEX_DIR):
+    """
+    Cached index for the dashboard; call `.clear()` to rescan the folder.
+    A failed scan is reported but not cached.
+    """
+    try:
+        return _cached_corpus_index(corpus_dir, index_dir)
+    except Exception as e:
+        st.error(f"❌ Failed to index report corpus: {e}")
+        return _empty_index(), {}
+
+load_corpus_index.clear = _cached_corpus_index.clear
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Queries (dictionary lookups, no re-reading of files)
+# ─────────────────────────────────────────────────────────────
+
+def search_corpus(index, query):
+    """
+    Documents containing any query term, ranked by summed term frequency.
+    """
+    terms = tokenize_terms(query)
+    scores = Counter()
+    for term in terms:
+        scores.update(index["postings"].get(term, {}))
+
+    rows = [{"Doc": doc_id, "Path": index["docs"][doc_id]["path"], "Score": score}
+            for doc_id, score in scores.most_common()]
+    return pd.DataFrame(rows, columns=["Doc", "Path", "Score"])
+
+def corpus_top_terms(index, n=20, min_length=3):
+    """
+    Most frequent terms across the whole corpus.
+    """
+    totals = Counter({t: c for t, c in index["term_totals"].items() if len(t) >= min_length})
+    return pd.DataFrame(totals.most_common(n), columns=["Keyword", "Frequency"])
+
+def corpus_sentiment(index, query=None):
+    """
+    Per-document mean sentiment, optionally restricted to documents that
+    match `query`.
+    """
+    doc_ids = search_corpus(index, query)["Doc"].tolist() if query else list(index["docs"])
+    rows = []
+    for doc_id in doc_ids:
+        doc = index["docs"][doc_id]
+        n = len(doc["polarity"]) or 1
+        rows.append({
+            "Path": doc["path"],
+            "Sentences": len(doc["sentences"]),
+            "Mean_Polarity": round(sum(doc["polarity"]) / n, 3),
+            "Mean_Subjectivity": round(sum(doc["subjectivity"]) / n, 3),
+        })
+    return pd.DataFrame(rows, columns=["Path", "Sentences", "Mean_Polarity", "Mean_Subjectivity"])
+
+def matching_sentences(index, query, limit=50):
+    """
+    Sentences (with sentiment) that contain one of the query terms.
+    """
+    terms = set(tokenize_terms(query))
+    rows = []
+    for doc_id in search_corpus(index, query)["Doc"]:
+        doc = index["docs"][doc_id]
+        for sentence, pol, subj in zip(doc["sentences"], doc["polarity"], doc["subjectivity"]):
+            if terms & set(tokenize_terms(sentence)):
+                rows.append({"Path": doc["path"], "Text": sentence, "Polarity": pol, "Subjectivity": subj})
+                if len(rows) >= limit:
+                    return pd.DataFrame(rows)
+    return pd.DataFrame(rows, columns=["Path", "Text", "Polarity", "Subjectivity"])
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import seaborn as sns
+import streamlit as st
+from sklearn.ensemble import GradientBoostingRegressor
+from sklearn.linear_model import RidgeCV
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import StandardScaler
+
+from utils.climate_agri_corr import build_aligned_climate_crop_table, EXTREME_THRESHOLDS
+from utils.instrumentation import instrument
+
+MODEL_TYPES = ["Ridge", "Gradient Boosting"]
+
+# Climate features used by the yield model (seasonal means/totals + extremes)
+TEMP_FEATURES = ["Temp_2m_mean", "Temp_2m_max", "MaxTemp_2m_mean"]
+PRECIP_FEATURES = ["Precip_sum"]
+EXTREME_FEATURES = list(EXTREME_THRESHOLDS)
+
+# Default what-if grid
+TEMP_DELTAS = np.arange(-1.0, 3.01, 0.5)
+PRECIP_CHANGES_PCT = np.arange(-30, 31, 10)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Feature matrix: seasonal climate joined to crop production
+# ─────────────────────────────────────────────────────────────
+
+def build_crop_feature_table(df_climate, df_agri):
+    """
+    Season-aligned climate features joined to crop production.
+    Returns (table, feature_cols); 'Year' is kept as a trend feature.
+    """
+    table = build_aligned_climate_crop_table(df_climate, df_agri)
+    climate_cols = [c for c in TEMP_FEATURES + PRECIP_FEATURES + EXTREME_FEATURES if c in table.columns]
+    feature_cols = ["Year"] + climate_cols
+    table = table.dropna(subset=feature_cols + ["Production"])
+    return table, feature_cols
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Train one model per crop
+# ─────────────────────────────────────────────────────────────
+
+def _make_model(model_type):
+    if model_type == "Gradient Boosting":
+        return GradientBoostingRegressor(n_estimators=200, max_depth=2, learning_rate=0.05, random_state=0)
+    return make_pipeline(StandardScaler(), RidgeCV(alphas=np.logspace(-3, 3, 13)))
+
+def _fit_crop_model(crop, X, y, model_type):
+    model = _make_model(model_type)
+    model.fit(X, y)
+    return crop, model, model.score(X, y)
+
+def train_crop_models(feature_table, feature_cols, model_type="Ridge", min_years=6):
+    """
+    Trains a yield model per crop, in this process: each crop has only a
+    few dozen yearly rows, so a worker pool would cost more than the fits.
+    Crops with fewer than `min_years` rows are skipped.
+
+    Returns (models, scores): a dict {crop: fitted model} and a DataFrame
+    with the in-sample R² per crop.
+    """
+    jobs = [
+        (crop, grp[feature_cols].to_numpy(dtype=float), grp["Production"].to_numpy(dtype=float), model_type)
+        for crop, grp in feature_table.groupby("Crop", observed=True)
+        if len(grp) >= min_years
+    ]
+    if not jobs:
+        return {}, pd.DataFrame(columns=["Crop", "R2", "Years"])
+
+    results = [_fit_crop_model(*job) for job in jobs]
+
+    models = {crop: model for crop, model, _ in results}
+    scores = pd.DataFrame({
+        "Crop": [crop for crop, _, _ in results],
+        "R2": [score for _, _, score in results],
+        "Years": [len(job[2]) for job in jobs],
+    })
+    return models, scores
+
+def load_crop_models(df_climate, df_agri, model_type="Ridge", agri_signature=None):
+    """
+    Cached feature table + trained models for the dashboard, keyed on the
+    climate dataset version and the agriculture file signature (the frames
+    themselves are not hashed). Without either key the models are fitted
+    uncached. Failures are reported here, outside the cache, so the next
+    run tries again.
+    """
+    version = df_climate.attrs.get("dataset_version")
+    try:
+        if version is None or agri_signature is None:
+            return _fit_crop_models(df_climate, df_agri, model_type)
+        return _cached_crop_models(version, agri_signature, model_type, df_climate, df_agri)
+    except Exception as e:
+        st.error(f"❌ Crop model training failed: {e}")
+        return pd.DataFrame(), [], {}, pd.DataFrame()
+
+@instrument(cache="resource", max_entries=4)
+def _cached_crop_models(version, agri_signature, model_type, _df_climate, _df_agri):
+    return _fit_crop_models(_df_climate, _df_agri, model_type)
+
+def _fit_crop_models(df_climate, df_agri, model_type):
+    table, feature_cols = build_crop_feature_table(df_climate, df_agri)
+    models, scores = train_crop_models(table, feature_cols, model_type=model_type)
+    return table, feature_cols, models, scores
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. What-if inference over a grid of climate scenarios
+# ─────────────────────────────────────────────────────────────
+
+def predict_scenarios(model, baseline, feature_cols, temp_deltas=TEMP_DELTAS, precip_changes_pct=PRECIP_CHANGES_PCT):
+    """
+    Predicts yield for every (temperature shift, precipitation change)
+    pair in one batched `predict` call.
+
+    `baseline` is a Series of feature values (e.g. the latest year).
+    Temperature features are shifted by the delta in °C, precipitation
+    totals scaled by (1 + change/100); extreme-day counts are held fixed.
+    """
+    dT, dP = np.meshgrid(np.asarray(temp_deltas, dtype=float),
+                         np.asarray(precip_changes_pct, dtype=float), indexing="ij")
+    dT, dP = dT.ravel(), dP.ravel()
+
+    X = np.tile(baseline[feature_cols].to_numpy(dtype=float), (len(dT), 1))
+    temp_idx = [i for i, c in enumerate(feature_cols) if c in TEMP_FEATURES]
+    precip_idx = [i for i, c in enumerate(feature_cols) if c in PRECIP_FEATURES]
+    X[:, temp_idx] += dT[:, None]
+    X[:, precip_idx] *= (1 + dP / 100)[:, None]
+
+    return pd.DataFrame({
+        "Temp_Delta_C": dT,
+        "Precip_Change_pct": dP,
+        "Predicted_Yield": model.predict(X),
+    })
+
+def plot_scenario_grid(scenarios, crop):
+    """
+    Heatmap of predicted yield across the what-if grid.
+    """
+    if scenarios.empty:
+        st.warning("⚠️ No scenarios to plot.")
+        return
+
+    grid = scenarios.pivot(index="Temp_Delta_C", columns="Precip_Change_pct", values="Predicted_Yield")
+    fig, ax = plt.subplots(figsize=(10, 6))
+    sns.heatmap(grid, annot=True, fmt=".0f", cmap="YlGn", ax=ax)
+    ax.set_title(f"🌾 {crop}: Predicted Production under Climate Scenarios")
+    ax.set_xlabel("Precipitation change (%)")
+    ax.set_ylabel("Temperature change (°C)")
+    st.pyplot(fig)
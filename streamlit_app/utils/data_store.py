@@ -0,0 +1,162 @@
+import os
+import json
+import shutil
+import hashlib
+import numpy as np
+import pandas as pd
+from utils.preprocess import file_signature, load_data, clean_data
+from utils.artifacts import ARTIFACTS
+from utils.instrumentation import instrument
+from utils.district_index import sort_by_district
+
+# Immutable dataset versions: STORE_DIR/<name>/<version>/ with one .npy per column
+STORE_DIR = "processed/store"
+
+# Bumped when the on-disk layout changes, so older versions are rebuilt
+STORE_FORMAT = 2
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Versioned, memory-mappable datasets on disk
+# ─────────────────────────────────────────────────────────────
+
+def dataset_version(*paths):
+    """
+    Version id for a dataset derived from its source files' (mtime, size).
+    """
+    digest = hashlib.sha1(f"format:{STORE_FORMAT}".encode())
+    for path in paths:
+        digest.update(f"{path}:{file_signature(path)}".encode())
+    return digest.hexdigest()[:16]
+
+def _version_dir(name, version):
+    return os.path.join(STORE_DIR, name, version)
+
+def has_version(name, version):
+    return os.path.exists(os.path.join(_version_dir(name, version), "meta.json"))
+
+def _column_payload(series):
+    """
+    (kind, array, categories) for one column. Numeric, boolean and naive
+    datetime columns are stored as-is; everything else as category codes.
+    """
+    dtype = series.dtype
+    if isinstance(dtype, np.dtype) and dtype.kind in "biufM":
+        return "array", series.to_numpy(), None
+    cat = series.astype("category")
+    return "category", cat.cat.codes.to_numpy(), [str(c) for c in cat.cat.categories]
+
+def publish_frame(name, version, df, district_index=None):
+    """
+    Writes `df` as an immutable dataset version. The directory is written
+    under a temporary name and renamed into place, so readers never see a
+    partial version; if another process published it first, that copy wins.
+    Older versions of the dataset are removed. An optional district offset
+    table (see utils.district_index) is stored alongside the columns.
+    """
+    final_dir = _version_dir(name, version)
+    if has_version(name, version):
+        return final_dir
+
+    tmp_dir = f"{final_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    columns = []
+    for i, col in enumerate(df.columns):
+        kind, values, categories = _column_payload(df[col])
+        file_name = f"{i:03d}.npy"
+        np.save(os.path.join(tmp_dir, file_name), np.ascontiguousarray(values), allow_pickle=False)
+        columns.append({"name": str(col), "kind": kind, "file": file_name, "categories": categories})
+    with open(os.path.join(tmp_dir, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"name": name, "version": version, "rows": len(df), "columns": columns,
+                   "district_index": district_index}, f)
+
+    try:
+        os.replace(tmp_dir, final_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)  # published concurrently
+    _prune_versions(name, keep=version)
+    return final_dir
+
+def _prune_versions(name, keep):
+    """
+    Deletes superseded versions. Processes that still have them mapped keep
+    reading safely on POSIX; elsewhere a locked version is left for later.
+    """
+    root = os.path.join(STORE_DIR, name)
+    for entry in os.listdir(root):
+        if entry != keep and ".tmp-" not in entry:
+            shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+
+def open_frame(name, version):
+    """
+    Opens a published version with every column memory-mapped read-only.
+    Pages are shared through the OS page cache by all processes that open
+    the same version, so the data is held in memory once per machine.
+    """
+    path = _version_dir(name, version)
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+
+    data = {}
+    for col in meta["columns"]:
+        values = np.load(os.path.join(path, col["file"]), mmap_mode="r")
+        if col["kind"] == "category":
+            data[col["name"]] = pd.Categorical.from_codes(values, categories=col["categories"])
+        else:
+            data[col["name"]] = values
+    # copy=False keeps one block per column, backed by the read-only map itself
+    df = pd.DataFrame(data, copy=False)
+    df.attrs["dataset_version"] = version  # cache key for derived, per-version results
+    if meta.get("district_index"):
+        df.attrs["district_index"] = meta["district_index"]
+    return df
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Process-wide frames, handed out as zero-copy views
+# ─────────────────────────────────────────────────────────────
+
+@instrument(cache="resource", max_entries=8)
+def _shared_frame(name, version):
+    """
+    One DataFrame per dataset version per process, shared by every session.
+    """
+    return open_frame(name, version)
+
+def get_shared_frame(name, version):
+    """
+    Session view of a shared dataset. The shallow copy shares all column
+    data: assigning or adding a column only changes the page's copy, and
+    the columns are read-only, so writing into them fails instead of
+    reaching the shared frame. Pages that modify values copy first.
+    """
+    return _shared_frame(name, version).copy(deep=False)
+
+@instrument()
+def load_climate_dataset(raw_path, gdrive_file_id=None):
+    """
+    The cleaned daily climate table from the shared tier.
+
+    The version follows the raw CSV (or, on deployments without it, the
+    pipeline's cleaned CSV). A new version is built once, from the
+    pipeline artifact when it is up to date or by cleaning the raw file,
+    and published for every session and process to map. Rows are sorted
+    by (district, date) with an offset table for district lookups.
+    """
+    cleaned_path = ARTIFACTS["cleaned_climate"]
+    if not os.path.exists(raw_path) and not os.path.exists(cleaned_path):
+        load_data(raw_path, gdrive_file_id)  # first start: fetch the raw file
+
+    source = raw_path if os.path.exists(raw_path) else cleaned_path
+    version = dataset_version(source)
+    if not has_version("climate", version):
+        artifact_fresh = (os.path.exists(cleaned_path) and
+                          (source == cleaned_path or os.path.getmtime(cleaned_path) >= os.path.getmtime(raw_path)))
+        if artifact_fresh:
+            df = pd.read_csv(cleaned_path, parse_dates=["Date"])
+        else:
+            df = clean_data(load_data(raw_path, gdrive_file_id))
+            os.makedirs(os.path.dirname(cleaned_path), exist_ok=True)
+            df.to_csv(cleaned_path, index=False)
+        df, index = sort_by_district(df)
+        publish_frame("climate", version, df, district_index=index)
+    return get_shared_frame("climate", version)
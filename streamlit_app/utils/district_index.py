@@ -0,0 +1,132 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+DISTRICT_COLUMN = "District"
+ALL_DISTRICTS = "All districts (national)"
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. District-sorted layout with an offset table
+# ─────────────────────────────────────────────────────────────
+
+def sort_by_district(df, column=DISTRICT_COLUMN):
+    """
+    Sorts the daily table by (district, date) and builds its offset table.
+    Returns (sorted_df, index); rows of keys[i] are offsets[i]:offsets[i+1].
+    """
+    if column not in df.columns:
+        return df, None
+
+    districts = df[column].astype(str)
+    keys, codes = np.unique(districts.to_numpy(), return_inverse=True)
+    dates = df["Date"].to_numpy() if "Date" in df.columns else np.zeros(len(df))
+    order = np.lexsort((dates, codes))
+    sorted_df = df.iloc[order].reset_index(drop=True)
+
+    offsets = np.zeros(len(keys) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(keys)), out=offsets[1:])
+    index = {
+        "column": column,
+        "keys": keys.tolist(),
+        "offsets": offsets.tolist(),
+        "rows": len(sorted_df),
+    }
+    return sorted_df, index
+
+def _index_matches(df, index):
+    """
+    Cheap check that `index` still describes `df`: same rows in the
+    published order (an untouched RangeIndex), with district boundaries
+    where the offset table says.
+    """
+    if not index or len(df) != index["rows"] or index["column"] not in df.columns:
+        return False
+    if not (isinstance(df.index, pd.RangeIndex) and df.index.start == 0 and df.index.step == 1):
+        return False
+    column = df[index["column"]]
+    starts = index["offsets"][:-1]
+    return all(str(column.iat[start]) == key for start, key in zip(starts, index["keys"]) if start < len(df))
+
+def district_index(df):
+    """
+    (frame, index) for district lookups. Frames from the shared data tier
+    carry their offset table in `attrs`; any other frame is sorted once.
+    """
+    index = df.attrs.get("district_index")
+    if _index_matches(df, index):
+        return df, index
+    return sort_by_district(df)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. O(slice) access
+# ─────────────────────────────────────────────────────────────
+
+def district_bounds(index, district):
+    """
+    (start, stop) rows of a district, or None if it is not in the index.
+    """
+    pos = int(np.searchsorted(index["keys"], district))
+    if pos == len(index["keys"]) or index["keys"][pos] != district:
+        return None
+    return index["offsets"][pos], index["offsets"][pos + 1]
+
+def district_frame(df, index, district):
+    """
+    Rows of one district in date order, as a view of `df` (no scan, no copy).
+    """
+    bounds = district_bounds(index, district) if index else None
+    if bounds is None:
+        return df.iloc[0:0]
+    return df.iloc[bounds[0]:bounds[1]]
+
+def district_series(df, index, district, column):
+    """
+    Daily series of `column` for one district, indexed by date.
+    """
+    rows = district_frame(df, index, district)
+    return pd.Series(rows[column].to_numpy(), index=rows["Date"].to_numpy(), name=column)
+
+def district_period_matrix(df, column, how="mean", period="year", min_days=1, index=None):
+    """
+    Annual or monthly aggregate ("mean" or "sum") of `column` for every
+    district as one districts × periods matrix, from a single bincount pass
+    over the offset table. Periods with fewer than `min_days` observations
+    are NaN. Returns (districts, periods, matrix); monthly periods are
+    encoded as year * 12 + month - 1.
+
+    Pass `index` together with the frame `district_index` returned to
+    aggregate several columns without sorting again.
+    """
+    if index is None:
+        df, index = district_index(df)
+    if index is None:
+        raise ValueError(f"No {DISTRICT_COLUMN} column to aggregate by.")
+
+    n_districts = len(index["keys"])
+    district = np.repeat(np.arange(n_districts), np.diff(index["offsets"]))
+    years = df["Date"].dt.year.to_numpy()
+    stamp = years if period == "year" else years * 12 + df["Date"].dt.month.to_numpy() - 1
+    periods = np.arange(stamp.min(), stamp.max() + 1)
+    cell = district * len(periods) + (stamp - periods[0])
+
+    values = df[column].to_numpy(dtype=float)
+    ok = np.isfinite(values)
+    size = n_districts * len(periods)
+    totals = np.bincount(cell[ok], weights=values[ok], minlength=size).reshape(n_districts, len(periods))
+    days = np.bincount(cell[ok], minlength=size).reshape(n_districts, len(periods))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        matrix = totals if how == "sum" else totals / days
+    return index["keys"], periods, np.where(days >= min_days, matrix, np.nan)
+
+def district_selector(df, key):
+    """
+    District picker for the Climate pages. Returns (frame, label): the whole
+    table for the national view, otherwise the district's slice.
+    """
+    df, index = district_index(df)
+    if index is None:
+        return df, "Nepal"
+    choice = st.selectbox("District:", [ALL_DISTRICTS] + index["keys"], key=key)
+    if choice == ALL_DISTRICTS:
+        return df, "Nepal"
+    return district_frame(df, index, choice), choice
@@ -4,39 +4,40 @@ import streamlit as st
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
+from utils.trends import variable_insights, annual_series, mann_kendall, sens_slope, SIGNIFICANCE
 
-def plot_temperature_trend(df):
-    """Plot average temperature trend over time."""
+def plot_temperature_trend(df, region="Nepal", trends=None):
+    """Plot average temperature trend over time; insights come from `trends`."""
     st.subheader("Average Temperature Trend")
     fig, ax = plt.subplots(figsize=(10, 5))
+    df = df[['Date', 'Temp_2m']].copy()  # shared frames are read-only
     df['Date'] = pd.to_datetime(df['Date'])# Adjust column name if needed
     df = df.sort_values('Date')
     ax.plot(df['Date'], df['Temp_2m'], color='red')  # Adjust column name if needed
     ax.set_xlabel('Date')
     ax.set_ylabel('Temperature (°C)')
-    ax.set_title('Temperature Trend Over Time')
+    ax.set_title(f'Temperature Trend Over Time ({region})')
     st.pyplot(fig)
     st.caption("Source: Open Data Nepal_Daily climate records")
     
 
 # Key Insights for Temperature Trend
     st.markdown("### 🔍 Key Insights")
-    st.markdown("""
-    - Mean annual temperature shows an overall warming trend from 1980 to 2020.  
-    - The steepest rise occurred after 2000, especially in Himalayan regions.  
-    - Seasonal variability is strongest during pre-monsoon months.
-    """)
-
-def plot_precipitation_distribution(df):
-    """Plot distribution of precipitation."""
+    st.markdown(variable_insights(trends, "Temp_2m", "Mean annual temperature", region))
+
+def plot_precipitation_distribution(df, region="Nepal", trends=None):
+    """Plot distribution of precipitation; insights come from `trends` and the yearly totals."""
     st.subheader("Precipitation Distribution")
 
-    grouped_5yr = df.groupby(df['Date'].dt.year).agg({'Precip': 'sum'}).reset_index()
-    grouped_5yr.rename(columns={'Date': 'Year'}, inplace=True)
+    # Same annual series as the trend test: district totals, averaged over districts nationally
+    grouped_5yr = annual_series(df, 'Precip')
+    if grouped_5yr.empty:
+        st.warning("⚠️ No complete years of precipitation to plot.")
+        return
 
     fig, ax = plt.subplots(figsize=(12, 6))
     ax.bar(grouped_5yr['Year'], grouped_5yr['Precip'], color='skyblue')
-    ax.set_title('Precipitation over Years', fontsize=16)
+    ax.set_title(f'Precipitation over Years ({region})', fontsize=16)
     ax.set_xlabel('Year', fontsize=14)
     ax.set_ylabel('Precipitation (mm)', fontsize=14)
     ax.grid(axis='y')
@@ -45,16 +46,17 @@ def plot_precipitation_distribution(df):
     st.caption("Source: Open Data Nepal_Daily climate records")
 # Key Insights for Precipitation
     st.markdown("### 🔍 Key Insights")
-    st.markdown("""
-    - Total annual precipitation peaked in 2012 and while it was low around 1995.  
-    - Monsoon variability increased after 2005, with more extreme high-rain years.  
-    - Driest years occurred in the early 2000s, coinciding with reported droughts.
-    """)
+    wettest = grouped_5yr.loc[grouped_5yr['Precip'].idxmax()]
+    driest = grouped_5yr.loc[grouped_5yr['Precip'].idxmin()]
+    st.markdown(variable_insights(trends, "Precip", "Annual precipitation", region) + f"""
+- In the totals above, the wettest year is {int(wettest['Year'])} ({wettest['Precip']:,.0f} mm) and the driest {int(driest['Year'])} ({driest['Precip']:,.0f} mm).""")
 
-def plot_extreme_event_trends(df):
+def plot_extreme_event_trends(df, region="Nepal"):
+    """Plot yearly counts of extreme days and test each count series for a trend."""
     import matplotlib.pyplot as plt
     import streamlit as st
 
+    df = df[['Date', 'Temp_2m', 'Precip', 'WindSpeed_10m']].copy()  # shared frames are read-only
     df['Date'] = pd.to_datetime(df['Date'])
     df['Year'] = df['Date'].dt.year
 
@@ -76,7 +78,8 @@ def plot_extreme_event_trends(df):
     ax.plot(yearly['Year'], yearly['Extreme_Rainfall'], label='Extreme Rainfall Days', color='blue')
     ax.plot(yearly['Year'], yearly['Extreme_Storm'], label='Storm Days', color='green')
 
-    ax.set_title("Nationwide Extreme Weather Events per Year")
+    ax.set_title("Nationwide Extreme Weather Events per Year" if region == "Nepal"
+                 else f"Extreme Weather Events per Year ({region})")
     ax.set_xlabel("Year")
     ax.set_ylabel("Number of Days")
     ax.legend()
@@ -86,10 +89,23 @@ def plot_extreme_event_trends(df):
     st.caption("Source: Open Data Nepal_Daily climate records")
     # Key Insights for Extreme Events
     st.markdown("### 🔍 Key Insights")
-    st.markdown("""
-    - Number of heatwave days (Temp > 40 °C) has doubled since 2000.  
-    - Extreme rainfall days (> 100 mm) surged after 2010.  
-    - Recorded storm-speed days (> 50 km/h) remain relatively low but show a slight upward trend.
-    """)
+    events = {
+        'Extreme_Heatwave': "Heatwave days (Temp > 40 °C)",
+        'Extreme_Rainfall': "Extreme rainfall days (> 100 mm)",
+        'Extreme_Storm': "Storm-speed days (> 50 km/h)",
+    }
+    counts = yearly[list(events)].to_numpy(dtype=float).T
+    _, _, p_values, _ = mann_kendall(counts)
+    slopes = sens_slope(counts, yearly['Year'].to_numpy()) * 10
+    lines = []
+    for label, total, p, slope in zip(events.values(), counts.sum(axis=1), p_values, slopes):
+        if total == 0:
+            lines.append(f"- {label}: none recorded.")
+        elif p < SIGNIFICANCE:
+            lines.append(f"- {label}: {int(total):,} in total, changing by {slope:+.1f} days per decade "
+                         f"(significant, Mann–Kendall p = {p:.3f}).")
+        else:
+            lines.append(f"- {label}: {int(total):,} in total, with no significant trend (p = {p:.2f}).")
+    st.markdown("\n".join(lines))
 
 
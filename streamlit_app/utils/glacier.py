@@ -1,12 +1,89 @@
+import os
 import geopandas as gpd
 import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
+from utils.preprocess import file_signature
+from utils.instrumentation import instrument
+
+GLACIER_YEARS = [1980, 1990, 2000, 2010]
+
+# Simplification levels (metres, in UTM 45N) offered on the map view
+SIMPLIFY_TOLERANCES_M = [10, 50, 250]
+
+def _find_column(columns, keyword):
+    """
+    Returns the first column whose name contains `keyword` (case-insensitive).
+    """
+    matches = [col for col in columns if keyword in col.lower()]
+    return matches[0] if matches else None
+
+def shapefile_signature(shp_path):
+    """
+    (mtime_ns, size) of the .shp and its .dbf attribute table, so edits to
+    either the outlines or the attributes change the signature.
+    """
+    dbf_path = os.path.splitext(shp_path)[0] + ".dbf"
+    return file_signature(shp_path), file_signature(dbf_path) if os.path.exists(dbf_path) else None
+
+@instrument(cache="data")
+def _polygon_areas(shp_path, signature):
+    gdf = gpd.read_file(shp_path, columns=["ID", "Year"])
+    areas = gdf.to_crs(epsg=32645).geometry.area / 1e6  # Project to UTM for area calculation
+    return pd.DataFrame({"ID": gdf["ID"].to_numpy(), "Year": gdf["Year"].to_numpy(), "Area_km2": areas.to_numpy()})
+
+def load_glacier_areas(shp_path):
+    """
+    Year and projected polygon area (km², UTM 45N) of every outline, without
+    the geometry. Computed once per shapefile version.
+    """
+    try:
+        return _polygon_areas(shp_path, shapefile_signature(shp_path))
+    except Exception as e:
+        st.error(f"❌ Failed to read glacier outlines: {e}")
+        return pd.DataFrame(columns=["ID", "Year", "Area_km2"])
+
+@st.cache_data
+def preview_glacier_attributes(shp_path, n_rows=5):
+    """
+    Reads the first few attribute rows (no geometry) for a quick preview.
+    """
+    try:
+        return gpd.read_file(shp_path, rows=n_rows, ignore_geometry=True)
+    except Exception as e:
+        st.error(f"❌ Failed to preview glacier shapefile: {e}")
+        return pd.DataFrame()
+
+@instrument(cache="resource")
+def load_simplified_glacier_geometries(shp_path, tolerances=tuple(SIMPLIFY_TOLERANCES_M)):
+    """
+    Loads glacier outlines once and precomputes topology-preserving
+    simplified geometries for every tolerance level.
+    Returns a dict {tolerance_m: GeoDataFrame in EPSG:4326}.
+    """
+    try:
+        gdf = gpd.read_file(shp_path, columns=["ID", "Year"])
+    except Exception as e:
+        st.error(f"❌ Failed to load glacier geometries: {e}")
+        return {}
+
+    if gdf.empty:
+        return {}
+
+    # Simplify in metres, then go back to lon/lat for display
+    gdf_utm = gdf.to_crs(epsg=32645)
+    levels = {}
+    for tol in tolerances:
+        simplified = gdf_utm.copy()
+        simplified["geometry"] = gdf_utm.geometry.simplify(tol, preserve_topology=True)
+        levels[tol] = simplified.to_crs(epsg=4326)
+    return levels
 
 def load_glacier_shapefile(shp_path):
     """
-    Loads the glacier shapefile and checks for geometry and year columns.
-    Displays basic info to help debug structure mismatches.
+    Loads the full glacier shapefile (all vertices) and checks for geometry
+    and year columns. Prefer `load_glacier_areas` for aggregates and
+    `load_simplified_glacier_geometries` for maps.
     """
     try:
         gdf = gpd.read_file(shp_path)
@@ -17,19 +94,8 @@ def load_glacier_shapefile(shp_path):
         if gdf.geometry.is_empty.all():
             st.warning("⚠️ All geometries are empty.")
 
-        # Show available columns to help with debugging
-        st.markdown("### 🔍 Glacier Shapefile Columns")
-        st.write(gdf.columns)
-
-        # Preview first few rows
-        st.markdown("### 🗂️ Sample Data")
-        st.write(gdf.head())
-
         # Try to detect the year column
-        possible_year_cols = [col for col in gdf.columns if "year" in col.lower()]
-        if possible_year_cols:
-            st.success(f"✅ Detected year column: `{possible_year_cols[0]}`")
-        else:
+        if _find_column(gdf.columns, "year") is None:
             st.warning("⚠️ No column related to year was detected.")
 
         return gdf
@@ -38,38 +104,39 @@ def load_glacier_shapefile(shp_path):
         st.error(f"❌ Failed to load glacier shapefile: {e}")
         return gpd.GeoDataFrame()
 
+@instrument()
 def extract_glacier_area_by_year(gdf):
     """
-    Calculates total glacier area (in km²) for each target year.
-    Works on GeoDataFrames with one geometry column and a year attribute column.
+    Calculates total glacier area (in km²) for each target year from the
+    polygon areas projected to UTM: either a GeoDataFrame of outlines or the
+    precomputed `Area_km2` of `load_glacier_areas`.
     """
     if gdf.empty:
         return pd.DataFrame(columns=["Year", "Total_Area_km2"])
 
     # Try to find a column with year info
-    possible_year_cols = [col for col in gdf.columns if "year" in col.lower()]
-    if not possible_year_cols:
+    year_col = _find_column(gdf.columns, "year")
+    if year_col is None:
         st.error("❌ No column containing year information found.")
         return pd.DataFrame(columns=["Year", "Total_Area_km2"])
 
-    year_col = possible_year_cols[0]
-
-    target_years = [1980, 1990, 2000, 2010]
-    area_data = []
+    df = gdf[gdf[year_col].isin(GLACIER_YEARS)]
+    if isinstance(df, gpd.GeoDataFrame) and "geometry" in df.columns:
+        areas = df.to_crs(epsg=32645).geometry.area / 1e6  # Project to UTM for area calculation
+    elif "Area_km2" in df.columns:
+        areas = df["Area_km2"]
+    else:
+        st.error("❌ No glacier geometry or projected area to aggregate.")
+        return pd.DataFrame(columns=["Year", "Total_Area_km2"])
 
-    for year in target_years:
-        subset = gdf[gdf[year_col] == year]
-        if subset.empty:
+    totals = areas.groupby(df[year_col]).sum()
+    for year in GLACIER_YEARS:
+        if year not in totals.index:
             st.warning(f"⚠️ Year {year} not found in the data.")
-            continue
-
-        subset = subset.to_crs(epsg=32645)  # Project to UTM for area calculation
-        subset["area_km2"] = subset.geometry.area / 1e6
-        total_area = subset["area_km2"].sum()
-
-        area_data.append({"Year": year, "Total_Area_km2": total_area})
 
-    return pd.DataFrame(area_data)
+    area_df = totals.rename_axis("Year").reset_index(name="Total_Area_km2")
+    area_df["Year"] = area_df["Year"].astype(int)
+    return area_df
 
 def plot_glacier_retreat(area_df):
     """
@@ -99,3 +166,23 @@ def plot_glacier_retreat(area_df):
       to **{int(area_df['Total_Area_km2'].min())} km²** in 2010.
     - This reflects significant glacial retreat over the 3 decades.
     """)
+
+def plot_glacier_map(gdf_simplified, year=None):
+    """
+    Draws glacier outlines from a pre-simplified GeoDataFrame.
+    Optionally restricts the map to a single inventory year.
+    """
+    if gdf_simplified is None or gdf_simplified.empty:
+        st.warning("⚠️ No glacier geometries to draw.")
+        return
+
+    year_col = _find_column(gdf_simplified.columns, "year")
+    if year is not None and year_col is not None:
+        gdf_simplified = gdf_simplified[gdf_simplified[year_col] == year]
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    gdf_simplified.plot(ax=ax, color="lightblue", edgecolor="steelblue", linewidth=0.3)
+    ax.set_title(f"🧊 Glacier Outlines{f' ({year})' if year is not None else ''}")
+    ax.set_xlabel("Longitude")
+    ax.set_ylabel("Latitude")
+    st.pyplot(fig)
@@ -0,0 +1,244 @@
+import os
+import hashlib
+import geopandas as gpd
+import numpy as np
+import pandas as pd
+import shapely
+import matplotlib.pyplot as plt
+import streamlit as st
+
+from utils.glacier import _find_column, shapefile_signature
+
+GLACIER_CHANGE_STORE = "processed/glacier_change_by_polygon.csv"
+
+CHANGE_COLUMNS = [
+    "Year_From", "Year_To", "Glacier_ID", "Matched_Outlines",
+    "Area_From_km2", "Area_To_km2", "Change_km2", "Rate_km2_per_yr", "Rate_pct_per_yr",
+    "Id_Col", "Source_Signature", "Epoch_Signature",
+]
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Load one pair of inventory years
+# ─────────────────────────────────────────────────────────────
+
+def list_inventory_years(shp_path):
+    """
+    Returns the sorted inventory years present in the shapefile.
+    Reads only the year attribute.
+    """
+    years = gpd.read_file(shp_path, columns=["Year"], ignore_geometry=True)
+    year_col = _find_column(years.columns, "year")
+    if year_col is None:
+        return []
+    return sorted(int(y) for y in years[year_col].dropna().unique())
+
+def load_epoch_outlines(shp_path, year):
+    """
+    Loads the outlines of a single inventory year, projected to UTM 45N,
+    with a `Glacier_ID` column and the polygon area in km².
+    """
+    gdf = gpd.read_file(shp_path, columns=["ID", "GLIMS_ID", "Year"], where=f"Year = {int(year)}")
+    gdf = gdf.to_crs(epsg=32645)
+    gdf["Glacier_ID"] = gdf["ID"] if "ID" in gdf.columns else gdf.index
+    gdf["Area_km2"] = gdf.geometry.area / 1e6
+    return gdf.reset_index(drop=True)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Match outlines across two epochs
+# ─────────────────────────────────────────────────────────────
+
+def match_glacier_outlines(gdf_from, gdf_to, id_col=None):
+    """
+    Matches each outline of the later epoch to an outline of the earlier one.
+
+    If `id_col` is given (e.g. 'GLIMS_ID') outlines are joined on that ID.
+    Otherwise candidate pairs come from a spatial-index join and each later
+    outline is assigned to the earlier outline it overlaps the most.
+
+    Returns a DataFrame with columns ['Index_From', 'Index_To'].
+    """
+    if id_col is not None:
+        left = gdf_from[[id_col]].reset_index().rename(columns={"index": "Index_From"})
+        right = gdf_to[[id_col]].reset_index().rename(columns={"index": "Index_To"})
+        left = left[left[id_col].notna() & (left[id_col] != "")]
+        return left.merge(right, on=id_col, how="inner")[["Index_From", "Index_To"]]
+
+    # Candidate pairs from the STRtree index (no O(n²) all-pairs test)
+    idx_to, idx_from = gdf_from.sindex.query(gdf_to.geometry, predicate="intersects")
+    if len(idx_to) == 0:
+        return pd.DataFrame(columns=["Index_From", "Index_To"], dtype=int)
+
+    overlap = shapely.area(shapely.intersection(
+        gdf_to.geometry.values[idx_to], gdf_from.geometry.values[idx_from]
+    ))
+    pairs = pd.DataFrame({"Index_From": idx_from, "Index_To": idx_to, "Overlap": overlap})
+    pairs = pairs[pairs["Overlap"] > 0]
+
+    # Keep the best-overlapping earlier outline for every later outline
+    best = pairs.loc[pairs.groupby("Index_To")["Overlap"].idxmax()]
+    return best[["Index_From", "Index_To"]].reset_index(drop=True)
+
+def compute_epoch_change(gdf_from, gdf_to, year_from, year_to, id_col=None):
+    """
+    Computes per-glacier area change between two epochs.
+    Outlines that split are summed; outlines with no successor count as lost.
+    """
+    matches = match_glacier_outlines(gdf_from, gdf_to, id_col=id_col)
+
+    area_to = gdf_to["Area_km2"].to_numpy()[matches["Index_To"].to_numpy(dtype=int)]
+    from_idx = matches["Index_From"].to_numpy(dtype=int)
+    n_from = len(gdf_from)
+
+    successor_area = np.bincount(from_idx, weights=area_to, minlength=n_from)
+    successor_count = np.bincount(from_idx, minlength=n_from)
+
+    years = year_to - year_from
+    area_from = gdf_from["Area_km2"].to_numpy()
+    change = successor_area - area_from
+
+    return pd.DataFrame({
+        "Year_From": year_from,
+        "Year_To": year_to,
+        "Glacier_ID": gdf_from["Glacier_ID"].to_numpy(),
+        "Matched_Outlines": successor_count,
+        "Area_From_km2": area_from,
+        "Area_To_km2": successor_area,
+        "Change_km2": change,
+        "Rate_km2_per_yr": change / years,
+        "Rate_pct_per_yr": np.divide(change * 100, area_from * years, out=np.full(n_from, np.nan),
+                                     where=area_from > 0),
+    })
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Incremental store of per-glacier change
+# ─────────────────────────────────────────────────────────────
+
+def outline_fingerprint(gdf):
+    """
+    Content hash of one epoch's outlines (attributes and geometry).
+    """
+    h = hashlib.sha1()
+    h.update(pd.util.hash_pandas_object(gdf.drop(columns=gdf.geometry.name), index=False).to_numpy().tobytes())
+    for wkb in shapely.to_wkb(gdf.geometry.values):
+        h.update(wkb or b"")
+    return h.hexdigest()
+
+def source_signature(shp_path):
+    """
+    File signature of the .shp and .dbf as one string, cheap to compare
+    before any outline is read.
+    """
+    return ":".join("-".join(map(str, sig)) if sig else "" for sig in shapefile_signature(shp_path))
+
+def epoch_signature(fingerprint_from, fingerprint_to, id_col=None):
+    """
+    Identifies the inputs of one epoch's result: both outline sets and the
+    matching method.
+    """
+    key = f"{fingerprint_from}:{fingerprint_to}:{id_col or ''}"
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+def _read_store(store_path):
+    if not os.path.exists(store_path):
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+    store = pd.read_csv(store_path, dtype={"Id_Col": str, "Source_Signature": str, "Epoch_Signature": str})
+    if not set(CHANGE_COLUMNS) <= set(store.columns):  # written by an older version
+        return pd.DataFrame(columns=CHANGE_COLUMNS)
+    return store.assign(Id_Col=store["Id_Col"].fillna(""))
+
+def _write_store(store, store_path):
+    """
+    Replaces the store in one step, so a concurrent reader or writer never
+    sees a half-written file and rows are never appended twice.
+    """
+    dir_name = os.path.dirname(store_path)
+    if dir_name:
+        os.makedirs(dir_name, exist_ok=True)
+    tmp_path = f"{store_path}.{os.getpid()}.tmp"
+    store.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, store_path)
+
+def update_glacier_change_store(shp_path, store_path=GLACIER_CHANGE_STORE, id_col=None, report=None):
+    """
+    Brings the per-glacier change store up to date.
+    Every stored epoch carries the shapefile's file signature and a content
+    signature of its two outline sets and `id_col`. While the files are
+    unchanged the stored rows are reused without reading any outline;
+    otherwise the outlines are loaded and hashed, and only epochs whose
+    content signature differs are recomputed. `report`, if given, is called
+    after each epoch with (fraction, message, rows so far).
+    """
+    store = _read_store(store_path)
+    source = source_signature(shp_path)
+    id_key = id_col or ""
+    if not store.empty and (store["Source_Signature"] == source).all() and (store["Id_Col"] == id_key).all():
+        if report is not None:
+            report(1.0, "up to date", store)
+        return store
+
+    epoch_keys = zip(store["Year_From"].astype(int), store["Year_To"].astype(int))
+    stored = dict(zip(epoch_keys, store["Epoch_Signature"]))
+    years = list_inventory_years(shp_path)
+    epochs = list(zip(years[:-1], years[1:]))
+
+    parts, outlines, fingerprints = [], {}, {}
+    for i, (year_from, year_to) in enumerate(epochs):
+        if report is not None:
+            report(i / len(epochs), f"checking {year_from} → {year_to}")
+        for year in (year_from, year_to):
+            if year not in outlines:
+                outlines[year] = load_epoch_outlines(shp_path, year)
+                fingerprints[year] = outline_fingerprint(outlines[year])
+        signature = epoch_signature(fingerprints[year_from], fingerprints[year_to], id_col)
+
+        if stored.get((year_from, year_to)) == signature:
+            part = store[(store["Year_From"] == year_from) & (store["Year_To"] == year_to)]
+        else:
+            part = compute_epoch_change(outlines[year_from], outlines[year_to], year_from, year_to, id_col=id_col)
+            part = part.assign(Id_Col=id_key, Epoch_Signature=signature)
+        parts.append(part.assign(Source_Signature=source)[CHANGE_COLUMNS])
+        outlines.pop(year_from)  # each year is only needed for its two epochs
+        if report is not None:
+            report((i + 1) / len(epochs), f"{year_from} → {year_to} done", pd.concat(parts, ignore_index=True))
+
+    result = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=CHANGE_COLUMNS)
+    # Rewritten with the new file signature; epochs no longer in the inventory drop out
+    _write_store(result, store_path)
+    return result
+
+def summarize_glacier_change(change_df):
+    """
+    Per-epoch summary of the per-glacier retreat rates.
+    """
+    if change_df.empty:
+        return pd.DataFrame()
+
+    return change_df.groupby(["Year_From", "Year_To"]).agg(
+        Glaciers=("Glacier_ID", "size"),
+        Lost=("Matched_Outlines", lambda s: int((s == 0).sum())),
+        Total_Change_km2=("Change_km2", "sum"),
+        Median_Rate_pct_per_yr=("Rate_pct_per_yr", "median"),
+    ).reset_index()
+
+def plot_glacier_change_distribution(change_df):
+    """
+    Box plot of per-glacier relative retreat rates for each epoch.
+    """
+    if change_df.empty:
+        st.warning("⚠️ No per-glacier change data to plot.")
+        return
+
+    epochs = change_df.groupby(["Year_From", "Year_To"])["Rate_pct_per_yr"]
+    labels = [f"{a}–{b}" for a, b in epochs.groups.keys()]
+    data = [grp.dropna().to_numpy() for _, grp in epochs]
+
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.boxplot(data, showfliers=False)
+    ax.set_xticks(range(1, len(labels) + 1))
+    ax.set_xticklabels(labels)
+    ax.axhline(0, color="grey", linewidth=0.8)
+    ax.set_title("🧊 Per-Glacier Area Change Rate by Epoch")
+    ax.set_xlabel("Epoch")
+    ax.set_ylabel("Area change (% per year)")
+    ax.grid(True, axis="y")
+    st.pyplot(fig)
@@ -1,15 +1,20 @@
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import streamlit as st
+from utils.instrumentation import instrument
 
 def summarize_extremes(df_climate):
     """
     Returns annual max temperature and precipitation for key glacier years.
     """
     try:
-        df = df_climate.copy()
-        df['Year'] = df['Date'].dt.year
+        # Only the glacier years are kept, so filter before aggregating
+        glacier_years = [1980, 1990, 2000, 2010]
+        years = df_climate['Date'].dt.year
+        df = df_climate.loc[years.isin(glacier_years), ['MaxTemp_2m', 'Precip']].copy()
+        df['Year'] = years[df.index]
 
         # Use 'Precip' instead of 'Precipitation'
         summary = df.groupby('Year').agg({
@@ -22,16 +27,125 @@ def summarize_extremes(df_climate):
             'Precip': 'Max_Precip'
         }, inplace=True)
 
-        # Keep only glacier years
-        glacier_years = [1980, 1990, 2000, 2010]
-        summary = summary[summary['Year'].isin(glacier_years)]
-
         return summary
 
     except Exception as e:
         st.error(f"❌ Error summarizing extreme weather data: {e}")
         return None
 
+def summarize_yearly_climate(df_climate):
+    """
+    Yearly rollup of the full daily series used by the window/lag analysis.
+    """
+    years = df_climate['Date'].dt.year
+    yearly = df_climate.groupby(years).agg(
+        Mean_MaxTemp=('MaxTemp_2m', 'mean'),
+        Max_Temp=('MaxTemp_2m', 'max'),
+        Total_Precip=('Precip', 'sum'),
+        Max_Precip=('Precip', 'max')
+    )
+    yearly.index.name = 'Year'
+
+    # Reindex to a continuous range so rolling windows count calendar years
+    full_range = np.arange(yearly.index.min(), yearly.index.max() + 1)
+    return yearly.reindex(full_range).rename_axis('Year')
+
+def compute_window_features(yearly, window=10, lag=0, min_periods=None):
+    """
+    Rolling mean of every yearly variable over the `window` years ending
+    `lag` years before each year (e.g. window=10, lag=0 → mean of the
+    preceding decade including the year itself).
+    """
+    if min_periods is None:
+        min_periods = max(1, window // 2)
+    features = yearly.rolling(window, min_periods=min_periods).mean().shift(lag)
+    features.columns = [f"{col}_w{window}_l{lag}" for col in yearly.columns]
+    return features.reset_index()
+
+def bootstrap_correlations(x, y, n_boot=2000, ci=95, seed=0):
+    """
+    Pearson r of every column of `x` (n × k) with `y` (n,) plus percentile
+    bootstrap confidence intervals. All resamples are evaluated in one
+    batched NumPy computation.
+
+    Returns (r, ci_low, ci_high), each an array of length k.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+
+    def _pearson(xs, ys):
+        xs = xs - xs.mean(axis=-2, keepdims=True)
+        ys = ys - ys.mean(axis=-1, keepdims=True)
+        num = np.einsum('...nk,...n->...k', xs, ys)
+        den = np.sqrt((xs ** 2).sum(axis=-2) * (ys ** 2).sum(axis=-1)[..., None])
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return num / den
+
+    r = _pearson(x, y)
+
+    rng = np.random.default_rng(seed)
+    idx = rng.integers(0, n, size=(n_boot, n))
+    r_boot = _pearson(x[idx], y[idx])  # (n_boot, k)
+
+    alpha = (100 - ci) / 2
+    with np.errstate(invalid='ignore'):
+        low, high = np.nanpercentile(r_boot, [alpha, 100 - alpha], axis=0)
+    return r, low, high
+
+@instrument()
+def correlate_window_features(glacier_df, df_climate, window=10, lag=0, n_boot=2000):
+    """
+    Correlates glacier area with window/lag climate aggregates.
+    Returns (merged_df, corr_df) where corr_df holds r and a bootstrap CI
+    for each climate feature.
+    """
+    try:
+        yearly = summarize_yearly_climate(df_climate)
+        features = compute_window_features(yearly, window=window, lag=lag)
+        merged = pd.merge(glacier_df, features, on='Year', how='inner').dropna()
+
+        feature_cols = [c for c in features.columns if c != 'Year']
+        if len(merged) < 3:
+            st.warning("⚠️ Not enough overlapping years for a correlation.")
+            return merged, pd.DataFrame()
+
+        r, low, high = bootstrap_correlations(
+            merged[feature_cols].to_numpy(), merged['Total_Area_km2'].to_numpy(), n_boot=n_boot
+        )
+        corr_df = pd.DataFrame({
+            'Feature': feature_cols,
+            'Pearson_r': r,
+            'CI_Low': low,
+            'CI_High': high,
+            'N': len(merged)
+        })
+        return merged, corr_df
+
+    except Exception as e:
+        st.error(f"❌ Error computing window/lag correlations: {e}")
+        return None, pd.DataFrame()
+
+def plot_window_correlations(corr_df):
+    """
+    Bar chart of correlation per climate feature with bootstrap CI whiskers.
+    """
+    if corr_df is None or corr_df.empty:
+        st.error("❌ No correlations to plot.")
+        return
+
+    fig, ax = plt.subplots(figsize=(10, 5))
+    err = np.vstack([corr_df['Pearson_r'] - corr_df['CI_Low'], corr_df['CI_High'] - corr_df['Pearson_r']])
+    ax.bar(corr_df['Feature'], corr_df['Pearson_r'], yerr=np.abs(err), color='teal', capsize=4)
+    ax.axhline(0, color='grey', linewidth=0.8)
+    ax.set_ylim(-1.05, 1.05)
+    ax.set_title("Windowed Climate vs Glacier Area (Pearson r, bootstrap CI)")
+    ax.set_ylabel("Pearson r")
+    ax.tick_params(axis='x', rotation=30)
+    ax.grid(True, axis='y')
+    st.pyplot(fig)
+    st.caption(f"Based on {int(corr_df['N'].iloc[0])} inventory years; intervals are wide for so few points.")
+
 def merge_glacier_weather(glacier_df, climate_summary):
     """
     Merge glacier area and extreme weather by year.
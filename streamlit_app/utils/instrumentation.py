@@ -0,0 +1,324 @@
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import logging
+import functools
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+import streamlit as st
+
+try:
+    import resource
+except ImportError:  # Windows: no peak RSS
+    resource = None
+
+# Share of script runs that are instrumented (0 disables, 1 records every run).
+# Unsampled runs only pay for a thread-local lookup per stage.
+SAMPLE_RATE = float(os.environ.get("INSTRUMENT_SAMPLE_RATE", "0.01"))
+
+# Structured log: one JSON object per stage per sampled run
+LOG_PATH = os.environ.get("INSTRUMENT_LOG", "logs/instrumentation.jsonl")
+
+# Sampled runs kept in the session for the debug panel
+HISTORY_RUNS = 50
+
+_state = threading.local()  # Streamlit runs each session's script in its own thread
+_logger = None
+
+# tracemalloc is process-wide while runs are per session: runs that trace
+# share it by reference count, and their peaks only count while no other
+# tracing run overlaps (the peak would include the other session's memory)
+_trace_lock = threading.Lock()
+_trace_runs = {}  # run_id → run, for every run currently tracing
+_trace_owner = {"started": False}
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Runs and sampling
+# ─────────────────────────────────────────────────────────────
+
+def _acquire_tracing(run):
+    with _trace_lock:
+        for other in _trace_runs.values():
+            other["trace_overlaps"] += 1
+        _trace_runs[run["run_id"]] = run
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _trace_owner["started"] = True
+
+def _release_tracing(run):
+    with _trace_lock:
+        if _trace_runs.pop(run["run_id"], None) is None:
+            return
+        if not _trace_runs and _trace_owner["started"]:
+            tracemalloc.stop()  # only if we started it, not e.g. PYTHONTRACEMALLOC
+            _trace_owner["started"] = False
+
+def _trace_snapshot(run):
+    """
+    (tracing alone right now, number of runs that started tracing since ours did).
+    """
+    with _trace_lock:
+        return len(_trace_runs) == 1, run["trace_overlaps"]
+
+def begin_run(page=None, force=False, trace_memory=False):
+    """
+    Starts instrumentation for one script run. The run is recorded when
+    `force` is set or it falls within SAMPLE_RATE; allocation tracing
+    (tracemalloc, noticeably slower) only when `trace_memory` is set too.
+    Returns True if the run is sampled.
+    """
+    previous = getattr(_state, "run", None)
+    if previous is not None:  # the last run on this thread stopped before end_run
+        _release_tracing(previous)
+    sampled = force or (SAMPLE_RATE > 0 and random.random() < SAMPLE_RATE)
+    run = {
+        "run_id": uuid.uuid4().hex[:12],
+        "page": page,
+        "sampled": sampled,
+        "trace_memory": sampled and trace_memory,
+        "trace_overlaps": 0,
+        "records": [],
+        "stack": [],
+    }
+    if run["trace_memory"]:
+        _acquire_tracing(run)
+    _state.run = run
+    return sampled
+
+def set_run_page(page):
+    """
+    Labels the current run with the page being rendered.
+    """
+    run = getattr(_state, "run", None)
+    if run is not None:
+        run["page"] = page
+
+def _current_run():
+    run = getattr(_state, "run", None)
+    return run if run is not None and run["sampled"] else None
+
+def end_run():
+    """
+    Finishes the current run: writes its records to the structured log and
+    the session history. Returns the records ([] for unsampled runs).
+    """
+    run = getattr(_state, "run", None)
+    _state.run = None
+    if run is None or not run["sampled"]:
+        return []
+    _release_tracing(run)
+
+    records = run["records"]
+    for record in records:
+        record["page"] = run["page"]
+    _write_log(records)
+
+    history = st.session_state.setdefault("instrument_history", [])
+    history.extend(records)
+    run_ids = list(dict.fromkeys(r["run_id"] for r in history))
+    if len(run_ids) > HISTORY_RUNS:
+        keep = set(run_ids[-HISTORY_RUNS:])
+        st.session_state["instrument_history"] = [r for r in history if r["run_id"] in keep]
+    return records
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Stages
+# ─────────────────────────────────────────────────────────────
+
+def _max_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 2**20 if sys.platform == "darwin" else rss / 1024  # bytes on macOS, KiB elsewhere
+
+def _update_alloc_peaks(run):
+    """
+    Folds the tracemalloc peak since the last reset into every open stage,
+    so nested stages do not hide each other's peaks.
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    for frame in run["stack"]:
+        frame["alloc_peak"] = max(frame["alloc_peak"], peak)
+    tracemalloc.reset_peak()
+    return current
+
+@contextmanager
+def stage(name, cached=False):
+    """
+    Records wall time, CPU time, peak RSS growth, peak traced allocations
+    (when enabled, and only if no other session traced during the stage)
+    and, for cached functions, hit/miss of the enclosed block.
+    Does nothing unless the current run is sampled.
+    """
+    run = _current_run()
+    if run is None:
+        yield None
+        return
+
+    frame = {"cache": None, "cached": cached, "alloc_peak": 0, "alloc_start": 0}
+    if run["trace_memory"]:
+        frame["alloc_start"] = _update_alloc_peaks(run)
+        trace_start = _trace_snapshot(run)
+    depth = len(run["stack"])
+    run["stack"].append(frame)
+    rss_start = _max_rss_mb()
+    wall_start, cpu_start = time.perf_counter(), time.thread_time()
+    error = None
+    try:
+        yield frame
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        wall = time.perf_counter() - wall_start
+        cpu = time.thread_time() - cpu_start
+        alloc_peak = None
+        if run["trace_memory"]:
+            _update_alloc_peaks(run)
+            alone, overlaps = trace_start
+            # Another session tracing at the same time would be in the peak
+            if alone and overlaps == run["trace_overlaps"]:
+                alloc_peak = round((frame["alloc_peak"] - frame["alloc_start"]) / 2**20, 3)
+        run["stack"].pop()
+        rss_end = _max_rss_mb()
+        run["records"].append({
+            "run_id": run["run_id"],
+            "ts": round(time.time(), 3),
+            "stage": name,
+            "depth": depth,
+            "wall_ms": round(wall * 1000, 3),
+            "cpu_ms": round(cpu * 1000, 3),
+            "rss_peak_mb": None if rss_end is None else round(rss_end, 1),
+            "rss_growth_mb": None if rss_end is None else round(rss_end - rss_start, 1),
+            "alloc_peak_mb": alloc_peak,
+            "cache": (frame["cache"] or "hit") if cached and error is None else None,
+            "error": error,
+        })
+
+def _mark_cache_miss():
+    """
+    Called from inside a cached function's body, which only runs on a miss.
+    """
+    run = _current_run()
+    if run is None:
+        return
+    for frame in reversed(run["stack"]):
+        if frame["cached"]:
+            frame["cache"] = "miss"
+            return
+
+def instrument(name=None, cache=None, **cache_kwargs):
+    """
+    Decorator that records every call of the function as a stage.
+
+    With cache='data' or cache='resource' it also applies st.cache_data /
+    st.cache_resource (with `cache_kwargs`) underneath, so each call is
+    logged as a cache hit or miss. `.clear()` and `__wrapped__` (the
+    uncached function) behave as on the plain Streamlit decorators.
+    """
+    def decorator(func):
+        stage_name = name or f"{func.__module__.rsplit('.', 1)[-1]}.{func.__name__}"
+
+        if cache is None:
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with stage(stage_name):
+                    return func(*args, **kwargs)
+            return wrapper
+
+        @functools.wraps(func)
+        def compute(*args, **kwargs):
+            _mark_cache_miss()
+            return func(*args, **kwargs)
+
+        cache_decorator = {"data": st.cache_data, "resource": st.cache_resource}[cache]
+        cached = cache_decorator(**cache_kwargs)(compute)
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(stage_name, cached=True):
+                return cached(*args, **kwargs)
+
+        wrapper.clear = cached.clear
+        return wrapper
+    return decorator
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Structured log and debug panel
+# ─────────────────────────────────────────────────────────────
+
+def _get_logger():
+    global _logger
+    if _logger is None:
+        logger = logging.getLogger("climate_dashboard.instrumentation")
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        if LOG_PATH:
+            dir_name = os.path.dirname(LOG_PATH)
+            if dir_name:
+                os.makedirs(dir_name, exist_ok=True)
+            handler = RotatingFileHandler(LOG_PATH, maxBytes=5 * 2**20, backupCount=3, encoding="utf-8")
+            handler.setFormatter(logging.Formatter("%(message)s"))
+            logger.addHandler(handler)
+        _logger = logger
+    return _logger
+
+def _write_log(records):
+    try:
+        logger = _get_logger()
+        for record in records:
+            logger.info(json.dumps(record))
+    except OSError:
+        pass  # read-only deployments: keep the in-session history only
+
+def summarize_stages(records):
+    """
+    Per-stage call count, cache hits/misses and wall-time statistics.
+    """
+    import pandas as pd
+
+    df = pd.DataFrame(records)
+    if df.empty:
+        return df
+    return df.groupby("stage").agg(
+        Calls=("wall_ms", "size"),
+        Hits=("cache", lambda s: int((s == "hit").sum())),
+        Misses=("cache", lambda s: int((s == "miss").sum())),
+        Mean_ms=("wall_ms", "mean"),
+        P95_ms=("wall_ms", lambda s: s.quantile(0.95)),
+        Max_ms=("wall_ms", "max"),
+        Mean_CPU_ms=("cpu_ms", "mean"),
+    ).round(2).sort_values("Mean_ms", ascending=False).reset_index()
+
+def debug_requested():
+    """
+    (force, trace_memory) as chosen in the debug panel on the previous run.
+    """
+    return (bool(st.session_state.get("instrument_debug", False)),
+            bool(st.session_state.get("instrument_trace_memory", False)))
+
+def show_debug_panel(records):
+    """
+    Optional sidebar panel: turn on profiling for this session and inspect
+    the stages of the last run plus a summary of the session so far.
+    """
+    with st.sidebar.expander("🐞 Performance debug"):
+        st.checkbox("Profile every run in this session", key="instrument_debug")
+        st.checkbox("Trace allocations (slower)", key="instrument_trace_memory")
+        st.caption(f"Sampling {SAMPLE_RATE:.0%} of runs otherwise; log: `{LOG_PATH}`")
+        if records:
+            import pandas as pd
+
+            st.markdown("**This run**")
+            st.dataframe(pd.DataFrame(records)[
+                ["stage", "depth", "wall_ms", "cpu_ms", "cache", "rss_growth_mb", "alloc_peak_mb", "error"]
+            ])
+        history = st.session_state.get("instrument_history", [])
+        if history:
+            st.markdown("**Session summary**")
+            st.dataframe(summarize_stages(history))
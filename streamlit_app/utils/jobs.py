@@ -0,0 +1,124 @@
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import streamlit as st
+from utils.instrumentation import instrument
+
+# Background workers shared by all sessions of this server process
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "2"))
+
+# Finished jobs kept for later reruns (oldest dropped first)
+KEEP_FINISHED = 32
+
+# How often a page showing a running job refreshes its progress
+POLL_SECONDS = 1.0
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Job registry and submission
+# ─────────────────────────────────────────────────────────────
+
+@instrument(cache="resource")
+def _job_registry():
+    """
+    One executor and job table per process, shared by every session, so a
+    rerun or another user asking for the same result joins the same job.
+    """
+    return {
+        "executor": ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="dashboard-job"),
+        "jobs": OrderedDict(),
+        "lock": threading.Lock(),
+    }
+
+def _drop_old_jobs(jobs):
+    finished = [key for key, job in jobs.items() if job["status"] in ("done", "error")]
+    for key in finished[:max(0, len(finished) - KEEP_FINISHED)]:
+        del jobs[key]
+
+def _job_key(func, key):
+    return (func.__module__, func.__qualname__, key)
+
+def submit_job(func, key, *args, label=None, **kwargs):
+    """
+    Runs `func(*args, report=..., **kwargs)` in the background and returns
+    its job record. Jobs are de-duplicated by (func, key): while one is
+    queued, running or finished, the same record is returned instead of
+    starting again; a failed job is retried on the next submit.
+
+    `func` reports progress by calling report(fraction, message, partial),
+    where `partial` is an optional intermediate result for the page.
+    """
+    registry = _job_registry()
+    job_key = _job_key(func, key)
+    with registry["lock"]:
+        job = registry["jobs"].get(job_key)
+        if job is not None and job["status"] != "error":
+            registry["jobs"].move_to_end(job_key)
+            return job
+        job = {
+            "key": job_key, "label": label or func.__name__, "status": "queued",
+            "progress": 0.0, "message": "", "partial": None, "result": None, "error": None,
+            "submitted": time.time(), "finished": None,
+        }
+        registry["jobs"][job_key] = job
+        _drop_old_jobs(registry["jobs"])
+
+    def report(progress=None, message=None, partial=None):
+        if progress is not None:
+            job["progress"] = min(max(float(progress), 0.0), 1.0)
+        if message is not None:
+            job["message"] = message
+        if partial is not None:
+            job["partial"] = partial
+
+    def run():
+        job["status"] = "running"
+        try:
+            job["result"] = func(*args, report=report, **kwargs)
+            job["progress"], job["status"] = 1.0, "done"
+        except Exception as e:
+            job["error"], job["status"] = f"{type(e).__name__}: {e}", "error"
+        finally:
+            job["finished"] = time.time()
+
+    registry["executor"].submit(run)
+    return job
+
+def get_job(func, key):
+    """
+    The job record for (func, key), or None if it was never submitted.
+    """
+    return _job_registry()["jobs"].get(_job_key(func, key))
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Showing progress on a page
+# ─────────────────────────────────────────────────────────────
+
+@st.fragment(run_every=POLL_SECONDS)
+def _job_progress(job, render_partial):
+    """
+    Refreshes on its own while the job runs (the rest of the page is not
+    re-executed); reruns the whole page once the job has finished.
+    """
+    if job["status"] in ("done", "error"):
+        st.rerun()
+    elapsed = time.time() - job["submitted"]
+    text = f"⏳ {job['label']}: {job['message'] or job['status']} ({elapsed:.0f}s)"
+    st.progress(job["progress"], text=text)
+    if render_partial is not None and job["partial"] is not None:
+        render_partial(job["partial"])
+
+def job_result(job, render_partial=None):
+    """
+    The job's result once it is done. Until then shows a progress bar (and
+    `render_partial(partial)` for intermediate results) and returns None;
+    on failure shows the error and returns None.
+    """
+    if job["status"] == "done":
+        return job["result"]
+    if job["status"] == "error":
+        st.error(f"❌ {job['label']} failed: {job['error']}")
+        return None
+    _job_progress(job, render_partial)
+    return None
@@ -0,0 +1,179 @@
+import re
+import hashlib
+from functools import partial
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import streamlit as st
+from sklearn.feature_extraction.text import CountVectorizer, ENGLISH_STOP_WORDS
+from utils.instrumentation import instrument
+
+# Stopwords: scikit-learn's English list plus filler common in reports
+STOPWORDS = frozenset(ENGLISH_STOP_WORDS | {"said", "says", "also", "year", "years", "per", "cent"})
+
+TOKEN_PATTERN = r"(?u)\b[a-zA-Z][a-zA-Z\-]+\b"
+_TOKEN_RE = re.compile(TOKEN_PATTERN)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Sparse document-term matrix (built once per corpus)
+# ─────────────────────────────────────────────────────────────
+
+def terms_from_tokens(tokens, ngram_range=(1, 2)):
+    """
+    Analyzer for already tokenized, lower-cased documents: the same token
+    filter, stopwords and n-grams the text analyzer applies.
+    """
+    words = [t for t in tokens if _TOKEN_RE.fullmatch(t) and t not in STOPWORDS]
+    low, high = ngram_range
+    return [" ".join(words[i:i + n]) for n in range(low, high + 1) for i in range(len(words) - n + 1)]
+
+def build_term_matrix(docs, ngram_range=(1, 2), min_df=1, pretokenized=False):
+    """
+    Sparse document-term count matrix with stopword filtering and n-grams,
+    plus the TF-IDF weighted matrix derived from it. With `pretokenized`,
+    `docs` are token lists (e.g. run_nlp_pipeline's 'doc_tokens') and are
+    not tokenized again.
+
+    Returns a dict with 'counts' (CSR, docs × terms), 'tfidf' (CSR,
+    l2-normalised rows), 'terms' (array of strings), 'vocabulary'
+    (term → column) and 'idf'.
+    """
+    if pretokenized:
+        vectorizer = CountVectorizer(analyzer=partial(terms_from_tokens, ngram_range=ngram_range),
+                                     min_df=min_df, dtype=np.float32)
+    else:
+        vectorizer = CountVectorizer(
+            lowercase=True,
+            stop_words=list(STOPWORDS),
+            token_pattern=TOKEN_PATTERN,
+            ngram_range=ngram_range,
+            min_df=min_df,
+            dtype=np.float32,
+        )
+    counts = vectorizer.fit_transform(docs).tocsr()
+    terms = vectorizer.get_feature_names_out()
+    n_docs = counts.shape[0]
+
+    # Smooth idf, as in scikit-learn's TfidfTransformer
+    df = np.bincount(counts.indices, minlength=counts.shape[1])
+    idf = np.log((1 + n_docs) / (1 + df)) + 1
+
+    tfidf = counts @ sp.diags(idf.astype(np.float32))
+    norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    tfidf = sp.diags(1 / norms) @ tfidf
+
+    return {
+        "counts": counts,
+        "tfidf": tfidf.tocsr(),
+        "terms": terms,
+        "vocabulary": vectorizer.vocabulary_,
+        "idf": idf,
+        "ngrams": np.char.count(terms.astype(str), " ") + 1,
+    }
+
+@instrument(cache="resource", max_entries=8, show_spinner=False)
+def _cached_term_matrix(corpus_key, _docs, ngram_range, min_df, pretokenized):
+    return build_term_matrix(_docs, ngram_range=ngram_range, min_df=min_df, pretokenized=pretokenized)
+
+def load_term_matrix(docs, ngram_range=(1, 2), min_df=1, pretokenized=False):
+    """
+    Cached `build_term_matrix`, keyed by a hash of the documents, so the
+    matrix is only rebuilt when the corpus itself changes.
+    """
+    digest = hashlib.sha1()
+    for doc in docs:
+        digest.update(("\x1f".join(doc) if pretokenized else doc).encode("utf-8"))
+        digest.update(b"\0")
+    return _cached_term_matrix(digest.hexdigest(), list(docs), tuple(ngram_range), min_df, pretokenized)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Queries on the cached matrix
+# ─────────────────────────────────────────────────────────────
+
+def top_keywords(matrix, n=10, doc_mask=None, max_ngram=None):
+    """
+    Highest-scoring terms by summed TF-IDF over the selected documents.
+    Returns a DataFrame with Keyword, Frequency and TF-IDF.
+    """
+    tfidf, counts = matrix["tfidf"], matrix["counts"]
+    if doc_mask is not None:
+        rows = np.flatnonzero(doc_mask)
+        tfidf, counts = tfidf[rows], counts[rows]
+
+    scores = np.asarray(tfidf.sum(axis=0)).ravel()
+    freqs = np.asarray(counts.sum(axis=0)).ravel()
+    if max_ngram is not None:
+        scores = np.where(matrix["ngrams"] <= max_ngram, scores, 0)
+
+    n = min(n, int((scores > 0).sum()))
+    top = np.argpartition(-scores, n - 1)[:n] if n else np.array([], dtype=int)
+    top = top[np.argsort(-scores[top])]
+    return pd.DataFrame({
+        "Keyword": matrix["terms"][top],
+        "Frequency": freqs[top].astype(int),
+        "TF-IDF": np.round(scores[top], 4),
+    })
+
+def keyword_trends(matrix, periods, n=10):
+    """
+    Class-based TF-IDF (c-TF-IDF): documents are pooled per period with a
+    single sparse product and the top `n` terms of every period returned.
+
+    `periods` is one label per document (e.g. the report year).
+    Returns a long DataFrame with Period, Rank, Keyword and Score.
+    """
+    labels, codes = np.unique(np.asarray(periods), return_inverse=True)
+    membership = sp.csr_matrix(
+        (np.ones(len(codes), dtype=np.float32), (codes, np.arange(len(codes)))),
+        shape=(len(labels), len(codes)),
+    )
+    class_counts = (membership @ matrix["counts"]).toarray()  # periods × terms
+
+    totals = class_counts.sum(axis=1, keepdims=True)
+    tf = np.divide(class_counts, totals, out=np.zeros_like(class_counts), where=totals > 0)
+    avg_words = totals.mean()
+    term_freq = class_counts.sum(axis=0)
+    idf = np.log(1 + avg_words / np.maximum(term_freq, 1))
+    scores = tf * idf
+
+    k = min(n, scores.shape[1])
+    top = np.argsort(-scores, axis=1)[:, :k]
+    return pd.DataFrame({
+        "Period": np.repeat(labels, k),
+        "Rank": np.tile(np.arange(1, k + 1), len(labels)),
+        "Keyword": matrix["terms"][top].ravel(),
+        "Score": np.round(np.take_along_axis(scores, top, axis=1).ravel(), 5),
+    })
+
+def term_trend(matrix, periods, terms):
+    """
+    Relative frequency (per 1,000 terms) of the given terms per period.
+    Only the queried columns are touched; the matrix is not rebuilt.
+    """
+    vocab = matrix["vocabulary"]
+    cols = [vocab[t] for t in terms if t in vocab]
+    found = [t for t in terms if t in vocab]
+    if not cols:
+        return pd.DataFrame(columns=["Period"] + list(terms))
+
+    labels, codes = np.unique(np.asarray(periods), return_inverse=True)
+    counts = matrix["counts"]
+    selected = counts[:, cols].toarray()
+    doc_totals = np.asarray(counts.sum(axis=1)).ravel()
+
+    per_period = np.zeros((len(labels), len(cols)))
+    np.add.at(per_period, codes, selected)
+    period_totals = np.bincount(codes, weights=doc_totals, minlength=len(labels))
+    rel = per_period / np.maximum(period_totals, 1)[:, None] * 1000
+
+    out = pd.DataFrame(rel, columns=found)
+    out.insert(0, "Period", labels)
+    return out
+
+def document_period(path):
+    """
+    Year found in a report's file name or path (e.g. 'reports/2019_floods.txt').
+    """
+    match = re.search(r"(19|20)\d{2}", path)
+    return int(match.group(0)) if match else None
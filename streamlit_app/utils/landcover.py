@@ -1,11 +1,14 @@
 import rasterio
 from rasterio.enums import Resampling
+from rasterio.windows import Window
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import streamlit as st
-from collections import Counter
+from utils.instrumentation import instrument
+from utils.zonal_stats import transition_counts
 
+@instrument()
 def load_raster_resampled(path, target_shape=None, scale_factor=10):
     """
     Loads and resamples a raster to a target shape or using scale factor.
@@ -29,6 +32,7 @@ def load_raster_resampled(path, target_shape=None, scale_factor=10):
         st.error(f"❌ Error loading/resampling raster {path}: {e}")
         return None, None
 
+@instrument()
 def compute_landcover_transition_matrix(lc1, lc2):
     """
     Computes a matrix of landcover class transitions (e.g., 12→14).
@@ -37,16 +41,54 @@ def compute_landcover_transition_matrix(lc1, lc2):
     if lc1.shape != lc2.shape:
         raise ValueError("Landcover arrays must be the same shape.")
 
-    flat1 = lc1.flatten()
-    flat2 = lc2.flatten()
+    return _transition_table(_pair_counts(lc1, lc2))
 
-    transitions = [f"{int(a)}→{int(b)}" for a, b in zip(flat1, flat2)]
-    counter = Counter(transitions)
+def _pair_counts(lc1, lc2):
+    """
+    Pixel count per (from, to) class pair, from one bincount over the
+    pairs instead of a string per pixel.
+    """
+    counts, labels = transition_counts(lc1, lc2)
+    rows, cols = np.nonzero(counts[0])
+    return pd.Series(counts[0][rows, cols], index=pd.MultiIndex.from_arrays([labels[rows], labels[cols]]))
 
-    df_trans = pd.DataFrame(counter.items(), columns=["Transition", "Count"])
-    df_trans = df_trans.sort_values(by="Count", ascending=False).reset_index(drop=True)
+def _transition_table(pairs):
+    df_trans = pd.DataFrame({
+        "Transition": [f"{int(a)}→{int(b)}" for a, b in pairs.index],
+        "Count": pairs.to_numpy(),
+    })
+    return df_trans.sort_values(by="Count", ascending=False, kind="stable").reset_index(drop=True)
 
-    return df_trans
+def _read_rows(src, row_start, row_stop, out_height, out_width):
+    """
+    Rows [row_start, row_stop) of the raster resampled to out_height × out_width.
+    """
+    scale = src.height / out_height
+    window = Window(0, round(row_start * scale), src.width,
+                                     round(row_stop * scale) - round(row_start * scale))
+    return src.read(1, window=window, out_shape=(row_stop - row_start, out_width),
+                    resampling=Resampling.nearest)
+
+def compute_landcover_transitions_chunked(path_from, path_to, scale_factor=10, block_rows=128, report=None):
+    """
+    Transition table of the two rasters resampled by `scale_factor`, read
+    and counted in blocks of rows so only one block of each raster is in
+    memory. Block edges are rounded to whole source rows, so counts can
+    differ slightly from resampling the whole raster at once; the dashboard
+    and scripts/pipeline.py both use this function. After every block it
+    calls report(fraction, message, partial) with the table so far (for jobs).
+    """
+    with rasterio.open(path_from) as src_from, rasterio.open(path_to) as src_to:
+        height, width = int(src_from.height / scale_factor), int(src_from.width / scale_factor)
+        totals = pd.Series(dtype="int64")
+        for row_start in range(0, height, block_rows):
+            row_stop = min(height, row_start + block_rows)
+            lc1 = _read_rows(src_from, row_start, row_stop, height, width)
+            lc2 = _read_rows(src_to, row_start, row_stop, height, width)
+            totals = totals.add(_pair_counts(lc1, lc2), fill_value=0).astype("int64")
+            if report is not None:
+                report(row_stop / height, f"rows {row_stop:,} of {height:,}", _transition_table(totals))
+    return _transition_table(totals)
 
 def plot_landcover_transition_matrix(df_trans):
     """
@@ -1,24 +1,12 @@
+import hashlib
 import streamlit as st
 import pandas as pd
 from textblob import TextBlob
 from collections import Counter
 import matplotlib.pyplot as plt
 from wordcloud import WordCloud
-import nltk
-import os
-
-# Set the path to the nltk_data folder in your project
-nltk_data_path = os.path.join(os.getcwd(), "punkt_tab")  # Adjusted path to your local punkt_tab directory
-
-# Point NLTK to this folder
-nltk.data.path.append(nltk_data_path)
-
-# Ensure the punkt tokenizer is available
-try:
-    nltk.data.find('tokenizers/punkt')
-except LookupError:
-    st.error("❌ NLTK punkt tokenizer not found. Please make sure it's included in your project.")
-    st.stop()  # Stop the app gracefully if the corpus is missing
+from utils.nltk_resources import sent_tokenize, word_tokenize
+from utils.instrumentation import instrument
 
 def load_sample_texts():
     """
@@ -45,42 +33,104 @@ def load_sample_texts():
     adversely affecting downstream communities that rely on glacier meltwater.
     """
 
-    # Split into sentences
-    blob = TextBlob(text)
-    return [str(sentence).strip() for sentence in blob.sentences]
+    # Split into sentences (bundled punkt model, no download)
+    return [" ".join(sentence.split()) for sentence in sent_tokenize(text.strip())]
+
+def document_hash(text):
+    """
+    Stable content hash used as the per-document cache key.
+    """
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+@st.cache_data(max_entries=10000, show_spinner=False)
+def _analyze_document(doc_hash, _text):
+    """
+    Tokenizes one document once and derives everything the page needs
+    from those tokens. Cached by `doc_hash`; the text itself is not
+    hashed again by Streamlit (leading underscore).
+    """
+    sentences = [sentence.strip() for sentence in sent_tokenize(_text)]
+    sentiments = [TextBlob(sentence).sentiment for sentence in sentences]
+    return {
+        "Sentences": sentences,
+        "Polarity": [round(s.polarity, 3) for s in sentiments],
+        "Subjectivity": [round(s.subjectivity, 3) for s in sentiments],
+        "Tokens": [word.lower() for word in word_tokenize(_text)],
+    }
+
+@instrument()
+def run_nlp_pipeline(texts, batch_size=64):
+    """
+    Runs the shared NLP pipeline over a list of documents.
+    Documents are processed in batches; each one is tokenized once and
+    reused for sentiment, keywords and the word cloud.
+
+    Returns a dict with:
+    - 'sentiment': DataFrame of Doc, Text, Polarity, Subjectivity per sentence
+    - 'token_counts': Counter of lower-cased tokens over all documents
+    - 'doc_tokens': list of token lists, one per document
+    """
+    rows = []
+    doc_tokens = []
+    token_counts = Counter()
+
+    for start in range(0, len(texts), batch_size):
+        batch = texts[start:start + batch_size]
+        results = [_analyze_document(document_hash(text), text) for text in batch]
+        for offset, result in enumerate(results):
+            doc_id = start + offset
+            rows.extend(
+                {"Doc": doc_id, "Text": sent, "Polarity": pol, "Subjectivity": subj}
+                for sent, pol, subj in zip(result["Sentences"], result["Polarity"], result["Subjectivity"])
+            )
+            doc_tokens.append(result["Tokens"])
+            token_counts.update(result["Tokens"])
 
-def analyze_sentiment(texts):
+    sentiment = pd.DataFrame(rows, columns=["Doc", "Text", "Polarity", "Subjectivity"])
+    return {"sentiment": sentiment, "token_counts": token_counts, "doc_tokens": doc_tokens}
+
+def analyze_sentiment(texts, pipeline=None):
     """
     Returns a DataFrame with sentiment polarity and subjectivity.
+    Pass the output of `run_nlp_pipeline` to reuse its results.
     """
-    results = []
-    for sentence in texts:
-        blob = TextBlob(sentence)
-        results.append({
-            "Text": sentence,
-            "Polarity": round(blob.sentiment.polarity, 3),
-            "Subjectivity": round(blob.sentiment.subjectivity, 3)
-        })
-    return pd.DataFrame(results)
-
-def extract_keywords(texts, num_keywords=10):
+    pipeline = pipeline or run_nlp_pipeline(texts)
+    sentiment = pipeline["sentiment"]
+    # One row per input text when the inputs are already single sentences
+    if len(sentiment) != len(texts):
+        return sentiment.reset_index(drop=True)
+    return sentiment.drop(columns="Doc").reset_index(drop=True)
+
+def extract_keywords(texts, num_keywords=10, pipeline=None, ngram_range=(1, 2)):
     """
-    Extracts most frequent keywords from the input texts.
+    Extracts the top keywords from the input texts by TF-IDF over a
+    stopword-filtered sparse document-term matrix (unigrams and bigrams).
+    The matrix is cached per corpus. Pass the output of `run_nlp_pipeline`
+    to build it from the pipeline's tokens instead of re-tokenizing.
     """
-    all_words = []
-    for text in texts:
-        blob = TextBlob(text.lower())
-        all_words += blob.words
+    from utils.keywords import load_term_matrix, top_keywords
 
-    common_words = Counter(all_words).most_common(num_keywords)
-    return pd.DataFrame(common_words, columns=["Keyword", "Frequency"])
+    if pipeline is not None:
+        matrix = load_term_matrix(pipeline["doc_tokens"], ngram_range=ngram_range, pretokenized=True)
+    else:
+        matrix = load_term_matrix(texts, ngram_range=ngram_range)
+    return top_keywords(matrix, n=num_keywords)
 
-def plot_wordcloud(texts):
+def plot_wordcloud(texts, pipeline=None):
     """
     Generate and display a word cloud from input texts.
+    Uses precomputed token counts from `run_nlp_pipeline` when given,
+    so the text is not tokenized a second time.
     """
-    combined_text = " ".join(texts)
-    wordcloud = WordCloud(width=800, height=400, background_color='white').generate(combined_text)
+    if pipeline is not None:
+        from utils.keywords import STOPWORDS
+        frequencies = {word: count for word, count in pipeline["token_counts"].items()
+                       if word.isalpha() and word not in STOPWORDS}
+        wordcloud = WordCloud(width=800, height=400, background_color='white') \
+            .generate_from_frequencies(frequencies)
+    else:
+        combined_text = " ".join(texts)
+        wordcloud = WordCloud(width=800, height=400, background_color='white').generate(combined_text)
 
     fig, ax = plt.subplots(figsize=(10, 5))
     ax.imshow(wordcloud, interpolation='bilinear')
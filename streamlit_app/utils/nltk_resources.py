@@ -0,0 +1,69 @@
+import os
+from functools import lru_cache
+import nltk
+from nltk.tokenize import NLTKWordTokenizer
+from nltk.tokenize.punkt import PunktSentenceTokenizer, load_punkt_params
+
+# NLTK data shipped with the app: streamlit_app/nltk_data
+BUNDLED_NLTK_DATA = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "nltk_data")
+
+def use_bundled_nltk_data():
+    """
+    Puts the bundled data directory first on NLTK's search path.
+    Safe to call repeatedly; nothing is ever downloaded.
+    """
+    if BUNDLED_NLTK_DATA not in nltk.data.path:
+        nltk.data.path.insert(0, BUNDLED_NLTK_DATA)
+
+def _find(resource):
+    try:
+        return nltk.data.find(resource)
+    except LookupError:
+        return None
+
+@lru_cache(maxsize=None)
+def get_sentence_tokenizer(language="english"):
+    """
+    Punkt sentence tokenizer for `language`, loaded once per process.
+
+    Looks for, in order: the 'punkt_tab' layout NLTK ≥ 3.8.2 expects, the
+    same text-format parameters under 'tokenizers/punkt/<lang>/' (how the
+    app bundles them), and the legacy 'punkt/<lang>.pickle' model.
+    """
+    use_bundled_nltk_data()
+
+    for resource in (f"tokenizers/punkt_tab/{language}/", f"tokenizers/punkt/{language}/"):
+        lang_dir = _find(resource)
+        if lang_dir is not None:
+            return PunktSentenceTokenizer(load_punkt_params(lang_dir))
+
+    if _find(f"tokenizers/punkt/{language}.pickle") is not None:
+        return nltk.data.load(f"tokenizers/punkt/{language}.pickle")
+
+    raise LookupError(
+        f"Punkt model for '{language}' not found. Expected it under {BUNDLED_NLTK_DATA}/tokenizers/punkt."
+    )
+
+@lru_cache(maxsize=None)
+def get_word_tokenizer():
+    """
+    Treebank-style word tokenizer (needs no NLTK data files).
+    """
+    return NLTKWordTokenizer()
+
+def sent_tokenize(text, language="english"):
+    """
+    Offline replacement for `nltk.sent_tokenize` using the bundled model.
+    """
+    return get_sentence_tokenizer(language).tokenize(text)
+
+def word_tokenize(text, language="english", include_punc=False):
+    """
+    Offline replacement for `nltk.word_tokenize`. Punctuation-only tokens
+    are dropped unless `include_punc` is set (like TextBlob's `.words`).
+    """
+    tokenizer = get_word_tokenizer()
+    tokens = [tok for sent in sent_tokenize(text, language) for tok in tokenizer.tokenize(sent)]
+    if include_punc:
+        return tokens
+    return [tok for tok in tokens if any(ch.isalnum() for ch in tok)]
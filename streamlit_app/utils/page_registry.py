@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import importlib
+import subprocess
+import pandas as pd
+import streamlit as st
+from utils.instrumentation import stage, set_run_page
+
+# dashboard -> {page title -> {"render": callable, "modules": tuple}}
+PAGE_REGISTRY = {}
+
+# Third-party libraries worth watching in the profile (slow to import)
+HEAVY_MODULES = [
+    "matplotlib", "seaborn", "scipy", "sklearn", "nltk", "textblob",
+    "wordcloud", "geopandas", "shapely", "rasterio", "gdown",
+]
+
+APP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Seconds spent importing each page module in this process (first import only)
+_IMPORT_TIMES = {}
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Page registry
+# ─────────────────────────────────────────────────────────────
+
+def register_page(dashboard, title, modules=()):
+    """
+    Decorator that adds a page to a dashboard.
+
+    `modules` lists the modules the page needs (e.g. 'utils.glacier');
+    they are imported only when the page is selected, never at start-up.
+    """
+    def decorator(render):
+        PAGE_REGISTRY.setdefault(dashboard, {})[title] = {"render": render, "modules": tuple(modules)}
+        return render
+    return decorator
+
+def list_pages(dashboard):
+    """
+    Page titles of a dashboard, in registration order.
+    """
+    return list(PAGE_REGISTRY.get(dashboard, {}))
+
+def import_page_modules(modules):
+    """
+    Imports a page's declared modules, timing the first import of each.
+    """
+    for name in modules:
+        if name in _IMPORT_TIMES:
+            continue
+        already_loaded = name in sys.modules
+        start = time.perf_counter()
+        importlib.import_module(name)
+        _IMPORT_TIMES[name] = 0.0 if already_loaded else time.perf_counter() - start
+
+def render_page(dashboard, title, *args, **kwargs):
+    """
+    Loads the selected page's modules and renders it.
+    An import failure only takes down that page, not the whole dashboard.
+    """
+    page = PAGE_REGISTRY.get(dashboard, {}).get(title)
+    if page is None:
+        st.error(f"❌ Unknown page: {dashboard} / {title}")
+        return
+    set_run_page(f"{dashboard}/{title}")
+    try:
+        with stage(f"import:{dashboard}/{title}"):
+            import_page_modules(page["modules"])
+    except Exception as e:
+        st.error(f"❌ Failed to load {title}: {e}")
+        return
+    with stage(f"page:{dashboard}/{title}"):
+        page["render"](*args, **kwargs)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Import-time profile
+# ─────────────────────────────────────────────────────────────
+
+def session_import_profile():
+    """
+    Import time of every page module loaded so far in this process,
+    plus which heavy libraries are currently in memory.
+    """
+    modules = pd.DataFrame(
+        sorted(_IMPORT_TIMES.items(), key=lambda kv: -kv[1]),
+        columns=["Module", "Import_s"],
+    )
+    heavy = pd.DataFrame({
+        "Library": HEAVY_MODULES,
+        "Loaded": [name in sys.modules for name in HEAVY_MODULES],
+    })
+    return modules, heavy
+
+def _parse_importtime(stderr, modules=(), top_n=5):
+    """
+    Parses `python -X importtime` output.
+
+    Returns (total seconds of all top-level imports, heaviest direct
+    imports of `modules`) so the report names the libraries that make a
+    page slow, not the page module itself.
+    """
+    total = 0.0
+    children, heaviest = [], []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|", 2)
+        seconds = int(cumulative) / 1e6
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        # importtime lists children before their parent
+        if depth == 1:
+            children.append((name, seconds))
+        elif depth == 0:
+            total += seconds
+            if name in modules:
+                heaviest.extend(children)
+            children = []
+    heaviest = sorted(heaviest, key=lambda r: -r[1])[:top_n]
+    return total, heaviest
+
+def profile_cold_import(modules, base_modules=("pandas", "streamlit")):
+    """
+    Imports `modules` in a fresh interpreter and measures the cold cost.
+    Returns (total seconds, [(package, seconds), ...] heaviest first).
+    """
+    statement = "; ".join(f"import {name}" for name in (*base_modules, *modules))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        cwd=APP_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        raise ImportError(result.stderr.strip().splitlines()[-1])
+    return _parse_importtime(result.stderr, modules)
+
+def profile_dashboard_imports(base_modules=("pandas", "streamlit", "utils.preprocess")):
+    """
+    Cold-start import cost of every registered page, each measured in its
+    own interpreter so earlier pages do not warm the cache for later ones.
+    """
+    base_total, _ = profile_cold_import((), base_modules=base_modules)
+    rows = [{"Dashboard": "(start-up)", "Page": "pandas + streamlit", "Cold_Import_s": round(base_total, 3),
+             "Extra_s": 0.0, "Heaviest": ""}]
+    for dashboard, pages in PAGE_REGISTRY.items():
+        for title, page in pages.items():
+            try:
+                total, heaviest = profile_cold_import(page["modules"], base_modules=base_modules)
+            except ImportError as e:
+                rows.append({"Dashboard": dashboard, "Page": title, "Cold_Import_s": None,
+                             "Extra_s": None, "Heaviest": f"failed: {e}"})
+                continue
+            rows.append({
+                "Dashboard": dashboard,
+                "Page": title,
+                "Cold_Import_s": round(total, 3),
+                "Extra_s": round(max(total - base_total, 0.0), 3),
+                "Heaviest": ", ".join(f"{name} ({seconds:.2f}s)" for name, seconds in heaviest),
+            })
+    return pd.DataFrame(rows)
+
+def show_import_profile():
+    """
+    Sidebar expander with the import-time profile.
+    """
+    with st.sidebar.expander("⏱️ Import-time profile"):
+        modules, heavy = session_import_profile()
+        st.caption("Page modules imported in this session")
+        st.dataframe(modules)
+        st.caption("Heavy libraries in memory")
+        st.dataframe(heavy)
+        if st.button("Profile cold start of every page"):
+            with st.spinner("Importing each page in a fresh interpreter…"):
+                st.dataframe(profile_dashboard_imports())
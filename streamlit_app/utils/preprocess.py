@@ -1,9 +1,20 @@
 import os
 import pandas as pd
 import streamlit as st
-import gdown
+from utils.instrumentation import instrument
 
-@st.cache_data
+def file_signature(file_path: str) -> tuple:
+    """
+    Return (mtime_ns, size) of a file.
+
+    Used as an extra cache-key argument so cached datasets are rebuilt
+    whenever their source file changes on disk.
+    """
+    stat = os.stat(file_path)
+    return stat.st_mtime_ns, stat.st_size
+
+# Not cached per session: utils.data_store keeps one shared copy per dataset version
+@instrument()
 def load_data(file_path: str, gdrive_file_id: str = None) -> pd.DataFrame:
     """
     Load a CSV from disk or, if missing, download it from Google Drive.
@@ -26,6 +37,8 @@ def load_data(file_path: str, gdrive_file_id: str = None) -> pd.DataFrame:
             raise FileNotFoundError(
                 f"{file_path} not found locally and no Google Drive file ID provided."
             )
+        import gdown  # only needed for the first download; keeps start-up light
+
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         url = f"https://drive.google.com/uc?export=download&id={gdrive_file_id}"
         st.info(f"Downloading data to `{file_path}` from Google Drive…")
@@ -34,7 +47,7 @@ def load_data(file_path: str, gdrive_file_id: str = None) -> pd.DataFrame:
     # Read and return
     return pd.read_csv(file_path)
 
-@st.cache_data
+@instrument()
 def clean_data(df: pd.DataFrame) -> pd.DataFrame:
     """
     Clean the daily climate DataFrame in place.
@@ -59,6 +72,6 @@ def clean_data(df: pd.DataFrame) -> pd.DataFrame:
         df = df.dropna(subset=['Date'])
 
     # Fill other missing values
-    df = df.fillna(method='ffill').fillna(method='bfill')
+    df = df.ffill().bfill()
 
     return df
@@ -0,0 +1,258 @@
+import os
+import calendar
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from scipy.special import ndtr
+from utils.artifacts import load_artifact
+from utils.district_index import district_index, district_period_matrix, DISTRICT_COLUMN
+from utils.instrumentation import instrument
+
+# Variables analysed and their annual/monthly aggregate
+TREND_VARIABLES = {
+    "Temp_2m": "mean",
+    "MaxTemp_2m": "mean",
+    "Precip": "sum",
+    "WindSpeed_10m": "mean",
+}
+UNITS = {"Temp_2m": "°C", "MaxTemp_2m": "°C", "Precip": "mm", "WindSpeed_10m": "m/s"}
+
+NATIONAL = "Nepal"
+SIGNIFICANCE = 0.05
+RECENT_START = 2000  # second slope over the recent period, for "faster since ..." statements
+
+# Days needed for a month / year to count as observed
+MIN_DAYS_PER_MONTH = 25
+MIN_DAYS_PER_YEAR = 330
+
+TREND_WORKERS = int(os.environ.get("TREND_WORKERS", "4"))
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Batched trend tests (rows = series, columns = time)
+# ─────────────────────────────────────────────────────────────
+
+def mann_kendall(X):
+    """
+    Mann–Kendall test for every row of X at once (NaN = missing).
+    Pairwise signs are taken over the whole series × n × n array, with the
+    tie-corrected variance. Returns (S, Z, p two-sided, Kendall's tau).
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    ok = np.isfinite(X)
+    n = ok.sum(axis=1).astype(float)
+    diff = X[:, None, :] - X[:, :, None]               # [s, i, j] = x_j - x_i
+    upper = np.triu(np.ones(X.shape[1], dtype=bool), 1)
+    valid = ok[:, :, None] & ok[:, None, :] & upper
+    S = np.where(valid, np.sign(np.nan_to_num(diff)), 0).sum(axis=(1, 2))
+
+    # Ties: each value in a group of t equal values contributes f(t) / t
+    group = ((diff == 0) & ok[:, :, None] & ok[:, None, :]).sum(axis=2)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        tie_term = np.where(ok, (group - 1) * (2 * group + 5), 0).sum(axis=1)
+        var = (n * (n - 1) * (2 * n + 5) - tie_term) / 18
+        Z = np.where(S > 0, S - 1, np.where(S < 0, S + 1, 0)) / np.sqrt(var)
+        tau = S / (n * (n - 1) / 2)
+    Z = np.where(var > 0, Z, np.nan)
+    p = 2 * (1 - ndtr(np.abs(Z)))
+    return S, Z, p, tau
+
+def sens_slope(X, t=None):
+    """
+    Sen's slope (median of all pairwise slopes) for every row of X, per
+    unit of `t` (default: per step). Pairs with a missing value are skipped.
+    """
+    X = np.atleast_2d(np.asarray(X, dtype=float))
+    t = np.arange(X.shape[1], dtype=float) if t is None else np.asarray(t, dtype=float)
+    i, j = np.triu_indices(X.shape[1], 1)
+    slopes = (X[:, j] - X[:, i]) / (t[j] - t[i])
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # series with fewer than two values
+        return np.nanmedian(slopes, axis=1)
+
+def seasonal_decompose(M, period=12):
+    """
+    Classical additive decomposition of every row of M (e.g. monthly
+    values): centred 2×period moving-average trend, seasonal means of the
+    detrended values (centred on zero) and the residual.
+    Returns (trend, seasonal, resid), each shaped like M.
+    """
+    M = np.atleast_2d(np.asarray(M, dtype=float))
+    weights = np.r_[0.5, np.ones(period - 1), 0.5] / period if period % 2 == 0 else np.ones(period) / period
+    half = len(weights) // 2
+    windows = np.lib.stride_tricks.sliding_window_view(M, len(weights), axis=1)
+    trend = np.full_like(M, np.nan)
+    trend[:, half:M.shape[1] - half] = windows @ weights
+
+    detrended = M - trend
+    n_cycles = -(-M.shape[1] // period)
+    padded = np.full((M.shape[0], n_cycles * period), np.nan)
+    padded[:, :M.shape[1]] = detrended
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        profile = np.nanmean(padded.reshape(M.shape[0], n_cycles, period), axis=1)
+    profile -= np.nanmean(profile, axis=1, keepdims=True)
+    seasonal = np.tile(profile, n_cycles)[:, :M.shape[1]]
+    return trend, seasonal, M - trend - seasonal
+
+def _strength(component, resid):
+    """
+    max(0, 1 − Var(resid) / Var(component + resid)) per row.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        total = np.nanvar(component + resid, axis=1)
+        return np.clip(1 - np.nanvar(resid, axis=1) / total, 0, 1)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Every variable × district in batch
+# ─────────────────────────────────────────────────────────────
+
+def _with_national(keys, matrix):
+    """
+    Appends the national series (mean over districts) as an extra row.
+    """
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)
+        national = np.nanmean(matrix, axis=0, keepdims=True)
+    return list(keys) + [NATIONAL], np.vstack([matrix, national])
+
+def annual_series(df, variable, how=None):
+    """
+    Year and annual value of the series the trend test sees for `df`: a
+    district's own series, or the mean over districts for several. Years
+    with too few observed days are left out.
+    """
+    if DISTRICT_COLUMN not in df.columns:
+        df = df.assign(**{DISTRICT_COLUMN: NATIONAL})
+    _, years, annual = district_period_matrix(df, variable, how=how or TREND_VARIABLES[variable],
+                                              min_days=MIN_DAYS_PER_YEAR)
+    _, annual = _with_national([], annual)
+    values = annual[-1]
+    observed = np.isfinite(values)
+    return pd.DataFrame({"Year": years[observed], variable: values[observed]})
+
+def analyze_variable(df, variable, how, index=None):
+    """
+    Trend and seasonality statistics for every district of one variable
+    (plus the national series) as one DataFrame. `df` and `index` are as
+    returned by `district_index`; without `index` the frame is indexed here.
+    """
+    if index is None:
+        df, index = district_index(df)
+    keys, years, annual = district_period_matrix(df, variable, how=how, min_days=MIN_DAYS_PER_YEAR, index=index)
+    _, months, monthly = district_period_matrix(df, variable, how=how, period="month",
+                                                min_days=MIN_DAYS_PER_MONTH, index=index)
+    names, annual = _with_national(keys, annual)
+    _, monthly = _with_national(keys, monthly)
+
+    S, Z, p, tau = mann_kendall(annual)
+    slope = sens_slope(annual, years)
+    recent = years >= RECENT_START
+    recent_slope = sens_slope(annual[:, recent], years[recent]) if recent.sum() > 1 else np.full(len(names), np.nan)
+
+    trend, seasonal, resid = seasonal_decompose(monthly)
+    first_month = int(months[0] % 12)
+    profile = seasonal[:, :12]  # first cycle, starting at first_month
+    peak_month = (np.nanargmax(np.nan_to_num(profile, nan=-np.inf), axis=1) + first_month) % 12 + 1
+
+    observed = np.isfinite(annual)
+    return pd.DataFrame({
+        "Variable": variable,
+        "District": names,
+        "Start_Year": [int(years[row].min()) if row.any() else None for row in observed],
+        "End_Year": [int(years[row].max()) if row.any() else None for row in observed],
+        "Years": observed.sum(axis=1),
+        "MK_S": S.astype(int),
+        "MK_Z": Z,
+        "MK_p": p,
+        "Kendall_Tau": tau,
+        "Sen_Slope_per_Decade": slope * 10,
+        "Recent_Slope_per_Decade": recent_slope * 10,
+        "Trend": np.where(p < SIGNIFICANCE, np.where(S > 0, "increasing", "decreasing"), "no trend"),
+        "Seasonal_Amplitude": np.nanmax(profile, axis=1) - np.nanmin(profile, axis=1),
+        "Peak_Month": peak_month,
+        "Seasonal_Strength": _strength(seasonal, resid),
+        "Trend_Strength": _strength(trend, resid),
+    })
+
+def analyze_trends(df, variables=None, workers=TREND_WORKERS):
+    """
+    Trend table for every variable × district series. Variables are
+    processed in parallel threads (the work is NumPy and releases the GIL).
+    """
+    variables = {v: how for v, how in (variables or TREND_VARIABLES).items() if v in df.columns}
+    df, index = district_index(df)  # sorted once, shared by every worker
+    if index is None:
+        raise ValueError("No District column to analyse trends by.")
+    with ThreadPoolExecutor(max_workers=max(1, min(workers, len(variables)))) as pool:
+        parts = list(pool.map(lambda item: analyze_variable(df, *item, index=index), variables.items()))
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+@instrument(cache="resource", max_entries=4)
+def _cached_trends(version, _df):
+    return analyze_trends(_df)
+
+def load_climate_trends(df, sources=()):
+    """
+    The stored trend table (built by scripts/pipeline.py) when it is up to
+    date, otherwise computed once per dataset version.
+    """
+    trends = load_artifact("climate_trends", sources=sources)
+    if trends is not None:
+        return trends
+    version = df.attrs.get("dataset_version")
+    return _cached_trends(version, df) if version else analyze_trends(df)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Insight text from the stored results
+# ─────────────────────────────────────────────────────────────
+
+def trend_row(trends, variable, region=NATIONAL):
+    """
+    The trend statistics of one series, or None if it was not analysed.
+    """
+    if trends is None or trends.empty:
+        return None
+    rows = trends[(trends["Variable"] == variable) & (trends["District"] == region)]
+    return None if rows.empty else rows.iloc[0]
+
+def describe_trend(row, label, unit):
+    """
+    One sentence on the direction, rate and significance of a trend.
+    """
+    if row is None or pd.isna(row["Sen_Slope_per_Decade"]):
+        return f"- Not enough complete years to assess a trend in {label.lower()}."
+    slope, p = row["Sen_Slope_per_Decade"], row["MK_p"]
+    period = f"{int(row['Start_Year'])}–{int(row['End_Year'])}"
+    if row["Trend"] == "no trend":
+        return (f"- {label} shows no significant trend over {period} "
+                f"(Sen's slope {slope:+.2f} {unit} per decade, Mann–Kendall p = {p:.2f}).")
+    return (f"- {label} shows a significant {row['Trend']} trend of {slope:+.2f} {unit} per decade "
+            f"over {period} (Mann–Kendall p = {p:.3f}).")
+
+def describe_recent(row, unit):
+    if row is None or pd.isna(row["Recent_Slope_per_Decade"]) or pd.isna(row["Sen_Slope_per_Decade"]):
+        return None
+    recent, full = row["Recent_Slope_per_Decade"], row["Sen_Slope_per_Decade"]
+    if recent * full < 0:
+        pace = "reversing the direction of the full record"
+    else:
+        pace = f"{'faster' if abs(recent) > abs(full) else 'slower'} than over the full record"
+    return f"- Since {RECENT_START} the rate is {recent:+.2f} {unit} per decade, {pace}."
+
+def describe_seasonality(row, unit):
+    if row is None or pd.isna(row["Seasonal_Amplitude"]):
+        return None
+    month = calendar.month_name[int(row["Peak_Month"])]
+    return (f"- The seasonal cycle spans {row['Seasonal_Amplitude']:.1f} {unit} and peaks in {month}; "
+            f"seasonality explains {row['Seasonal_Strength']:.0%} of month-to-month variability.")
+
+def variable_insights(trends, variable, label, region=NATIONAL):
+    """
+    Markdown bullets (trend, recent rate, seasonality) for one series.
+    """
+    row = trend_row(trends, variable, region)
+    unit = UNITS.get(variable, "")
+    lines = [describe_trend(row, label, unit), describe_recent(row, unit), describe_seasonality(row, unit)]
+    return "\n".join(line for line in lines if line)
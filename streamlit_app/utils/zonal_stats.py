@@ -0,0 +1,216 @@
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import streamlit as st
+from utils.preprocess import file_signature
+from utils.instrumentation import instrument
+
+LANDCOVER_2005 = "Data/Raw/Environment_data/Landcover_2005_Icimod.tif"
+LANDCOVER_2015 = "Data/Raw/Environment_data/Landcover_2015_icimod.tif"
+GLACIER_SHP = "Data/Raw/Environment_data/Glacier_data/Glacier_1980_1990_2000_2010.shp"
+
+# Polygon attributes that can be used as zones
+GLACIER_ZONE_COLUMNS = ["Basin", "Sub_Basin"]
+
+# Read/rasterize every n-th pixel (1 = full landcover resolution)
+RESOLUTION_FACTORS = [1, 2, 4, 10]
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 1. Vectorized counting
+# ─────────────────────────────────────────────────────────────
+
+def _as_class_codes(*arrays):
+    """
+    Landcover arrays as int64 class codes plus the class label of each code.
+    Non-negative integer classes are used directly; anything else is
+    relabelled through np.unique.
+    """
+    stacked = [np.asarray(a) for a in arrays]
+    if all(a.dtype.kind in "ub" or (a.dtype.kind == "i" and a.size and a.min() >= 0) for a in stacked):
+        n_classes = int(max(a.max() for a in stacked if a.size) + 1) if any(a.size for a in stacked) else 1
+        return [a.astype(np.int64, copy=False) for a in stacked], np.arange(n_classes)
+    labels, inverse = np.unique(np.concatenate([a.ravel() for a in stacked]), return_inverse=True)
+    codes, start = [], 0
+    for a in stacked:
+        codes.append(inverse[start:start + a.size].reshape(a.shape))
+        start += a.size
+    return codes, labels
+
+def transition_counts(lc_from, lc_to, zones=None, n_zones=1):
+    """
+    Pixel counts per (zone, from-class, to-class) from one bincount over a
+    combined key. Without `zones` every pixel is in zone 0.
+    Returns (counts array of shape n_zones × C × C, class labels).
+    """
+    (lc_from, lc_to), labels = _as_class_codes(lc_from, lc_to)
+    n_classes = len(labels)
+    key = lc_from.ravel() * n_classes + lc_to.ravel()
+    if zones is not None:
+        key = key + np.asarray(zones, dtype=np.int64).ravel() * (n_classes * n_classes)
+    counts = np.bincount(key, minlength=n_zones * n_classes * n_classes)
+    return counts.reshape(n_zones, n_classes, n_classes), labels
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 2. Zone-id raster on the landcover grid
+# ─────────────────────────────────────────────────────────────
+
+def _pixel_area_km2(transform, crs, bounds):
+    """
+    Area of one pixel; for geographic CRSs at the centre latitude of `bounds`.
+    """
+    area = abs(transform.a * transform.e)
+    if crs is not None and crs.is_geographic:
+        lat = np.radians((bounds[1] + bounds[3]) / 2)
+        return area * 111.32 ** 2 * np.cos(lat)
+    return area / 1e6
+
+@instrument(cache="resource", max_entries=4)
+def _zone_raster(shp_path, shp_signature, year, zone_column, raster_path, raster_signature, factor):
+    """
+    Rasterizes the polygons of one inventory year onto the landcover grid
+    (every `factor`-th pixel), clipped to the polygons' bounding window.
+    Zone ids are 1..Z in sorted label order; 0 is outside every polygon.
+    Shared by all sessions; callers must not modify the returned arrays.
+    """
+    import geopandas as gpd
+    import rasterio
+    from rasterio import features, windows
+
+    gdf = gpd.read_file(shp_path, columns=[zone_column, "Year"], where=f"Year = {int(year)}")
+    gdf = gdf[gdf.geometry.notna() & gdf[zone_column].notna()]
+
+    with rasterio.open(raster_path) as src:
+        crs, nodata = src.crs, src.nodata
+        transform = src.transform * src.transform.scale(factor, factor)
+        height, width = src.height // factor, src.width // factor
+    if gdf.empty:
+        raise ValueError(f"No polygons with a {zone_column} for {year}.")
+
+    gdf = gdf.to_crs(crs)
+    # Whole pixels covering the polygons, clipped to the raster
+    bbox = windows.from_bounds(*gdf.total_bounds, transform=transform)
+    col0, row0 = max(0, int(np.floor(bbox.col_off))), max(0, int(np.floor(bbox.row_off)))
+    col1 = min(width, int(np.ceil(bbox.col_off + bbox.width)))
+    row1 = min(height, int(np.ceil(bbox.row_off + bbox.height)))
+    if col1 <= col0 or row1 <= row0:
+        raise ValueError("The polygons do not overlap the landcover raster.")
+    window = windows.Window(col0, row0, col1 - col0, row1 - row0)
+    win_transform = windows.transform(window, transform)
+
+    names = sorted(gdf[zone_column].astype(str).unique())
+    zone_ids = gdf[zone_column].astype(str).map({name: i + 1 for i, name in enumerate(names)})
+    zones = features.rasterize(
+        zip(gdf.geometry, zone_ids), out_shape=(int(window.height), int(window.width)),
+        transform=win_transform, fill=0, dtype="uint8" if len(names) < 255 else "uint16",
+    )
+    return {
+        "zones": zones, "names": names, "window": window, "factor": factor, "nodata": nodata,
+        "pixel_km2": _pixel_area_km2(win_transform, crs, windows.bounds(window, transform)),
+    }
+
+def _same_grid(src, ref):
+    return src.crs == ref.crs and src.transform == ref.transform and src.shape == ref.shape
+
+def _read_window(raster_path, window, factor, reference_path=None):
+    """
+    Landcover classes inside `window` of the `factor`-reduced grid. With
+    `reference_path`, the window is on that raster's grid; a raster on a
+    different CRS, transform or shape is reprojected onto it (nearest
+    neighbour) instead of being read with mismatched pixels.
+    """
+    import rasterio
+    from rasterio import windows
+    from rasterio.enums import Resampling
+    from rasterio.vrt import WarpedVRT
+
+    full = windows.Window(window.col_off * factor, window.row_off * factor,
+                          window.width * factor, window.height * factor)
+    out_shape = (int(window.height), int(window.width))
+    with rasterio.open(raster_path) as src:
+        if reference_path is None:
+            return src.read(1, window=full, out_shape=out_shape, resampling=Resampling.nearest)
+        with rasterio.open(reference_path) as ref:
+            if _same_grid(src, ref):
+                return src.read(1, window=full, out_shape=out_shape, resampling=Resampling.nearest)
+            if src.crs is None or ref.crs is None:
+                raise ValueError(f"{raster_path} is on a different grid and has no CRS to reproject from.")
+            # Cells outside the raster read as the reference nodata, so they drop out as zone 0
+            nodata = ref.nodata if ref.nodata is not None else src.nodata
+            with WarpedVRT(src, crs=ref.crs, transform=ref.transform, width=ref.width, height=ref.height,
+                           resampling=Resampling.nearest, nodata=nodata) as vrt:
+                return vrt.read(1, window=full, out_shape=out_shape, resampling=Resampling.nearest)
+
+# ─────────────────────────────────────────────────────────────
+# ✅ 3. Zonal statistics
+# ─────────────────────────────────────────────────────────────
+
+@instrument(cache="data", max_entries=8, show_spinner=False)
+def _zonal_landcover(shp_signature, year, zone_column, signatures, factor):
+    """
+    Long (zone, from, to) table from the cached zone raster and one
+    windowed read of each landcover year.
+    """
+    zone = _zone_raster(GLACIER_SHP, shp_signature, year, zone_column, LANDCOVER_2005, signatures[0], factor)
+    lc_from = _read_window(LANDCOVER_2005, zone["window"], factor)
+    lc_to = _read_window(LANDCOVER_2015, zone["window"], factor, reference_path=LANDCOVER_2005)
+
+    # Pixels outside every zone or without data in either year drop out as zone 0
+    zones = zone["zones"]
+    if zone["nodata"] is not None:
+        zones = np.where((lc_from == zone["nodata"]) | (lc_to == zone["nodata"]), 0, zones)
+    n_zones = len(zone["names"]) + 1
+    counts, labels = transition_counts(lc_from, lc_to, zones, n_zones)
+
+    z, f, t = np.nonzero(counts[1:])
+    transitions = pd.DataFrame({
+        "Zone": np.asarray(zone["names"])[z],
+        "From": labels[f], "To": labels[t],
+        "Pixels": counts[1:][z, f, t],
+    })
+    transitions["Area_km2"] = transitions["Pixels"] * zone["pixel_km2"]
+    transitions["Changed"] = transitions["From"] != transitions["To"]
+    return transitions.sort_values(["Zone", "Pixels"], ascending=[True, False]).reset_index(drop=True)
+
+def zonal_landcover_change(year, zone_column, factor=1):
+    """
+    Landcover transitions 2005 → 2015 inside the glacier outlines of an
+    inventory year, per zone (e.g. basin): one row per (zone, from, to)
+    with pixel count and area. The zone raster is built once per
+    polygon/raster version and resolution; returns an empty frame on error.
+    """
+    try:
+        signatures = (file_signature(LANDCOVER_2005), file_signature(LANDCOVER_2015))
+        return _zonal_landcover(file_signature(GLACIER_SHP), year, zone_column, signatures, factor)
+    except Exception as e:
+        st.error(f"❌ Could not compute zonal landcover statistics: {e}")
+        return pd.DataFrame(columns=["Zone", "From", "To", "Pixels", "Area_km2", "Changed"])
+
+def zone_class_table(transitions, side="To"):
+    """
+    Per-zone class histogram as zone × class area (km²) for one side of the
+    transitions ("From" = 2005 classes, "To" = 2015 classes).
+    """
+    return transitions.pivot_table(index="Zone", columns=side, values="Area_km2",
+                                   aggfunc="sum", fill_value=0)
+
+def plot_zone_replacement(transitions, year):
+    """
+    Stacked bars of the 2015 landcover found on the glacier area of `year`,
+    per zone, plus the largest changes away from the 2005 class.
+    """
+    if transitions.empty:
+        st.warning("⚠️ No zonal statistics to display.")
+        return
+
+    table = zone_class_table(transitions, side="To")
+    fig, ax = plt.subplots(figsize=(12, 6))
+    table.plot(kind="bar", stacked=True, ax=ax, colormap="tab20")
+    ax.set_title(f"Landcover in 2015 on the {year} glacier area")
+    ax.set_xlabel("Zone")
+    ax.set_ylabel("Area (km²)")
+    ax.legend(title="Class (2015)", bbox_to_anchor=(1.01, 1), loc="upper left")
+    st.pyplot(fig)
+
+    st.markdown("### 🔁 What replaced the 2005 landcover (largest changes)")
+    changed = transitions[transitions["Changed"]]
+    st.dataframe(changed.nlargest(20, "Area_km2")[["Zone", "From", "To", "Pixels", "Area_km2"]])